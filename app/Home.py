@@ -11,6 +11,7 @@ from app.ui import (
     view_home,
     view_tmy_analysis,
     view_tmy_compare,
+    view_tmy_multi_compare,
     view_hourly_results,
 )
 
@@ -41,6 +42,8 @@ def main():
         view_tmy_analysis()
     elif tool == "tmy_compare":
         view_tmy_compare()
+    elif tool == "tmy_multi_compare":
+        view_tmy_multi_compare()
     elif tool == "hourly_results":
         view_hourly_results()
     else:
@@ -1,10 +1,10 @@
 # app/ui/__init__.py
 from .state import init_state, get_global_settings, set_tool
 from .layout import set_page_config, sidebar_global_settings, tool_header
-from .views import view_home, view_tmy_analysis, view_tmy_compare, view_hourly_results
+from .views import view_home, view_tmy_analysis, view_tmy_compare, view_tmy_multi_compare, view_hourly_results
 
 __all__ = [
     "init_state", "get_global_settings", "set_tool",
     "set_page_config", "sidebar_global_settings", "tool_header",
-    "view_home", "view_tmy_analysis", "view_tmy_compare","view_hourly_results",
+    "view_home", "view_tmy_analysis", "view_tmy_compare", "view_tmy_multi_compare", "view_hourly_results",
 ]
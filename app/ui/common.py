@@ -33,15 +33,24 @@ def render_warnings(warnings, title: str = "Warnings"):
         else:
             st.write("—")
 
-def render_logs(log_path: Path, title: str = "Logs"):
+def render_logs(log_path: Path, title: str = "Logs", text: str | None = None):
     with st.expander(title, expanded=False):
-        if log_path and log_path.exists():
+        if text:
+            st.code(text, language="text")
+        elif log_path and log_path.exists():
             st.code(log_path.read_text(encoding="utf-8"), language="text")
         else:
             st.write("No log file.")
 
-def render_pdf_download(pdf_path: Path, label: str = "Download PDF"):
-    if pdf_path and pdf_path.exists():
+def render_pdf_download(pdf_path: Path, label: str = "Download PDF", data: bytes | None = None):
+    if data:
+        st.download_button(
+            label=label,
+            data=data,
+            file_name=pdf_path.name,
+            mime="application/pdf",
+        )
+    elif pdf_path and pdf_path.exists():
         st.download_button(
             label=label,
             data=pdf_path.read_bytes(),
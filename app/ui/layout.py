@@ -126,6 +126,10 @@ def sidebar_tools_nav():
             st.session_state["tool"] = "tmy_compare"
             st.rerun()
 
+        if st.button(t("nav_tmy_multi_compare", lang), use_container_width=True):
+            st.session_state["tool"] = "tmy_multi_compare"
+            st.rerun()
+
         # --- Production ---
         st.subheader(t("sidebar_production", lang))
         if st.button(t("nav_hourly_results", lang), use_container_width=True):
@@ -1,24 +1,66 @@
 # app/ui/plots.py
 from __future__ import annotations
 
-from typing import Optional, Sequence
+from typing import Optional, Tuple
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+from config import PLOT_DOWNSAMPLE_METHOD
+from utils.decimate import downsample_indices
+from utils.pyramid import MinMaxPyramid
+from utils.binning import Histogram, compute_histogram
 
-def _downsample_time_series(df: pd.DataFrame, x: str, max_points: int = 20000) -> pd.DataFrame:
+
+def _downsample_time_series(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    max_points: int = 20000,
+    method: str = PLOT_DOWNSAMPLE_METHOD,
+) -> pd.DataFrame:
     """
-    Downsample by simple stride to keep UI responsive.
-    Preserves chronology. Good enough for visualization.
+    Downsample (x, y) to ~max_points rows, keeping the visually relevant ones:
+    - "minmax": min and max of each bucket (peaks/extremes kept exactly)
+    - "lttb":   Largest-Triangle-Three-Buckets (shape-preserving)
+    Preserves chronology. df must be NaN-free on y (callers dropna()).
     """
     if df is None or df.empty or max_points <= 0:
         return df
-    n = len(df)
-    if n <= max_points:
+    if len(df) <= max_points:
         return df
-    step = int(np.ceil(n / max_points))
-    return df.iloc[::step].copy()
+    idx = downsample_indices(df[x].to_numpy(), df[y].to_numpy(), max_points, method=method)
+    return df.take(idx)
+
+
+Window = Optional[Tuple[object, object]]
+
+
+def _series_points(
+    df: Optional[pd.DataFrame],
+    x: str,
+    y: str,
+    max_points: int,
+    method: str,
+    pyramid: Optional[MinMaxPyramid],
+    window: Window,
+):
+    """
+    (x, y) arrays for one trace: re-queried from the pyramid for the visible
+    window when one is given (bounded, exact at full zoom), else downsampled
+    with `method` (the pyramid always keeps the min/max of each bucket).
+    """
+    if pyramid is not None:
+        start, end = window or (None, None)
+        xs, ys, _ = pyramid.query(start, end, max_points=max_points)
+        return xs, ys
+    d = _downsample_time_series(df[[x, y]].dropna(), x=x, y=y, max_points=max_points, method=method)
+    return d[x], d[y]
+
+
+def _apply_window(fig: go.Figure, window: Window) -> None:
+    if window is not None:
+        fig.update_xaxes(range=[pd.Timestamp(window[0]), pd.Timestamp(window[1])])
 
 
 def time_series_single(
@@ -28,14 +70,23 @@ def time_series_single(
     name: str,
     unit: str = "",
     max_points: int = 20000,
+    method: str = PLOT_DOWNSAMPLE_METHOD,
+    pyramid: Optional[MinMaxPyramid] = None,
+    window: Window = None,
 ) -> go.Figure:
-    d = _downsample_time_series(df[[x, y]].dropna(), x=x, max_points=max_points)
+    """
+    With `pyramid`, the trace is the min/max aggregate of `window` (df may be
+    None); the chart is re-built for each new window instead of zooming into
+    a fixed set of decimated points. `method` ("minmax" | "lttb") only
+    applies without a pyramid.
+    """
+    xs, ys = _series_points(df, x, y, max_points, method, pyramid, window)
 
     fig = go.Figure()
     fig.add_trace(
         go.Scatter(
-            x=d[x],
-            y=d[y],
+            x=xs,
+            y=ys,
             mode="lines",
             name=name,
             line=dict(width=1.2),
@@ -62,6 +113,7 @@ def time_series_single(
         gridcolor="rgba(0,0,0,0.08)",
         zeroline=False,
     )
+    _apply_window(fig, window)
     return fig
 
 
@@ -74,13 +126,18 @@ def time_series_overlay(
     label2: str,
     unit: str = "",
     max_points: int = 20000,
+    method: str = PLOT_DOWNSAMPLE_METHOD,
+    pyramids: Optional[Tuple[MinMaxPyramid, MinMaxPyramid]] = None,
+    window: Window = None,
 ) -> go.Figure:
-    d1 = _downsample_time_series(df1[[x, y]].dropna(), x=x, max_points=max_points)
-    d2 = _downsample_time_series(df2[[x, y]].dropna(), x=x, max_points=max_points)
+    """Two series on one chart; `pyramids` / `method` as in time_series_single."""
+    p1, p2 = pyramids or (None, None)
+    x1, y1 = _series_points(df1, x, y, max_points, method, p1, window)
+    x2, y2 = _series_points(df2, x, y, max_points, method, p2, window)
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=d1[x], y=d1[y], mode="lines", name=label1, line=dict(width=1.2)))
-    fig.add_trace(go.Scatter(x=d2[x], y=d2[y], mode="lines", name=label2, line=dict(width=1.2)))
+    fig.add_trace(go.Scatter(x=x1, y=y1, mode="lines", name=label1, line=dict(width=1.2)))
+    fig.add_trace(go.Scatter(x=x2, y=y2, mode="lines", name=label2, line=dict(width=1.2)))
 
     ylabel = f"{y.upper()} ({unit})" if unit else y.upper()
 
@@ -102,6 +159,7 @@ def time_series_overlay(
         gridcolor="rgba(0,0,0,0.08)",
         zeroline=False,
     )
+    _apply_window(fig, window)
     return fig
 
 
@@ -113,16 +171,34 @@ def time_series_difference(
     label: str = "Difference",
     unit: str = "",
     max_points: int = 20000,
+    method: str = PLOT_DOWNSAMPLE_METHOD,
+    aligned: bool = False,
+    window: Window = None,
 ) -> go.Figure:
     """
     Plot df1[y] - df2[y] after aligning on x by merge_asof-like exact match on timestamp.
     Assumes same timestep after harmonization (your pipeline does hourly).
+    aligned=True: df1 / df2 are already row-aligned (same x), no merge.
+    With `window`, only that period is differenced and downsampled, so the
+    curve has the same resolution as the overlay above it.
     """
-    a = df1[[x, y]].dropna().copy()
-    b = df2[[x, y]].dropna().copy()
-    m = a.merge(b, on=x, how="inner", suffixes=("_1", "_2"))
-    m["diff"] = m[f"{y}_1"] - m[f"{y}_2"]
-    m = _downsample_time_series(m[[x, "diff"]], x=x, max_points=max_points)
+    if window is not None:
+        start, end = pd.Timestamp(window[0]), pd.Timestamp(window[1])
+        if aligned:
+            inside = df1[x].between(start, end).to_numpy()
+            df1, df2 = df1[inside], df2[inside]
+        else:
+            df1 = df1[df1[x].between(start, end)]
+            df2 = df2[df2[x].between(start, end)]
+
+    if aligned:
+        m = pd.DataFrame({x: df1[x], "diff": df1[y].to_numpy() - df2[y].to_numpy()}).dropna()
+    else:
+        a = df1[[x, y]].dropna()
+        b = df2[[x, y]].dropna()
+        m = a.merge(b, on=x, how="inner", suffixes=("_1", "_2"))
+        m["diff"] = m[f"{y}_1"] - m[f"{y}_2"]
+    m = _downsample_time_series(m[[x, "diff"]], x=x, y="diff", max_points=max_points, method=method)
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=m[x], y=m["diff"], mode="lines", name=label, line=dict(width=1.2)))
@@ -148,20 +224,99 @@ def time_series_difference(
         zeroline=True,
         zerolinecolor="rgba(0,0,0,0.25)",
     )
+    _apply_window(fig, window)
     return fig
 
 
 def histogram(
-    df: pd.DataFrame,
+    df: Optional[pd.DataFrame],
     col: str,
     title: str,
     unit: str = "",
     nbins: int = 60,
+    hist: Optional[Histogram] = None,
 ) -> go.Figure:
-    s = df[col].dropna()
+    """
+    Histogram drawn from bins computed server-side: only the bar geometry
+    (O(nbins)) is sent to the browser, never the raw column.
+    Pass `hist` to reuse cached bins (df may then be None).
+    """
+    if hist is None:
+        hist = compute_histogram(df[col].to_numpy(), nbins)
+
     fig = go.Figure()
-    fig.add_trace(go.Histogram(x=s, nbinsx=nbins, name=col, opacity=0.85))
-    fig.update_layout(height=360, margin=dict(l=40, r=15, t=40, b=40))
+    fig.add_trace(go.Bar(
+        x=hist.centers,
+        y=hist.counts,
+        width=hist.widths,
+        name=col,
+        opacity=0.85,
+        customdata=np.column_stack([hist.edges[:-1], hist.edges[1:]]),
+        hovertemplate="[%{customdata[0]:.4g}, %{customdata[1]:.4g}): %{y}<extra></extra>",
+    ))
+    fig.update_layout(height=360, margin=dict(l=40, r=15, t=40, b=40), bargap=0)
     fig.update_xaxes(title=f"{title} ({unit})" if unit else title)
     fig.update_yaxes(title="Count")
     return fig
+
+
+def threshold_sweep(
+    sweep: pd.DataFrame,
+    current_kw: float,
+    label_hours: str,
+    label_curtailed: str,
+    title: str = "",
+) -> go.Figure:
+    """
+    Hours above threshold and curtailed energy as a function of the threshold
+    (two y axes), with a vertical marker on the current threshold.
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=sweep["threshold_kw"], y=sweep["hours_above"],
+        mode="lines", name=label_hours, line=dict(width=1.6),
+    ))
+    fig.add_trace(go.Scatter(
+        x=sweep["threshold_kw"], y=sweep["curtailed_kwh"],
+        mode="lines", name=label_curtailed, line=dict(width=1.6), yaxis="y2",
+    ))
+    fig.add_vline(x=current_kw, line_dash="dash", line_color="rgba(0,0,0,0.45)")
+
+    fig.update_layout(
+        title=title,
+        height=420,
+        margin=dict(l=40, r=40, t=60, b=40),
+        hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0),
+        yaxis=dict(title=label_hours, showgrid=True, gridcolor="rgba(0,0,0,0.08)"),
+        yaxis2=dict(title=label_curtailed, overlaying="y", side="right", showgrid=False),
+    )
+    fig.update_xaxes(title="kW", showgrid=True, gridcolor="rgba(0,0,0,0.08)")
+    return fig
+
+
+def heatmap(
+    values: pd.DataFrame,
+    title: str = "",
+    unit: str = "",
+    diverging: bool = False,
+) -> go.Figure:
+    """
+    Heatmap of a small labelled matrix (e.g. sources x sources), values
+    written in the cells. Diverging scale centred on 0 for signed metrics.
+    """
+    z = values.to_numpy(dtype=float)
+    scale = dict(colorscale="RdBu", reversescale=True, zmid=0.0) if diverging else dict(colorscale="Viridis")
+    fig = go.Figure(go.Heatmap(
+        z=z,
+        x=[str(c) for c in values.columns],
+        y=[str(i) for i in values.index],
+        text=np.where(np.isfinite(z), np.vectorize(lambda v: f"{v:.3g}")(z), ""),
+        texttemplate="%{text}",
+        colorbar=dict(title=unit),
+        hovertemplate="%{y} vs %{x}: %{z:.4g}<extra></extra>",
+        **scale,
+    ))
+    fig.update_layout(title=title, height=120 + 45 * len(values.index), margin=dict(l=40, r=15, t=50, b=40))
+    fig.update_yaxes(autorange="reversed")
+    return fig
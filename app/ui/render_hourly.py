@@ -1,12 +1,84 @@
 from __future__ import annotations
 
+import numpy as np
 import streamlit as st
 import plotly.express as px
 
 from app.ui.common import render_plot
+from app.ui.plots import histogram, threshold_sweep, time_series_single
+from app.ui.widgets import time_window_slider
+from config import PLOT_WINDOW_MAX_POINTS
+from core.production.hourly_analyzer import threshold_tables
 from utils.formatting import format_number
 from utils.i18n import t
 
+def _render_threshold_sweep(index, threshold_kw: float, lang: str) -> None:
+    """
+    Balayage interactif : chaque déplacement du curseur interroge l'index
+    précalculé (pas de relecture ni de ré-analyse du fichier).
+    """
+    st.subheader(t("hourly_section_sweep", lang))
+    with st.expander(t("hourly_help_sweep_title", lang)):
+        st.markdown(t("hourly_help_sweep_body", lang))
+
+    p_max = float(np.ceil(index.p_max))
+    # Le curseur part du seuil analysé : Streamlit garde la valeur d'un
+    # widget à clé fixe, elle est donc réinitialisée à chaque nouvelle analyse
+    start = min(float(threshold_kw), p_max)
+    if st.session_state.get("hourly_sweep_for") != (start, p_max):
+        st.session_state["hourly_sweep_for"] = (start, p_max)
+        st.session_state["hourly_sweep_kw"] = start
+    live_kw = st.slider(
+        t("hourly_sweep_slider", lang),
+        min_value=0.0,
+        max_value=p_max,
+        step=max(round(p_max / 500.0, 1), 0.1),
+        key="hourly_sweep_kw",
+    )
+
+    live = threshold_tables(index, live_kw)
+    s = live["summary"]
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric(t("hourly_metric_hours_above", lang), format_number(s["hours_above"], 0))
+    c2.metric(t("hourly_metric_pct_above", lang), f"{s['pct_above_prod_time']:.1f} %")
+    c3.metric(t("hourly_metric_energy_above", lang), format_number(s["energy_kwh"], 0))
+    c4.metric(t("hourly_metric_curtailed", lang), format_number(s["curtailed_kwh"], 0))
+
+    sweep = index.sweep(np.linspace(0.0, p_max, 2000))
+    fig = threshold_sweep(
+        sweep,
+        live_kw,
+        label_hours=t("hourly_metric_hours_above", lang),
+        label_curtailed=t("hourly_metric_curtailed", lang),
+        title=t("hourly_chart_sweep", lang),
+    )
+    render_plot(fig)
+
+    if len(live["monthly"]) > 0:
+        fig = px.bar(live["monthly"], x="month_name", y="hours_above", title=t("hourly_chart_monthly_hours", lang))
+        fig.update_layout(xaxis_tickangle=-45, height=420)
+        render_plot(fig)
+
+
+def _render_egrid_series(ctx, lang: str) -> None:
+    """Série E_Grid zoomable : chaque fenêtre est relue dans la pyramide min/max."""
+    st.subheader(t("hourly_section_timeseries", lang))
+    st.caption(t("hourly_timeseries_caption", lang))
+
+    index = ctx.df_raw.index
+    window = time_window_slider(
+        t("hourly_timeseries_window", lang), index.min(), index.max(), key="hourly_egrid_window"
+    )
+    fig = time_series_single(
+        None, "date", "E_Grid", "E_Grid",
+        unit=ctx.units_map.get("E_Grid", ""),
+        max_points=PLOT_WINDOW_MAX_POINTS,
+        pyramid=ctx.features.pyramid("E_Grid"),
+        window=window,
+    )
+    render_plot(fig)
+
+
 def render_hourly_results_result(res):
     lang = st.session_state.get("lang", "fr")
 
@@ -16,6 +88,9 @@ def render_hourly_results_result(res):
     st.divider()
     st.header(t("hourly_title", lang))
 
+    if ctx.streamed:
+        st.info(t("hourly_streaming_note", lang))
+
     # -------------------------
     # Synthèse globale
     # -------------------------
@@ -60,6 +135,13 @@ def render_hourly_results_result(res):
         fig.update_layout(xaxis_tickangle=-45, yaxis_ticksuffix=" %", height=520)
         render_plot(fig)
 
+    index = thr.get("index")
+    if index is not None and index.p_max > 0:
+        _render_threshold_sweep(index, summ.get("threshold_kw", 0.0), lang)
+
+    if "E_Grid" in ctx.df_raw.columns and len(ctx.df_raw) > 0:
+        _render_egrid_series(ctx, lang)
+
     # =====================================================
     # CLIPPING
     # =====================================================
@@ -108,27 +190,40 @@ def render_hourly_results_result(res):
         )
         fig.update_layout(yaxis_ticksuffix=" %", height=520)
         render_plot(fig)
+
+        # Histogramme fin de E_Grid : bins calculés côté serveur depuis l'index trié
+        if index is not None and index.p_max > 0:
+            fig = histogram(
+                None, "E_Grid", "E_Grid",
+                unit=ctx.units_map.get("E_Grid", ""),
+                hist=index.histogram(nbins=60),
+            )
+            fig.update_layout(title=t("hourly_chart_powerhist", lang))
+            render_plot(fig)
     else:
         st.info(t("hourly_powerdist_none", lang))
 
     # -------------------------
-    # Downloads (inchangé)
+    # Downloads (rapports construits au clic s'ils ne sont pas déjà prêts)
     # -------------------------
     st.divider()
     st.header(t("downloads_title", lang))
 
     col1, col2 = st.columns(2)
     with col1:
-        st.download_button(
-            t("download_excel", lang),
-            data=res.excel_bytes,
-            file_name="hourly_results_analysis.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
+        if res.excel_available:
+            st.download_button(
+                t("download_excel", lang),
+                data=res.excel.get,
+                file_name="hourly_results_analysis.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+        else:
+            st.warning(t("download_excel_source_missing", lang))
     with col2:
         st.download_button(
             t("download_pdf", lang),
-            data=res.pdf_bytes,
+            data=res.pdf.get,
             file_name="hourly_results_analysis.pdf",
             mime="application/pdf",
         )
\ No newline at end of file
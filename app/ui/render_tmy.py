@@ -17,9 +17,24 @@ from app.ui.plots import (
     time_series_overlay,
     time_series_difference,
     histogram,
+    heatmap,
 )
+from app.ui.widgets import time_window_slider
+from config import PLOT_DOWNSAMPLE_METHOD, PLOT_WINDOW_MAX_POINTS
+from utils.decimate import DOWNSAMPLE_METHODS
 
 
+def _downsample_selector(key: str) -> str:
+    """Downsampling used by long time series (min/max keeps extremes, LTTB keeps shape)."""
+    return st.radio(
+        "Downsampling",
+        DOWNSAMPLE_METHODS,
+        index=DOWNSAMPLE_METHODS.index(PLOT_DOWNSAMPLE_METHOD),
+        format_func={"minmax": "Min/max per bucket", "lttb": "LTTB"}.get,
+        horizontal=True,
+        key=key,
+    )
+
 
 def render_tmy_analysis_result(result):
     df = result.dataset.df
@@ -32,11 +47,17 @@ def render_tmy_analysis_result(result):
         "Period": f"{q.start} → {q.end}",
         "Time step": f"{result.dataset.time_step_minutes} min",
     }
+    if q.gaps or q.n_duplicates:
+        kpis["Gaps / duplicates"] = f"{len(q.gaps)} ({q.n_missing} missing) / {q.n_duplicates}"
     if result.energy.annual_ghi is not None:
         kpis["Annual GHI"] = f"{result.energy.annual_ghi:.1f} {result.energy.unit}"
     if result.energy.annual_dni is not None:
         kpis["Annual DNI"] = f"{result.energy.annual_dni:.1f} {result.energy.unit}"
-    if "temp" in df.columns:
+    temp = result.dataset.column_stats.get("temp") if result.dataset.column_stats else None
+    if temp is not None:
+        kpis["Temp mean"] = f"{temp['mean']:.1f} {units.get('temp','')}"
+        kpis["Temp min/max"] = f"{temp['min']:.1f} / {temp['max']:.1f} {units.get('temp','')}"
+    elif "temp" in df.columns:
         kpis["Temp mean"] = f"{df['temp'].mean():.1f} {units.get('temp','')}"
         kpis["Temp min/max"] = f"{df['temp'].min():.1f} / {df['temp'].max():.1f} {units.get('temp','')}"
 
@@ -48,30 +69,32 @@ def render_tmy_analysis_result(result):
     tabs = st.tabs(["Time series", "Distributions"])
 
     with tabs[0]:
-        if "ghi" in df.columns:
-            fig = time_series_single(df, "datetime", "ghi", "GHI", unit=units.get("ghi", ""))
-            render_plot(fig)
-
-        if "dni" in df.columns:
-            fig = time_series_single(df, "datetime", "dni", "DNI", unit=units.get("dni", ""))
-            render_plot(fig)
-
-        if "temp" in df.columns:
-            fig = time_series_single(df, "datetime", "temp", "Temperature", unit=units.get("temp", ""))
-            render_plot(fig)
+        # Charts re-query each series' min/max pyramid for the visible window
+        window = time_window_slider("Visible window", q.start, q.end, key="tmy_analysis_window")
+
+        for col, name in (("ghi", "GHI"), ("dni", "DNI"), ("temp", "Temperature")):
+            if col in df.columns:
+                fig = time_series_single(
+                    None, "datetime", col, name,
+                    unit=units.get(col, ""),
+                    max_points=PLOT_WINDOW_MAX_POINTS,
+                    pyramid=result.dataset.pyramid(col),
+                    window=window,
+                )
+                render_plot(fig)
 
     with tabs[1]:
         c1, c2 = st.columns(2)
         with c1:
             if "ghi" in df.columns:
                 render_plot(
-                    histogram(df, "ghi", "GHI", unit=units.get("ghi", "")),
+                    histogram(None, "ghi", "GHI", unit=units.get("ghi", ""), hist=result.dataset.histogram("ghi")),
                     width_ratio=(0.5, 2.5, 0.5),  # histogram slightly wider
                 )
         with c2:
             if "temp" in df.columns:
                 render_plot(
-                    histogram(df, "temp", "Temperature", unit=units.get("temp", "")),
+                    histogram(None, "temp", "Temperature", unit=units.get("temp", ""), hist=result.dataset.histogram("temp")),
                     width_ratio=(0.5, 2.5, 0.5),
                 )
 
@@ -87,9 +110,9 @@ def render_tmy_analysis_result(result):
 
     # --- Exports + QA
     st.divider()
-    render_pdf_download(result.report_pdf, label="Download PDF")
+    render_pdf_download(result.report_pdf, label="Download PDF", data=result.pdf_bytes)
     render_warnings(result.dataset.warnings, title="Warnings / checks")
-    render_logs(result.log_path, title="Logs")
+    render_logs(result.log_path, title="Logs", text=result.log_text)
     render_dataframe(df, title="Data preview")
 
 
@@ -100,12 +123,15 @@ def render_tmy_compare_result(result):
     df2 = ds2.df
 
     unit_map = ds1.units_by_col  # same target units if your pipeline normalizes
+    aligned = getattr(result, "aligned", None)  # aligned pair computed once by compare_tmy_sources
 
     # --- KPIs
     kpis = {
         "Common period": f"{result.common_start} → {result.common_end}",
         "Alert": "YES" if result.alert_flag else "NO",
     }
+    if aligned is not None:
+        kpis["Alignment"] = f"{aligned.mode} ({len(aligned.df1):,} slots)"
     if result.energy1.annual_ghi is not None and result.energy2.annual_ghi is not None:
         kpis["Annual GHI"] = f"{result.energy1.annual_ghi:.1f} vs {result.energy2.annual_ghi:.1f} {result.energy1.unit}"
     if result.energy1.annual_dni is not None and result.energy2.annual_dni is not None:
@@ -126,26 +152,99 @@ def render_tmy_compare_result(result):
     var = st.selectbox("Variable", vars_to_plot, index=0 if vars_to_plot else None)
     if var:
         unit = unit_map.get(var, "")
+        window = time_window_slider("Visible window", result.common_start, result.common_end, key="tmy_compare_window")
 
+        if aligned is not None:
+            pyramids = (aligned.pyramid(1, var), aligned.pyramid(2, var))
+        else:
+            pyramids = (ds1.pyramid(var), ds2.pyramid(var))
         fig = time_series_overlay(
             df1, df2, "datetime", var,
             ds1.source_name, ds2.source_name,
             unit=unit,
+            max_points=PLOT_WINDOW_MAX_POINTS,
+            pyramids=pyramids,
+            window=window,
         )
         render_plot(fig)
 
-        show_diff = st.checkbox("Show difference curve (File1 - File2)", value=True)
+        # the overlay is drawn from min/max pyramids; only the difference
+        # curve is downsampled on the fly
+        c1, c2 = st.columns([1, 1])
+        with c1:
+            show_diff = st.checkbox("Show difference curve (File1 - File2)", value=True)
+        with c2:
+            method = _downsample_selector("tmy_compare_downsample") if show_diff else None
         if show_diff:
             figd = time_series_difference(
-                df1, df2, "datetime", var,
+                aligned.df1 if aligned is not None else df1,
+                aligned.df2 if aligned is not None else df2,
+                "datetime", var,
                 label=f"{var.upper()} diff",
                 unit=unit,
+                max_points=PLOT_WINDOW_MAX_POINTS,
+                method=method,
+                aligned=aligned is not None,
+                window=window,
             )
             render_plot(figd, width_ratio=(1, 1.5, 1))  # diff curve slightly narrower
 
     # --- Exports + QA
     st.divider()
-    render_pdf_download(result.report_pdf, label="Download PDF")
+    render_pdf_download(result.report_pdf, label="Download PDF", data=result.pdf_bytes)
     warn = (ds1.warnings or []) + (ds2.warnings or []) + (result.energy1.warnings or []) + (result.energy2.warnings or [])
+    if aligned is not None:
+        warn += aligned.warnings
+    render_warnings(warn, title="Warnings / checks")
+    render_logs(result.log_path, title="Logs", text=result.log_text)
+
+
+def render_tmy_multi_compare_result(result):
+    unit_map = result.datasets[0].units_by_col
+
+    # --- KPIs
+    kpis = {
+        "Sources": str(len(result.names)),
+        "Alignment": f"{result.alignment} ({len(result.times):,} slots)",
+    }
+    if len(result.times):
+        kpis["Common period"] = f"{result.times[0]} → {result.times[-1]}"
+    render_kpis(kpis)
+
+    # --- Annual irradiation per source
+    st.subheader("Annual irradiation")
+    st.dataframe(result.energy_table().rename(columns=lambda c: f"{c} ({result.energies[0].unit})"))
+
+    # --- Deviation from the ensemble median
+    st.subheader("Deviation from the ensemble median")
+    render_plot(heatmap(result.median_bias_pct(), title="Bias vs median (%)", unit="%", diverging=True))
+    var = st.selectbox("Variable", result.variables, key="tmy_multi_compare_var")
+    if var:
+        st.dataframe(result.deviation[var].rename(columns={"mbe": "MBE", "rmse": "RMSE", "bias_pct": "Bias (%)"}))
+
+        # --- Pairwise matrices
+        st.subheader("Pairwise differences (row vs column)")
+        metric = st.radio(
+            "Metric",
+            ["mbe", "rmse", "mean_pct"],
+            format_func={"mbe": "MBE", "rmse": "RMSE", "mean_pct": "Mean %"}.get,
+            horizontal=True,
+            key="tmy_multi_compare_metric",
+        )
+        unit = "%" if metric == "mean_pct" else unit_map.get(var, "")
+        fig = heatmap(
+            result.matrix(var, metric),
+            title=f"{var.upper()} — {metric.upper()}",
+            unit=unit,
+            diverging=metric == "mbe",
+        )
+        render_plot(fig)
+
+    # --- Exports + QA
+    st.divider()
+    render_pdf_download(result.report_pdf, label="Download PDF", data=result.pdf_bytes)
+    warn = [w for ds in result.datasets for w in (ds.warnings or [])]
+    warn += [w for e in result.energies for w in (e.warnings or [])]
+    warn += result.alignment_warnings
     render_warnings(warn, title="Warnings / checks")
-    render_logs(result.log_path, title="Logs")
+    render_logs(result.log_path, title="Logs", text=result.log_text)
@@ -6,16 +6,21 @@ from PIL import Image
 
 from config import OUTPUTS_DIR, OUTPUT_MODE
 from utils.i18n import t
+from utils.io import source_buffer
+from utils.memo import content_hash
+from utils.result_cache import RESULT_CACHE
+from utils.session_store import SESSION_STORE
 from config import LOGO_PNG, APP_NAME, APP_VERSION
 
 from app.ui.layout import tool_header
-from app.ui.widgets import uploader_one, uploader_two, run_button
+from app.ui.widgets import uploader_one, uploader_two, uploader_many, run_button
 
 from core.meteo.tmy_analysis import analyze_tmy_source
-from core.meteo.tmy_compare import compare_tmy_sources
+from core.meteo.tmy_compare import ALIGNMENT_MODES, compare_tmy_sources
+from core.meteo.tmy_multi_compare import compare_tmy_many
 
 from core.production import analyze_hourly_source
-from app.ui.render_tmy import render_tmy_analysis_result, render_tmy_compare_result
+from app.ui.render_tmy import render_tmy_analysis_result, render_tmy_compare_result, render_tmy_multi_compare_result
 from app.ui.render_hourly import render_hourly_results_result
 
 
@@ -24,9 +29,46 @@ from app.ui.render_hourly import render_hourly_results_result
 # =============================================================================
 
 def _file_sig(up) -> str | None:
+    """
+    Content hash of an upload (hashed once per uploaded file, then reused
+    across reruns). Identical files give the same signature in every session.
+    """
     if not up:
         return None
-    return f"{up.name}|{up.size}"
+    hashes = st.session_state.setdefault("_upload_hashes", {})
+    file_id = getattr(up, "file_id", None) or f"{up.name}|{up.size}"
+    if file_id not in hashes:
+        if len(hashes) > 8:
+            hashes.clear()
+        with source_buffer(up) as view:
+            hashes[file_id] = content_hash(view)
+    return hashes[file_id]
+
+
+def _cached_run(key: tuple, compute):
+    """
+    Result shared by all sessions for the same inputs (content hash + options);
+    concurrent identical runs wait for a single computation.
+    """
+    res, hit = RESULT_CACHE.get_or_compute(key, compute)
+    if hit:
+        st.caption(t("result_reused", st.session_state.get("lang", "fr")))
+    return res
+
+
+def _store_result(result_key: str, res) -> None:
+    """
+    Keep a result for this session through the session store: only a small
+    handle lives in st.session_state, the store may spill the result to disk
+    under memory pressure. Popping the handle (or ending the session) frees it.
+    """
+    st.session_state[result_key] = SESSION_STORE.put(res)
+
+
+def _stored_result(result_key: str):
+    """Result kept by _store_result (rehydrated from disk if it was spilled)."""
+    handle = st.session_state.get(result_key)
+    return handle.get() if handle is not None else None
 
 
 def _invalidate_on_change(sig_key: str, result_key: str, new_sig: str | None) -> None:
@@ -73,7 +115,7 @@ def view_home():
     st.subheader(t("home_tools_title", lang))
     st.caption(t("home_tools_subtitle", lang))
 
-    c1, c2, c3 = st.columns(3)
+    c1, c2, c3, c4 = st.columns(4)
     with c1:
         if st.button("📄 " + t("tmy_analysis_title", lang), use_container_width=True):
             st.session_state["tool"] = "tmy_analysis"
@@ -83,6 +125,10 @@ def view_home():
             st.session_state["tool"] = "tmy_compare"
             st.rerun()
     with c3:
+        if st.button("🗂️ " + t("tmy_multi_compare_title", lang), use_container_width=True):
+            st.session_state["tool"] = "tmy_multi_compare"
+            st.rerun()
+    with c4:
         if st.button("⚡ " + t("hourly_results_title", lang), use_container_width=True):
             st.session_state["tool"] = "hourly_results"
             st.rerun()
@@ -119,21 +165,28 @@ def view_tmy_analysis():
 
     # Run
     if up is not None and run_button(t("run_analysis", lang), key="run_tmy_analysis"):
+        options = dict(
+            target_irradiance_unit=st.session_state.get("irradiance_unit", "kW/m²"),
+            energy_unit=st.session_state.get("energy_unit", "kWh/m²"),
+            resample_hourly_if_subhourly=st.session_state.get("resample_hourly", True),
+        )
         with st.spinner("Analyse en cours…"):
-            res = analyze_tmy_source(
-                source=up.getvalue(),
-                source_name=up.name,
-                outputs_dir=OUTPUTS_DIR,
-                output_mode=OUTPUT_MODE,
-                target_irradiance_unit=st.session_state.get("irradiance_unit", "kW/m²"),
-                energy_unit=st.session_state.get("energy_unit", "kWh/m²"),
-                resample_hourly_if_subhourly=st.session_state.get("resample_hourly", True),
+            res = _cached_run(
+                ("tmy_analysis", _file_sig(up), up.name, tuple(sorted(options.items()))),
+                lambda: analyze_tmy_source(
+                    source=up,
+                    source_name=up.name,
+                    outputs_dir=OUTPUTS_DIR,
+                    output_mode=OUTPUT_MODE,
+                    source_key=_file_sig(up),
+                    **options,
+                ),
             )
-        st.session_state["tmy_analysis_result"] = res
+        _store_result("tmy_analysis_result", res)
         st.success(t("report_ready", lang))
 
     # Render memo
-    res = st.session_state.get("tmy_analysis_result")
+    res = _stored_result("tmy_analysis_result")
     if res is not None:
         render_tmy_analysis_result(res)
 
@@ -175,25 +228,42 @@ def view_tmy_compare():
     else:
         st.info("Charge deux fichiers TMY pour lancer la comparaison.")
 
+    alignment = st.radio(
+        t("tmy_alignment", lang),
+        ALIGNMENT_MODES,
+        format_func=lambda m: t(f"tmy_alignment_{m}", lang),
+        horizontal=True,
+        key="tmy_compare_alignment",
+    )
+
     # Run
     if (up1 is not None and up2 is not None) and run_button(t("run_compare", lang), key="run_tmy_compare"):
+        options = dict(
+            target_irradiance_unit=st.session_state.get("irradiance_unit", "kW/m²"),
+            energy_unit=st.session_state.get("energy_unit", "kWh/m²"),
+            resample_hourly_if_subhourly=st.session_state.get("resample_hourly", True),
+            alignment=alignment,
+        )
         with st.spinner("Comparaison en cours…"):
-            res = compare_tmy_sources(
-                source1=up1.getvalue(),
-                name1=up1.name,
-                source2=up2.getvalue(),
-                name2=up2.name,
-                outputs_dir=OUTPUTS_DIR,
-                output_mode=OUTPUT_MODE,
-                target_irradiance_unit=st.session_state.get("irradiance_unit", "kW/m²"),
-                energy_unit=st.session_state.get("energy_unit", "kWh/m²"),
-                resample_hourly_if_subhourly=st.session_state.get("resample_hourly", True),
+            res = _cached_run(
+                ("tmy_compare", _file_sig(up1), up1.name, _file_sig(up2), up2.name, tuple(sorted(options.items()))),
+                lambda: compare_tmy_sources(
+                    source1=up1,
+                    name1=up1.name,
+                    source2=up2,
+                    name2=up2.name,
+                    outputs_dir=OUTPUTS_DIR,
+                    output_mode=OUTPUT_MODE,
+                    source_key1=_file_sig(up1),
+                    source_key2=_file_sig(up2),
+                    **options,
+                ),
             )
-        st.session_state["tmy_compare_result"] = res
+        _store_result("tmy_compare_result", res)
         st.success(t("report_ready", lang))
 
     # Render memo
-    res = st.session_state.get("tmy_compare_result")
+    res = _stored_result("tmy_compare_result")
     if res is not None:
         render_tmy_compare_result(res)
 
@@ -203,6 +273,72 @@ def view_tmy_compare():
         st.rerun()
 
 
+# =============================================================================
+# Meteo — TMY N-way Compare
+# =============================================================================
+
+def view_tmy_multi_compare():
+    lang = st.session_state.get("lang", "fr")
+    tool_header(t("tmy_multi_compare_title", lang))
+
+    # Uploads
+    ups = uploader_many(t("upload_many", lang), key="tmy_multi_cmp")
+
+    new_sig = "||".join(_file_sig(up) for up in ups) if len(ups) >= 2 else None
+    _invalidate_on_change(
+        sig_key="tmy_multi_compare_sig",
+        result_key="tmy_multi_compare_result",
+        new_sig=new_sig,
+    )
+
+    if len(ups) >= 2:
+        for up in ups:
+            st.caption(f"{up.name} — {up.size/1024:.1f} KB")
+    else:
+        st.info("Charge au moins deux fichiers TMY pour lancer la comparaison.")
+
+    alignment = st.radio(
+        t("tmy_multi_alignment", lang),
+        ALIGNMENT_MODES,
+        format_func=lambda m: t(f"tmy_alignment_{m}", lang),
+        horizontal=True,
+        key="tmy_multi_compare_alignment",
+    )
+
+    # Run
+    if len(ups) >= 2 and run_button(t("run_multi_compare", lang), key="run_tmy_multi_compare"):
+        options = dict(
+            target_irradiance_unit=st.session_state.get("irradiance_unit", "kW/m²"),
+            energy_unit=st.session_state.get("energy_unit", "kWh/m²"),
+            resample_hourly_if_subhourly=st.session_state.get("resample_hourly", True),
+            alignment=alignment,
+        )
+        with st.spinner("Comparaison en cours…"):
+            res = _cached_run(
+                ("tmy_multi_compare", tuple((_file_sig(up), up.name) for up in ups), tuple(sorted(options.items()))),
+                lambda: compare_tmy_many(
+                    sources=ups,
+                    names=[up.name for up in ups],
+                    outputs_dir=OUTPUTS_DIR,
+                    output_mode=OUTPUT_MODE,
+                    source_keys=[_file_sig(up) for up in ups],
+                    **options,
+                ),
+            )
+        _store_result("tmy_multi_compare_result", res)
+        st.success(t("report_ready", lang))
+
+    # Render memo
+    res = _stored_result("tmy_multi_compare_result")
+    if res is not None:
+        render_tmy_multi_compare_result(res)
+
+    # Clear
+    if st.button("🧹 Clear results", use_container_width=True, key="clear_tmy_multi_compare"):
+        st.session_state.pop("tmy_multi_compare_result", None)
+        st.rerun()
+
+
 # =============================================================================
 # Production — Hourly Results
 # =============================================================================
@@ -238,16 +374,20 @@ def view_hourly_results() -> None:
     # Run
     if run_button(t("run_hourly", lang), key="run_hourly"):
         with st.spinner("Analyse en cours…"):
-            res = analyze_hourly_source(
-                source=up.getvalue(),
-                source_name=up.name,
-                threshold_kw=float(threshold_kw),
+            res = _cached_run(
+                ("hourly_results", _file_sig(up), up.name, float(threshold_kw)),
+                lambda: analyze_hourly_source(
+                    source=up,
+                    source_name=up.name,
+                    threshold_kw=float(threshold_kw),
+                    source_key=_file_sig(up),
+                ),
             )
-        st.session_state["hourly_result"] = res
+        _store_result("hourly_result", res)
         st.success(t("report_ready", lang))
 
     # Render memo
-    res = st.session_state.get("hourly_result")
+    res = _stored_result("hourly_result")
     if res is None:
         return
 
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
+import pandas as pd
 import streamlit as st
 
 
@@ -16,5 +19,32 @@ def uploader_two(label_a: str, label_b: str, key_a: str, key_b: str, types: list
     return up1, up2
 
 
+def uploader_many(label: str, *, key: str, types: list[str] | None = None) -> list:
+    return st.file_uploader(label, type=types, key=key, accept_multiple_files=True) or []
+
+
 def run_button(label: str, *, key: str | None = None) -> bool:
     return st.button(label, key=key)
+
+
+def time_window_slider(label: str, start, end, *, key: str):
+    """
+    Visible window (start, end) of a time-series chart. Charts are re-queried
+    for this window, so zooming in reveals full-resolution detail.
+    Returns None (whole series) when the period is unknown or empty.
+    """
+    if start is None or end is None or pd.isna(start) or pd.isna(end):
+        return None
+    start = pd.Timestamp(start).to_pydatetime()
+    end = pd.Timestamp(end).to_pydatetime()
+    if end <= start:
+        return None
+    return st.slider(
+        label,
+        min_value=start,
+        max_value=end,
+        value=(start, end),
+        step=timedelta(hours=1),
+        format="YYYY-MM-DD HH:mm",
+        key=key,
+    )
@@ -15,6 +15,7 @@ TEXTS = {
     # --- Navigation ---
     "nav_tmy_analysis": "🔎 TMY Analysis",
     "nav_tmy_compare": "🆚 TMY Comparison",
+    "nav_tmy_multi_compare": "🗂️ TMY Comparison (N sources)",
     "nav_hourly_results": "📈 Hourly Results (PVSyst)",
 
     # --- Home
@@ -26,6 +27,7 @@ TEXTS = {
         "- time series quality checks and consistency\n"
         "- statistics and visualizations\n"
         "- comparison of two sources (gaps, common period alignment)\n"
+        "- N-way comparison (pairwise difference matrices, deviation from the median)\n"
         "- time step handling (hourly / sub-hourly)\n"
         "- unit normalization (irradiance / energy)\n\n"
         "**Production (PVSyst Hourly Results)**\n"
@@ -51,12 +53,14 @@ TEXTS = {
     # --- Titles ---
     "tmy_analysis_title": "TMY Analysis",
     "tmy_compare_title": "TMY Comparison",
+    "tmy_multi_compare_title": "TMY Comparison (N sources)",
     "hourly_results_title": "Hourly Results Analysis",
 
     # --- Uploads ---
     "upload_one": "Upload a TMY file (PVSyst CSV)",
     "upload_two_a": "Upload TMY #1",
     "upload_two_b": "Upload TMY #2",
+    "upload_many": "Upload two or more TMY files (PVSyst CSV)",
     "upload_hourly": "Upload an Hourly Results file (PVSyst CSV)",
 
     # --- Options / Units ---
@@ -68,13 +72,22 @@ TEXTS = {
         "(sum irradiance / mean temperature & wind)"
     ),
 
+    # --- TMY comparison alignment ---
+    "tmy_alignment": "Alignment of the two files",
+    "tmy_alignment_auto": "Auto",
+    "tmy_alignment_absolute": "Absolute dates",
+    "tmy_alignment_climatological": "Climatological (month / day / hour)",
+    "tmy_multi_alignment": "Alignment of the files",
+
     # --- Actions ---
     "run_analysis": "Run analysis",
     "run_compare": "Run comparison",
+    "run_multi_compare": "Run N-way comparison",
     "run_hourly": "Run Hourly Results analysis",
 
     # --- Outputs ---
     "report_ready": "Report successfully generated.",
+    "result_reused": "Result reused: this file was already analyzed with the same options.",
     "download_pdf": "Download PDF",
     "download_excel": "Download Excel",
 
@@ -122,6 +135,25 @@ TEXTS = {
     "hourly_chart_seasonal_hours": "Seasonal distribution — Hours > threshold",
     "hourly_chart_monthly_pct": "% of prod time > threshold (monthly)",
 
+    "hourly_section_sweep": "Interactive threshold sweep",
+    "hourly_help_sweep_title": "ℹ️ How to use the sweep?",
+    "hourly_help_sweep_body": """
+    Move the slider to explore **any threshold** without re-running the analysis.
+
+    - Hours and energy above the threshold are recomputed instantly.
+    - **Curtailed energy** is the sum of max(P − threshold, 0):
+      the energy lost if grid injection were capped at the threshold.
+    - Excel / PDF reports still use the threshold entered before the analysis.
+    """,
+    "hourly_sweep_slider": "Explored threshold (kW)",
+    "hourly_metric_curtailed": "Energy curtailed at threshold (kWh)",
+    "hourly_chart_sweep": "Hours > threshold and curtailed energy vs threshold",
+
+    "hourly_streaming_note": "Large file: streamed analysis (bounded memory). The threshold sweep, detailed histogram and \"Hourly data\" sheet are not available; the E_Grid series is shown as an hourly min/max envelope.",
+    "hourly_section_timeseries": "E_Grid hourly series",
+    "hourly_timeseries_window": "Visible window",
+    "hourly_timeseries_caption": "Narrowing the window reloads the data at full resolution.",
+
     "hourly_section_clipping": "Inverter clipping",
     "hourly_help_clipping_title": "ℹ️ What is inverter clipping and why it matters?",
     "hourly_help_clipping_body": """
@@ -148,10 +180,12 @@ TEXTS = {
     - Power is expressed as % of the observed maximum.
     """,
     "hourly_chart_powerdist": "Operating time distribution (%)",
+    "hourly_chart_powerhist": "E_Grid distribution (production hours)",
     "hourly_powerdist_none": "Power distribution: no production (E_Grid <= 0) or insufficient data.",
 
     "downloads_title": "Downloads",
     "download_excel": "📥 Download Excel",
+    "download_excel_source_missing": "Excel report unavailable: the source file of this analysis is no longer on disk. Run the analysis again.",
     "download_pdf": "📥 Download PDF",
 
 }
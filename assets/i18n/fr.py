@@ -15,6 +15,7 @@ TEXTS = {
     # --- Navigation ---
     "nav_tmy_analysis": "🔎 Analyse TMY",
     "nav_tmy_compare": "🆚 Comparaison TMY",
+    "nav_tmy_multi_compare": "🗂️ Comparaison TMY (N sources)",
     "nav_hourly_results": "📈 Hourly Results (PVSyst)",
 
     # --- Home
@@ -26,6 +27,7 @@ TEXTS = {
         "- contrôle qualité et cohérence des séries\n"
         "- statistiques et visualisations\n"
         "- comparaison de deux sources (écarts, alignement des périodes)\n"
+        "- comparaison de N sources (matrices d’écarts, écart à la médiane)\n"
         "- gestion du pas de temps (horaire / sub-hourly)\n"
         "- normalisation des unités (irradiance / énergie)\n\n"
         "**Production (PVSyst Hourly Results)**\n"
@@ -50,12 +52,14 @@ TEXTS = {
     # --- Titles ---
     "tmy_analysis_title": "Analyse TMY",
     "tmy_compare_title": "Comparaison TMY",
+    "tmy_multi_compare_title": "Comparaison TMY (N sources)",
     "hourly_results_title": "Analyse Hourly Results",
 
     # --- Uploads ---
     "upload_one": "Importer un fichier TMY (CSV PVSyst)",
     "upload_two_a": "Importer le TMY #1",
     "upload_two_b": "Importer le TMY #2",
+    "upload_many": "Importer au moins deux fichiers TMY (CSV PVSyst)",
     "upload_hourly": "Importer un fichier Hourly Results (CSV PVSyst)",
 
     # --- Options / Units ---
@@ -67,13 +71,22 @@ TEXTS = {
         "(somme irradiance / moyenne température & vent)"
     ),
 
+    # --- TMY comparison alignment ---
+    "tmy_alignment": "Alignement des deux fichiers",
+    "tmy_alignment_auto": "Auto",
+    "tmy_alignment_absolute": "Dates absolues",
+    "tmy_alignment_climatological": "Climatologique (mois / jour / heure)",
+    "tmy_multi_alignment": "Alignement des fichiers",
+
     # --- Actions ---
     "run_analysis": "Lancer l’analyse",
     "run_compare": "Lancer la comparaison",
+    "run_multi_compare": "Lancer la comparaison N sources",
     "run_hourly": "Lancer l’analyse Hourly Results",
 
     # --- Outputs ---
     "report_ready": "Rapport généré avec succès.",
+    "result_reused": "Résultat réutilisé : ce fichier a déjà été analysé avec les mêmes options.",
     "download_pdf": "Télécharger le PDF",
     "download_excel": "Télécharger l’Excel",
 
@@ -127,6 +140,25 @@ TEXTS = {
     "hourly_chart_seasonal_hours": "Répartition saisonnière – Heures > seuil",
     "hourly_chart_monthly_pct": "% du temps de prod > seuil (mensuel)",
 
+    "hourly_section_sweep": "Balayage interactif du seuil",
+    "hourly_help_sweep_title": "ℹ️ Comment utiliser le balayage ?",
+    "hourly_help_sweep_body": """
+    Déplacez le curseur pour explorer **n’importe quel seuil** sans relancer l’analyse.
+
+    - Les heures et l’énergie au-dessus du seuil sont recalculées instantanément.
+    - L’**énergie écrêtée** correspond à la somme de max(P − seuil, 0) :
+      l’énergie perdue si la puissance injectée était plafonnée au seuil.
+    - Les rapports Excel / PDF restent basés sur le seuil saisi avant l’analyse.
+    """,
+    "hourly_sweep_slider": "Seuil exploré (kW)",
+    "hourly_metric_curtailed": "Énergie écrêtée au seuil (kWh)",
+    "hourly_chart_sweep": "Heures > seuil et énergie écrêtée selon le seuil",
+
+    "hourly_streaming_note": "Fichier volumineux : analyse en flux (mémoire bornée). Le balayage de seuil, l'histogramme détaillé et la feuille « Données horaires » ne sont pas disponibles ; la série E_Grid est affichée en enveloppe min/max horaire.",
+    "hourly_section_timeseries": "Série horaire E_Grid",
+    "hourly_timeseries_window": "Fenêtre affichée",
+    "hourly_timeseries_caption": "Zoomer avec la fenêtre recharge les données à pleine résolution.",
+
     "hourly_section_clipping": "Clipping onduleur",
     "hourly_help_clipping_title": "ℹ️ Qu’est-ce que le clipping onduleur et pourquoi c’est important ?",
     "hourly_help_clipping_body": """
@@ -164,10 +196,12 @@ TEXTS = {
     à faible charge, à charge nominale ou proche de sa puissance maximale.
     """,
     "hourly_chart_powerdist": "Répartition du temps de fonctionnement (%)",
+    "hourly_chart_powerhist": "Distribution de E_Grid (heures de production)",
     "hourly_powerdist_none": "Distribution de puissance : pas de production (E_Grid <= 0) ou données insuffisantes.",
 
     "downloads_title": "Téléchargements",
     "download_excel": "📥 Télécharger Excel",
+    "download_excel_source_missing": "Rapport Excel indisponible : le fichier source de cette analyse n'est plus sur le disque. Relancez l'analyse.",
     "download_pdf": "📥 Télécharger le PDF",
 
 }
@@ -27,6 +27,34 @@ DEFAULT_RESAMPLE_TO_HOURLY_IF_SUBHOURLY = True
 # --- Output policy ---
 OUTPUT_MODE = "latest"  # "runs" (timestamped) or "latest" (overwrite)
 
+# --- Parse cache (parsed datasets, content-addressed, Feather) ---
+PARSE_CACHE_ENABLED = True
+PARSE_CACHE_DIR = OUTPUTS_DIR / "cache" / "parsed"
+PARSE_CACHE_MAX_MB = 512  # LRU eviction above this size
+
+# --- Raw sources kept on disk for on-demand column loading (content-addressed) ---
+SOURCE_SPOOL_DIR = OUTPUTS_DIR / "cache" / "sources"
+SOURCE_SPOOL_MAX_MB = 2048  # LRU eviction above this size
+
+# --- In-process memo of Hourly Results stages (parse / analyses / reports) ---
+STAGE_MEMO_MAX_ENTRIES = 64
+STAGE_MEMO_MAX_MB = 256  # estimated size of the memoized frames / results / reports
+
+# --- Cross-session cache of analysis results (content hash + options) ---
+RESULT_CACHE_MAX_MB = 1024  # LRU eviction above this estimated size
+
+# --- Per-session results (st.session_state): spilled to the run dir above this ---
+SESSION_STORE_MAX_MB = 512
+
+# --- Background report rendering (Excel / PDF), shared by all sessions ---
+REPORT_WORKERS = 4
+
+# --- N-way TMY comparison: sources parsed in parallel worker processes once
+# their total size reaches TMY_COMPARE_PARALLEL_MIN_MB (below, process startup
+# costs more than the parse itself)
+TMY_COMPARE_WORKERS = 4
+TMY_COMPARE_PARALLEL_MIN_MB = 8
+
 
 @dataclass(frozen=True)
 class MeteoDefaults:
@@ -39,9 +67,29 @@ METEO_DEFAULTS = MeteoDefaults()
 # --- Defaults for production / Hourly Results ---
 DEFAULT_THRESHOLD_KW = 500.0
 
+# Excel export: hourly data in the workbook ("sheet", split over several
+# sheets past Excel's row limit) or omitted ("none")
+HOURLY_EXCEL_RAW_DATA = "sheet"
+
+# PDF export: draw the monthly bar chart as reportlab vector graphics
+# instead of a matplotlib PNG
+HOURLY_PDF_VECTOR_CHARTS = False
+
 # PVSyst Hourly Results date parsing (csv "date" column)
 # Example: "01/01/90 09:00"
 PVSYST_DATE_FMT = "%d/%m/%y %H:%M"
 
+# Streaming mode for large Hourly Results files: read in chunks of
+# HOURLY_STREAM_CHUNK_ROWS rows into incremental accumulators (bounded memory,
+# no threshold sweep). Used automatically from this file size on.
+HOURLY_STREAMING_MIN_MB = 100
+HOURLY_STREAM_CHUNK_ROWS = 100_000
+
+# Interactive charts: downsampling of long time series ("minmax" | "lttb") drawn
+# without a min/max pyramid (TMY difference curve); windowed charts use pyramids
+PLOT_DOWNSAMPLE_METHOD = "minmax"
+# Zoomable charts (min/max pyramid): max points sent per visible window
+PLOT_WINDOW_MAX_POINTS = 4000
+
 # PDF
 PDF_PAGE_SIZE = "A4"
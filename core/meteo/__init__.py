@@ -3,6 +3,7 @@
 from .tmy_pvsyst import read_tmy_pvsyst, TMYDataset
 from .tmy_analysis import analyze_tmy_source, TMYAnalysisResult
 from .tmy_compare import compare_tmy_sources, TMYCompareResult
+from .tmy_multi_compare import compare_tmy_many, TMYMultiCompareResult
 
 __all__ = [
     "read_tmy_pvsyst",
@@ -11,4 +12,6 @@ __all__ = [
     "TMYAnalysisResult",
     "compare_tmy_sources",
     "TMYCompareResult",
+    "compare_tmy_many",
+    "TMYMultiCompareResult",
 ]
@@ -1,24 +1,29 @@
 # core/meteo/tmy_analysis.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Dict, Optional
 
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 
+from utils.io import BufferSource
 from utils.paths import RunPaths, make_run_folders
 from utils.validation import DataQuality
+from utils.column_stats import ColumnStats
 from utils.run_log import write_run_log
 from utils.energy import annual_irradiation, EnergySummary
+from utils.decimate import axes_pixel_width, minmax_envelope
 
 from core.meteo.tmy_pvsyst import TMYDataset, read_tmy_pvsyst
 
 
-TextSource = Union[str, Path, bytes]
+TextSource = BufferSource  # bytes, upload (BytesIO), memoryview or path
+
+REPORT_DPI = 250
 
 
 @dataclass(frozen=True)
@@ -29,10 +34,18 @@ class TMYAnalysisResult:
     report_pdf: Path
     log_path: Path
     run_dir: Path
+    # Report / log content: a cached result must not re-read report_pdf /
+    # log_path, which another upload with the same name may have overwritten
+    pdf_bytes: bytes = b""
+    log_text: str = ""
 
 
-def compute_basic_stats(df: pd.DataFrame) -> pd.DataFrame:
+def compute_basic_stats(df: pd.DataFrame, column_stats: Optional[ColumnStats] = None) -> pd.DataFrame:
     cols = [c for c in ["ghi", "dni", "dhi", "temp"] if c in df.columns]
+    if column_stats is not None:
+        return column_stats.table(cols)[["mean", "min", "max"]].rename(
+            columns={"mean": "Mean", "min": "Min", "max": "Max"}
+        )
     stats = df[cols].agg(["mean", "min", "max"]).transpose()
     stats = stats.rename(columns={"mean": "Mean", "min": "Min", "max": "Max"})
     return stats
@@ -47,7 +60,7 @@ def generate_pdf_onepage(
     file_label: str,
     output_pdf: Path,
 ) -> None:
-    fig = plt.figure(figsize=(8.27, 11.69))  # A4 portrait
+    fig = Figure(figsize=(8.27, 11.69))  # A4 portrait
     fig.suptitle("TMY Report (PVSyst)", fontsize=18, fontweight="bold", y=0.96)
 
     # --- File info ---
@@ -69,6 +82,8 @@ def generate_pdf_onepage(
         dq_text += "Missing values: none\n"
     else:
         dq_text += f"Missing values: {quality.n_nan} NaN, {quality.n_nat} NaT\n"
+    if quality.gaps or quality.n_duplicates:
+        dq_text += f"Gaps: {len(quality.gaps)} ({quality.n_missing} missing steps), duplicated timestamps: {quality.n_duplicates}\n"
     if quality.warning:
         dq_text += f"\nWarning: {quality.warning}\n"
     ax1.text(0.0, 0.95, dq_text, ha="left", va="top", fontsize=10, family="monospace")
@@ -97,7 +112,9 @@ def generate_pdf_onepage(
     if "ghi" in df.columns:
         ax3 = fig.add_axes([0.10, 0.30, 0.80, 0.18])
         ax3.set_title("Global Horizontal Irradiance (GHI)", fontsize=12, pad=8)
-        ax3.plot(df["datetime"], df["ghi"], lw=1.0)
+        # min/max envelope at ~2 points per pixel
+        x, y = minmax_envelope(df["datetime"].to_numpy(), df["ghi"].to_numpy(), axes_pixel_width(ax3, REPORT_DPI))
+        ax3.plot(x, y, lw=1.0)
         ax3.xaxis.set_major_locator(mdates.MonthLocator())
         ax3.xaxis.set_major_formatter(mdates.DateFormatter("%b"))
         ax3.set_xlabel("Month")
@@ -108,7 +125,8 @@ def generate_pdf_onepage(
     if "temp" in df.columns:
         ax4 = fig.add_axes([0.10, 0.08, 0.80, 0.18])
         ax4.set_title("Ambient Temperature", fontsize=12, pad=8)
-        ax4.plot(df["datetime"], df["temp"], lw=1.0)
+        x, y = minmax_envelope(df["datetime"].to_numpy(), df["temp"].to_numpy(), axes_pixel_width(ax4, REPORT_DPI))
+        ax4.plot(x, y, lw=1.0)
         ax4.xaxis.set_major_locator(mdates.MonthLocator())
         ax4.xaxis.set_major_formatter(mdates.DateFormatter("%b"))
         ax4.set_xlabel("Month")
@@ -116,8 +134,7 @@ def generate_pdf_onepage(
         ax4.grid(True, linestyle="--", alpha=0.35)
 
     output_pdf.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(output_pdf, dpi=250)
-    plt.close(fig)
+    fig.savefig(output_pdf, dpi=REPORT_DPI)
 
 
 def analyze_tmy_source(
@@ -128,6 +145,7 @@ def analyze_tmy_source(
     target_irradiance_unit: str = "kW/m²",
     energy_unit: str = "kWh/m²",
     resample_hourly_if_subhourly: bool = True,
+    source_key: Optional[str] = None,
 ) -> TMYAnalysisResult:
     tool_name = "TMY_Analysis"
     run: RunPaths = make_run_folders(outputs_dir, tool_name=tool_name, mode=output_mode)
@@ -137,15 +155,18 @@ def analyze_tmy_source(
         source_name=source_name,
         target_irradiance_unit=target_irradiance_unit,
         resample_hourly_if_subhourly=resample_hourly_if_subhourly,
+        source_key=source_key,
     )
 
-    stats = compute_basic_stats(dataset.df)
+    # both read the column stats computed once with the dataset
+    stats = compute_basic_stats(dataset.df, dataset.column_stats)
 
     energy = annual_irradiation(
         dataset.df,
         units_by_col=dataset.units_by_col,
         step_minutes=dataset.time_step_minutes,
         energy_unit=energy_unit,
+        column_stats=dataset.column_stats,
     )
     dataset_warnings = dataset.warnings + energy.warnings
 
@@ -157,7 +178,7 @@ def analyze_tmy_source(
     )
 
     log_path = run.logs_dir / f"{Path(source_name).stem}__TMY_Analysis.log"
-    write_run_log(
+    log_text = write_run_log(
         log_path=log_path,
         tool_name=tool_name,
         sources=[source_name],
@@ -168,16 +189,8 @@ def analyze_tmy_source(
         warnings=dataset_warnings,
     )
 
-    # Return same dataset but with extended warnings visible to UI if needed
-    dataset = TMYDataset(
-        df=dataset.df,
-        header_info=dataset.header_info,
-        units_by_col=dataset.units_by_col,
-        time_step_minutes=dataset.time_step_minutes,
-        quality=dataset.quality,
-        source_name=dataset.source_name,
-        warnings=dataset_warnings,
-    )
+    # Return same dataset (same frame, no copy) but with extended warnings visible to UI if needed
+    dataset = replace(dataset, warnings=dataset_warnings)
 
     return TMYAnalysisResult(
         dataset=dataset,
@@ -186,4 +199,6 @@ def analyze_tmy_source(
         report_pdf=pdf_path,
         log_path=log_path,
         run_dir=run.run_dir,
+        pdf_bytes=pdf_path.read_bytes(),
+        log_text=log_text,
     )
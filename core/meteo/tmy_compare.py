@@ -1,23 +1,75 @@
 # core/meteo/tmy_compare.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 
+from utils.io import BufferSource
 from utils.paths import RunPaths, make_run_folders
 from utils.run_log import write_run_log
 from utils.energy import annual_irradiation, EnergySummary
+from utils.decimate import axes_pixel_width, minmax_envelope
+from utils.pyramid import MinMaxPyramid, build_minmax_pyramid
 from core.meteo.tmy_pvsyst import TMYDataset, read_tmy_pvsyst
 
 
-TextSource = Union[str, Path, bytes]
+TextSource = BufferSource  # bytes, upload (BytesIO), memoryview or path
+
+REPORT_DPI = 250
+
+
+ALIGNMENT_MODES = ("auto", "absolute", "climatological")
+
+# Climatological alignment: timestamps are shown in this (leap) year, so that
+# every (month, day) slot, Feb 29 included, has a date
+CLIMATOLOGICAL_YEAR = 2000
+
+# days before each month in a leap year
+_LEAP_MONTH_START = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+
+@dataclass(frozen=True)
+class AlignedPair:
+    """
+    Both datasets on a common slot grid, computed once per comparison:
+    df1 / df2 have the same 'datetime' column (one row per slot present in
+    both files) and the common variables, so they can be subtracted by
+    position. In "climatological" mode the datetimes are in
+    CLIMATOLOGICAL_YEAR.
+    """
+    mode: str  # "absolute" | "climatological"
+    step_minutes: int
+    df1: pd.DataFrame
+    df2: pd.DataFrame
+    warnings: List[str] = field(default_factory=list)  # e.g. rows sharing a slot
+    _pyramids: Dict[Tuple[int, str], MinMaxPyramid] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def start(self) -> Optional[pd.Timestamp]:
+        return self.df1["datetime"].iloc[0] if len(self.df1) else None
+
+    @property
+    def end(self) -> Optional[pd.Timestamp]:
+        return self.df1["datetime"].iloc[-1] if len(self.df1) else None
+
+    def diff(self, var: str) -> pd.Series:
+        """df1[var] - df2[var] on the aligned slots."""
+        return self.df1[var] - self.df2[var]
+
+    def pyramid(self, which: int, col: str) -> MinMaxPyramid:
+        """Min/max pyramid of aligned df1 (which=1) or df2 (which=2), built on first use."""
+        key = (which, col)
+        if key not in self._pyramids:
+            df = self.df1 if which == 1 else self.df2
+            self._pyramids[key] = build_minmax_pyramid(df["datetime"], df[col])
+        return self._pyramids[key]
 
 
 @dataclass(frozen=True)
@@ -33,14 +85,150 @@ class TMYCompareResult:
     report_pdf: Path
     log_path: Path
     run_dir: Path
-
-
-def align_common_period(df1: pd.DataFrame, df2: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Timestamp, pd.Timestamp]:
-    start = max(df1["datetime"].min(), df2["datetime"].min())
-    end = min(df1["datetime"].max(), df2["datetime"].max())
-    df1a = df1[(df1["datetime"] >= start) & (df1["datetime"] <= end)].reset_index(drop=True)
-    df2a = df2[(df2["datetime"] >= start) & (df2["datetime"] <= end)].reset_index(drop=True)
-    return df1a, df2a, start, end
+    aligned: Optional[AlignedPair] = None
+    pdf_bytes: bytes = b""  # see TMYAnalysisResult
+    log_text: str = ""
+
+
+# =========================================================
+# ALIGNMENT (integer slots, no datetime joins)
+# =========================================================
+
+def _minutes(times: pd.Series) -> np.ndarray:
+    return pd.Series(times).to_numpy().astype("datetime64[m]")
+
+
+def climatological_slots(times: pd.Series, step_minutes: int) -> np.ndarray:
+    """
+    Integer (month, day, hour, minute) slot of each timestamp, whatever its
+    year: day of a leap year * slots per day + time of day // step.
+    -1 for NaT and timestamps off the step grid.
+    """
+    t = _minutes(times)
+    months = t.astype("datetime64[M]")
+    days = t.astype("datetime64[D]")
+    month = months.astype(np.int64) % 12
+    day = (days - months.astype("datetime64[D]")).astype(np.int64)
+    minute = (t - days).astype(np.int64)
+    slots = (_LEAP_MONTH_START[month] + day) * (1440 // step_minutes) + minute // step_minutes
+    slots[np.isnat(t) | (minute % step_minutes != 0)] = -1
+    return slots
+
+
+def absolute_slots(times: pd.Series, start: pd.Timestamp, n_slots: int, step_minutes: int) -> np.ndarray:
+    """Slot (t - start) // step of each timestamp, -1 if NaT, off grid or out of range."""
+    t = _minutes(times)
+    offset = (t - np.datetime64(pd.Timestamp(start), "m")).astype(np.int64)
+    slots = offset // step_minutes
+    slots[np.isnat(t) | (offset % step_minutes != 0) | (slots < 0) | (slots >= n_slots)] = -1
+    return slots
+
+
+def _slot_rows(slots: np.ndarray, n_slots: int) -> Tuple[np.ndarray, int, int]:
+    """
+    Row of each slot (-1 if empty); on duplicated slots the last row wins.
+    Also returns the number of rows dropped that way and the first
+    duplicated slot (-1 if none).
+    """
+    rows = np.full(n_slots, -1, dtype=np.int64)
+    valid = slots >= 0
+    rows[slots[valid]] = np.flatnonzero(valid)
+    n_dropped = int(valid.sum() - (rows >= 0).sum())
+    first = -1
+    if n_dropped:
+        first = int(np.flatnonzero(np.bincount(slots[valid], minlength=n_slots) > 1)[0])
+    return rows, n_dropped, first
+
+
+def _one_row_per_slot(slots: np.ndarray) -> bool:
+    s = slots[slots >= 0]
+    return len(s) > 0 and len(np.unique(s)) == len(s)
+
+
+def align_slots(
+    frames: Sequence[pd.DataFrame],
+    step_minutes: int,
+    mode: str = "auto",
+    names: Optional[Sequence[str]] = None,
+) -> Tuple[str, pd.DatetimeIndex, List[np.ndarray], List[str]]:
+    """
+    Put N frames on a common slot grid by O(n) array indexing:
+      - "absolute": slot = (datetime - common start) // step over the
+        common period (gaps leave their slots empty instead of shifting
+        the rest of the series)
+      - "climatological": slot = (month, day, hour, minute), years ignored:
+        for TMYs built from months of different years
+      - "auto": absolute when all files cover the same period, else
+        climatological when each file has at most one row per slot (a
+        single typical year), else absolute
+    Only slots present in every frame are kept; when several rows of a
+    frame fall in one slot the last one is kept and a warning is returned.
+    Returns (mode used, slot datetimes, row of each frame for each slot,
+    warnings).
+    """
+    if mode not in ALIGNMENT_MODES:
+        raise ValueError(f"alignment must be one of {ALIGNMENT_MODES}")
+    step = int(step_minutes) if step_minutes and step_minutes > 0 else 60
+    if 1440 % step:
+        mode = "absolute"  # slots per day must be whole
+
+    starts = [df["datetime"].min() for df in frames]
+    ends = [df["datetime"].max() for df in frames]
+    if mode == "auto" and len(set(starts)) == 1 and len(set(ends)) == 1:
+        mode = "absolute"
+
+    if mode != "absolute":
+        n_slots = 366 * (1440 // step)
+        slots = [climatological_slots(df["datetime"], step) for df in frames]
+        if mode == "auto":
+            mode = "climatological" if all(_one_row_per_slot(s_) for s_ in slots) else "absolute"
+        origin = pd.Timestamp(year=CLIMATOLOGICAL_YEAR, month=1, day=1)
+
+    if mode == "absolute":
+        origin, end = max(starts), min(ends)
+        n_slots = max(0, int((end - origin) / pd.Timedelta(minutes=step)) + 1) if pd.notna(origin) and pd.notna(end) else 0
+        slots = [absolute_slots(df["datetime"], origin, n_slots, step) for df in frames]
+
+    origin = pd.Timestamp(origin).as_unit("us")
+    rows = []
+    warnings: List[str] = []
+    for i, s_ in enumerate(slots):
+        r, n_dropped, first = _slot_rows(s_, n_slots)
+        rows.append(r)
+        if n_dropped:
+            name = names[i] if names is not None else f"file {i + 1}"
+            first_time = origin + pd.Timedelta(minutes=first * step)
+            warnings.append(
+                f"[alignment] {name}: {n_dropped} row(s) share their slot with another row "
+                f"({mode} alignment), last one kept (first: {first_time})."
+            )
+    common = np.flatnonzero(np.logical_and.reduce([r >= 0 for r in rows]))
+
+    times = origin + pd.to_timedelta(common * step, unit="m")
+    return mode, times, [r[common] for r in rows], warnings
+
+
+def align_tmy_pair(
+    df1: pd.DataFrame,
+    df2: pd.DataFrame,
+    step_minutes: int,
+    mode: str = "auto",
+    names: Optional[Sequence[str]] = None,
+) -> AlignedPair:
+    """Both frames on their common slots (see align_slots), as an AlignedPair."""
+    variables = [c for c in df1.columns if c != "datetime" and c in df2.columns]
+    mode, times, (rows1, rows2), warnings = align_slots([df1, df2], step_minutes, mode, names=names)
+    step = int(step_minutes) if step_minutes and step_minutes > 0 else 60
+
+    def take(df: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+        data = {"datetime": times}
+        for c in variables:
+            data[c] = df[c].to_numpy()[rows]
+        return pd.DataFrame(data)
+
+    return AlignedPair(
+        mode=mode, step_minutes=step, df1=take(df1, rows1), df2=take(df2, rows2), warnings=warnings,
+    )
 
 
 def compute_differences(df1: pd.DataFrame, df2: pd.DataFrame, threshold_pct: float = 5.0) -> Tuple[Dict[str, Dict[str, float]], bool]:
@@ -76,8 +264,9 @@ def generate_compare_pdf(
     energy1: EnergySummary,
     energy2: EnergySummary,
     output_pdf: Path,
+    alignment: Optional[str] = None,
 ) -> None:
-    fig = plt.figure(figsize=(8.27, 11.69))
+    fig = Figure(figsize=(8.27, 11.69))
     fig.suptitle("TMY Comparison Report (PVSyst)", fontsize=16, fontweight="bold", y=0.97)
 
     # --- Text block ---
@@ -87,7 +276,12 @@ def generate_compare_pdf(
     txt = ""
     txt += f"File 1: {name1}\n"
     txt += f"File 2: {name2}\n"
-    txt += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    txt += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    if alignment == "climatological":
+        txt += "Alignment: climatological (month / day / hour, years ignored)\n"
+    elif alignment == "absolute":
+        txt += "Alignment: absolute dates (common period)\n"
+    txt += "\n"
 
     # energy summary
     if energy1.annual_ghi is not None and energy2.annual_ghi is not None:
@@ -113,8 +307,11 @@ def generate_compare_pdf(
         bottom = base_bottom + (len(vars_to_plot) - 1 - i) * (height + gap)
         ax = fig.add_axes([0.10, bottom, 0.80, height])
 
-        ax.plot(df1["datetime"], df1[var], lw=0.9, alpha=0.9, label="File 1")
-        ax.plot(df2["datetime"], df2[var], lw=0.9, alpha=0.9, label="File 2")
+        # min/max envelope at ~2 points per pixel
+        n_px = axes_pixel_width(ax, REPORT_DPI)
+        for df, label in ((df1, "File 1"), (df2, "File 2")):
+            x, y = minmax_envelope(df["datetime"].to_numpy(), df[var].to_numpy(), n_px)
+            ax.plot(x, y, lw=0.9, alpha=0.9, label=label)
 
         ax.set_title(var.upper(), fontsize=12, pad=6)
         ax.xaxis.set_major_locator(mdates.MonthLocator())
@@ -123,8 +320,7 @@ def generate_compare_pdf(
         ax.legend(loc="upper right", fontsize=8)
 
     output_pdf.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(output_pdf, dpi=250)
-    plt.close(fig)
+    fig.savefig(output_pdf, dpi=REPORT_DPI)
 
 
 def compare_tmy_sources(
@@ -138,6 +334,9 @@ def compare_tmy_sources(
     energy_unit: str = "kWh/m²",
     resample_hourly_if_subhourly: bool = True,
     threshold_pct: float = 5.0,
+    alignment: str = "auto",
+    source_key1: Optional[str] = None,
+    source_key2: Optional[str] = None,
 ) -> TMYCompareResult:
     tool_name = "TMY_Compare"
     run: RunPaths = make_run_folders(outputs_dir, tool_name=tool_name, mode=output_mode)
@@ -147,31 +346,39 @@ def compare_tmy_sources(
         source_name=name1,
         target_irradiance_unit=target_irradiance_unit,
         resample_hourly_if_subhourly=resample_hourly_if_subhourly,
+        source_key=source_key1,
     )
     ds2 = read_tmy_pvsyst(
         source2,
         source_name=name2,
         target_irradiance_unit=target_irradiance_unit,
         resample_hourly_if_subhourly=resample_hourly_if_subhourly,
+        source_key=source_key2,
     )
 
-    df1a, df2a, start, end = align_common_period(ds1.df, ds2.df)
+    # Aligned once, reused by the differences, the PDF and the UI
+    step = max(ds1.time_step_minutes or 60, ds2.time_step_minutes or 60)
+    aligned = align_tmy_pair(ds1.df, ds2.df, step_minutes=step, mode=alignment, names=[name1, name2])
+    df1a, df2a, start, end = aligned.df1, aligned.df2, aligned.start, aligned.end
     diffs, alert_flag = compute_differences(df1a, df2a, threshold_pct=threshold_pct)
 
-    energy1 = annual_irradiation(ds1.df, ds1.units_by_col, ds1.time_step_minutes, energy_unit=energy_unit)
-    energy2 = annual_irradiation(ds2.df, ds2.units_by_col, ds2.time_step_minutes, energy_unit=energy_unit)
+    energy1 = annual_irradiation(ds1.df, ds1.units_by_col, ds1.time_step_minutes, energy_unit=energy_unit, column_stats=ds1.column_stats)
+    energy2 = annual_irradiation(ds2.df, ds2.units_by_col, ds2.time_step_minutes, energy_unit=energy_unit, column_stats=ds2.column_stats)
 
-    all_warnings = ds1.warnings + ds2.warnings + energy1.warnings + energy2.warnings
+    all_warnings = ds1.warnings + ds2.warnings + aligned.warnings + energy1.warnings + energy2.warnings
 
     pdf_path = run.reports_dir / f"TMY_Comparison__{Path(name1).stem}__VS__{Path(name2).stem}.pdf"
-    generate_compare_pdf(df1a, df2a, ds1.source_name, ds2.source_name, diffs, alert_flag, energy1, energy2, pdf_path)
+    generate_compare_pdf(
+        df1a, df2a, ds1.source_name, ds2.source_name, diffs, alert_flag, energy1, energy2, pdf_path,
+        alignment=aligned.mode,
+    )
 
     log_path = run.logs_dir / f"TMY_Compare__{Path(name1).stem}__VS__{Path(name2).stem}.log"
-    write_run_log(
+    log_text = write_run_log(
         log_path=log_path,
         tool_name=tool_name,
         sources=[name1, name2],
-        header_info=None,
+        header_info={"Alignment": aligned.mode, "Aligned slots": str(len(df1a))},
         units_by_col=None,
         time_step_minutes=60,  # after optional resample it's hourly; keep simple here
         quality=None,
@@ -190,4 +397,7 @@ def compare_tmy_sources(
         report_pdf=pdf_path,
         log_path=log_path,
         run_dir=run.run_dir,
+        aligned=aligned,
+        pdf_bytes=pdf_path.read_bytes(),
+        log_text=log_text,
     )
@@ -0,0 +1,437 @@
+# core/meteo/tmy_multi_compare.py
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+
+from config import TMY_COMPARE_PARALLEL_MIN_MB, TMY_COMPARE_WORKERS
+from utils.io import BufferSource, source_buffer, source_size
+from utils.paths import RunPaths, make_run_folders
+from utils.run_log import write_run_log
+from utils.energy import annual_irradiation, EnergySummary
+from core.meteo.tmy_pvsyst import TMYDataset, read_tmy_pvsyst
+from core.meteo.tmy_compare import align_slots
+
+
+TextSource = BufferSource  # bytes, upload (BytesIO), memoryview or path
+
+REPORT_DPI = 200
+
+COMPARE_VARIABLES = ["ghi", "dni", "dhi", "temp", "wind_speed"]
+
+# metric -> (label, diverging colour scale)
+PAIRWISE_METRICS: Dict[str, Tuple[str, bool]] = {
+    "mbe": ("MBE (row - column)", True),
+    "rmse": ("RMSE", False),
+    "mean_pct": ("Mean % difference (vs column)", False),
+}
+
+
+# =========================================================
+# PARALLEL PARSE (process pool)
+# =========================================================
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool_workers() -> int:
+    return max(1, min(TMY_COMPARE_WORKERS, os.cpu_count() or 1))
+
+
+def _parse_pool() -> ProcessPoolExecutor:
+    """Worker processes shared by all comparisons (spawned once, on first use)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=_pool_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOL
+
+
+def _reset_parse_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+
+def _picklable(source: TextSource):
+    """Paths are sent as is (read by the worker), anything else as bytes."""
+    if isinstance(source, (str, Path)):
+        return source
+    if isinstance(source, BytesIO):
+        return source.getvalue()
+    with source_buffer(source) as view:
+        return bytes(view)
+
+
+def _read_one(
+    source,
+    name: str,
+    target_irradiance_unit: str,
+    resample_hourly_if_subhourly: bool,
+    source_key: Optional[str] = None,
+) -> TMYDataset:
+    return read_tmy_pvsyst(
+        source,
+        source_name=name,
+        target_irradiance_unit=target_irradiance_unit,
+        resample_hourly_if_subhourly=resample_hourly_if_subhourly,
+        source_key=source_key,
+    )
+
+
+def read_tmy_sources(
+    sources: Sequence[TextSource],
+    names: Sequence[str],
+    target_irradiance_unit: str = "kW/m²",
+    resample_hourly_if_subhourly: bool = True,
+    parallel: Optional[bool] = None,
+    source_keys: Optional[Sequence[Optional[str]]] = None,
+) -> List[TMYDataset]:
+    """
+    Parse N TMY sources, in parallel worker processes when `parallel` (None:
+    automatic: from TMY_COMPARE_PARALLEL_MIN_MB of total input, on a
+    multi-core host). Workers share the on-disk parse cache. Falls back
+    to in-process parsing if the pool cannot be used. Parse errors are
+    raised for the first failing source, in input order.
+    `source_keys`: content digests already known to the caller (see
+    read_tmy_pvsyst), one per source.
+    """
+    keys = list(source_keys) if source_keys is not None else [None] * len(sources)
+    if parallel is None:
+        total_mb = sum(source_size(s) for s in sources) / 1e6
+        parallel = len(sources) > 1 and _pool_workers() > 1 and total_mb >= TMY_COMPARE_PARALLEL_MIN_MB
+
+    if parallel:
+        try:
+            pool = _parse_pool()
+            futures = [
+                pool.submit(_read_one, _picklable(s), n, target_irradiance_unit, resample_hourly_if_subhourly, k)
+                for s, n, k in zip(sources, names, keys)
+            ]
+            return [f.result() for f in futures]
+        except (BrokenProcessPool, OSError):
+            _reset_parse_pool()
+
+    return [
+        _read_one(s, n, target_irradiance_unit, resample_hourly_if_subhourly, k)
+        for s, n, k in zip(sources, names, keys)
+    ]
+
+
+# =========================================================
+# METRICS
+# =========================================================
+
+@dataclass(frozen=True)
+class PairwiseMatrices:
+    """(sources x sources) matrices of one variable, [i, j] = source i vs source j."""
+    mbe: np.ndarray        # mean(x_i - x_j)
+    rmse: np.ndarray       # sqrt(mean((x_i - x_j)²))
+    mean_pct: np.ndarray   # mean(|x_i - x_j| / x_j) * 100, x_j = 0 skipped (as compute_differences)
+
+
+def pairwise_matrices(x: np.ndarray, block: int = 8760) -> PairwiseMatrices:
+    """
+    All pairwise metrics of x (sources x time) at once: the differences are
+    broadcast as (S, S, block) arrays and accumulated over time blocks, so
+    memory stays S² x block whatever the series length. NaN skipped.
+    """
+    n_src, n_t = x.shape
+    sum_d = np.zeros((n_src, n_src))
+    sum_d2 = np.zeros((n_src, n_src))
+    n_d = np.zeros((n_src, n_src), dtype=np.int64)
+    sum_pct = np.zeros((n_src, n_src))
+    n_pct = np.zeros((n_src, n_src), dtype=np.int64)
+
+    for a in range(0, n_t, block):
+        xb = x[:, a:a + block]
+        d = xb[:, None, :] - xb[None, :, :]
+        valid = ~np.isnan(d)
+        d0 = np.where(valid, d, 0.0)
+        sum_d += d0.sum(axis=-1)
+        sum_d2 += (d0 * d0).sum(axis=-1)
+        n_d += valid.sum(axis=-1)
+
+        ref = xb[None, :, :]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = np.abs(d) / np.where(ref == 0, np.nan, ref) * 100.0
+        valid = ~np.isnan(pct)
+        sum_pct += np.where(valid, pct, 0.0).sum(axis=-1)
+        n_pct += valid.sum(axis=-1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mbe = np.where(n_d > 0, sum_d / n_d, np.nan)
+        rmse = np.sqrt(np.where(n_d > 0, sum_d2 / n_d, np.nan))
+        mean_pct = np.where(n_pct > 0, sum_pct / n_pct, np.nan)
+    return PairwiseMatrices(mbe=mbe, rmse=rmse, mean_pct=mean_pct)
+
+
+def median_deviation(x: np.ndarray) -> pd.DataFrame:
+    """
+    Deviation of each source (rows of x, sources x time) from the ensemble
+    median at each time step: MBE, RMSE and bias % of the median's mean.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN time steps / sources
+        med = np.nanmedian(x, axis=0)
+        d = x - med[None, :]
+        mbe = np.nanmean(d, axis=1)
+        rmse = np.sqrt(np.nanmean(d * d, axis=1))
+        ref = np.nanmean(med)
+    bias_pct = mbe / ref * 100.0 if ref and np.isfinite(ref) else np.full(len(mbe), np.nan)
+    return pd.DataFrame({"mbe": mbe, "rmse": rmse, "bias_pct": bias_pct})
+
+
+# =========================================================
+# RESULT
+# =========================================================
+
+@dataclass(frozen=True)
+class TMYMultiCompareResult:
+    datasets: List[TMYDataset]
+    names: List[str]
+    variables: List[str]
+    alignment: str
+    times: pd.DatetimeIndex
+    stack: np.ndarray                       # (sources, time, variables), aligned slots
+    pairwise: Dict[str, PairwiseMatrices]   # per variable
+    deviation: Dict[str, pd.DataFrame]      # per variable: sources x (mbe, rmse, bias_pct) vs ensemble median
+    energies: List[EnergySummary]
+    report_pdf: Path
+    log_path: Path
+    run_dir: Path
+    pdf_bytes: bytes = b""  # kept with the result (see TMYAnalysisResult)
+    log_text: str = ""
+    alignment_warnings: List[str] = field(default_factory=list)
+
+    def matrix(self, var: str, metric: str) -> pd.DataFrame:
+        """Pairwise `metric` ("mbe" | "rmse" | "mean_pct") of `var` as a sources x sources frame."""
+        return pd.DataFrame(getattr(self.pairwise[var], metric), index=self.names, columns=self.names)
+
+    def median_bias_pct(self) -> pd.DataFrame:
+        """Sources x variables: bias (%) vs the ensemble median."""
+        return pd.DataFrame({v: self.deviation[v]["bias_pct"].to_numpy() for v in self.variables}, index=self.names)
+
+    def energy_table(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "GHI": [e.annual_ghi for e in self.energies],
+                "DNI": [e.annual_dni for e in self.energies],
+                "DHI": [e.annual_dhi for e in self.energies],
+            },
+            index=self.names,
+        )
+
+
+def _unique_names(names: Sequence[str]) -> List[str]:
+    # a suffixed name must not collide with any given or generated name
+    used = set(names)
+    seen: Dict[str, int] = {}
+    out = []
+    for n in names:
+        seen[n] = seen.get(n, 0) + 1
+        if seen[n] == 1:
+            out.append(n)
+            continue
+        k = seen[n]
+        while f"{n} ({k})" in used:
+            k += 1
+        seen[n] = k
+        used.add(f"{n} ({k})")
+        out.append(f"{n} ({k})")
+    return out
+
+
+def _report_stem(names: Sequence[str], stack: np.ndarray) -> str:
+    """
+    <stem>__VS__<stem>... as for the pairwise report, plus a short hash of
+    the compared data: in "latest" mode, comparisons of other files (or of
+    same-named files) must not overwrite each other's report.
+    """
+    stems = "__VS__".join(Path(n).stem for n in names)[:120]
+    digest = hashlib.blake2b(np.ascontiguousarray(stack).data, digest_size=4)
+    digest.update("\0".join(names).encode("utf-8"))
+    return f"{stems}__{digest.hexdigest()}"
+
+
+# =========================================================
+# PDF
+# =========================================================
+
+def _draw_heatmap(fig: Figure, ax, values: np.ndarray, xlabels, ylabels, title: str, diverging: bool) -> None:
+    finite = values[np.isfinite(values)]
+    if diverging:
+        vmax = float(np.abs(finite).max()) if finite.size else 1.0
+        im = ax.imshow(values, cmap="RdBu_r", vmin=-vmax or -1.0, vmax=vmax or 1.0, aspect="auto")
+    else:
+        im = ax.imshow(values, cmap="viridis", aspect="auto")
+    fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+
+    ax.set_title(title, fontsize=9, pad=6)
+    ax.set_xticks(range(len(xlabels)), labels=xlabels, rotation=45, ha="right", fontsize=7)
+    ax.set_yticks(range(len(ylabels)), labels=ylabels, fontsize=7)
+    if values.size <= 144:  # values written in the cells up to 12 x 12
+        for (i, j), v in np.ndenumerate(values):
+            if np.isfinite(v):
+                ax.text(j, i, f"{v:.2g}", ha="center", va="center", fontsize=6, color="black",
+                        bbox=dict(boxstyle="round,pad=0.1", fc="white", ec="none", alpha=0.6))
+
+
+def generate_multi_compare_pdf(result: TMYMultiCompareResult, output_pdf: Path) -> None:
+    names = [Path(n).stem[:18] for n in result.names]
+
+    output_pdf.parent.mkdir(parents=True, exist_ok=True)
+    with PdfPages(output_pdf) as pdf:
+        # --- Page 1: sources + deviation from the ensemble median
+        fig = Figure(figsize=(8.27, 11.69))
+        fig.suptitle("TMY N-way Comparison Report (PVSyst)", fontsize=16, fontweight="bold", y=0.97)
+
+        txt = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        txt += f"Alignment: {result.alignment}, {len(result.times):,} common slots"
+        if len(result.times):
+            txt += f" ({result.times[0]} → {result.times[-1]})"
+        txt += "\n\nSources (annual GHI / DNI):\n"
+        for n, e in zip(result.names, result.energies):
+            ghi = f"{e.annual_ghi:.1f}" if e.annual_ghi is not None else "-"
+            dni = f"{e.annual_dni:.1f}" if e.annual_dni is not None else "-"
+            txt += f"  - {n}: {ghi} / {dni} {e.unit}\n"
+        ax_text = fig.add_axes([0.06, 0.58, 0.88, 0.34])
+        ax_text.axis("off")
+        ax_text.text(0.0, 1.0, txt, ha="left", va="top", fontsize=9, family="monospace")
+
+        ax = fig.add_axes([0.22, 0.10, 0.62, 0.42])
+        bias = result.median_bias_pct()
+        _draw_heatmap(
+            fig, ax, bias.to_numpy(), [v.upper() for v in bias.columns], names,
+            "Bias vs ensemble median (%)", diverging=True,
+        )
+        pdf.savefig(fig, dpi=REPORT_DPI)
+
+        # --- One page per pairwise metric: one heatmap per variable
+        for metric, (label, diverging) in PAIRWISE_METRICS.items():
+            fig = Figure(figsize=(8.27, 11.69))
+            fig.suptitle(f"Pairwise {label}", fontsize=14, fontweight="bold", y=0.97)
+            n_var = len(result.variables)
+            for k, var in enumerate(result.variables):
+                ax = fig.add_subplot((n_var + 1) // 2, 2, k + 1)
+                unit = result.datasets[0].units_by_col.get(var, "") if metric != "mean_pct" else "%"
+                _draw_heatmap(
+                    fig, ax, getattr(result.pairwise[var], metric), names, names,
+                    f"{var.upper()} ({unit})" if unit else var.upper(), diverging,
+                )
+            fig.subplots_adjust(left=0.18, right=0.95, bottom=0.08, top=0.92, hspace=0.6, wspace=0.6)
+            pdf.savefig(fig, dpi=REPORT_DPI)
+
+
+# =========================================================
+# ENTRY POINT
+# =========================================================
+
+def compare_tmy_many(
+    sources: Sequence[TextSource],
+    names: Sequence[str],
+    outputs_dir: Path,
+    output_mode: str = "runs",
+    target_irradiance_unit: str = "kW/m²",
+    energy_unit: str = "kWh/m²",
+    resample_hourly_if_subhourly: bool = True,
+    alignment: str = "auto",
+    parallel: Optional[bool] = None,
+    source_keys: Optional[Sequence[Optional[str]]] = None,
+) -> TMYMultiCompareResult:
+    """
+    Compare N TMY sources (e.g. several providers for one site): parsed in
+    parallel, aligned on common slots, stacked as one (sources x time x
+    variables) array, then pairwise MBE / RMSE / mean-% matrices and the
+    deviation of each source from the ensemble median, per variable.
+    """
+    if len(sources) < 2:
+        raise ValueError("At least two TMY sources are required.")
+    if len(sources) != len(names):
+        raise ValueError("One name per source is required.")
+
+    tool_name = "TMY_Compare_N"
+    run: RunPaths = make_run_folders(outputs_dir, tool_name=tool_name, mode=output_mode)
+    names = _unique_names(names)
+
+    datasets = read_tmy_sources(
+        sources, names,
+        target_irradiance_unit=target_irradiance_unit,
+        resample_hourly_if_subhourly=resample_hourly_if_subhourly,
+        parallel=parallel,
+        source_keys=source_keys,
+    )
+
+    frames = [ds.df for ds in datasets]
+    variables = [v for v in COMPARE_VARIABLES if all(v in df.columns for df in frames)]
+    step = max(ds.time_step_minutes or 60 for ds in datasets)
+    mode, times, rows, align_warnings = align_slots(frames, step_minutes=step, mode=alignment, names=names)
+
+    stack = np.empty((len(frames), len(times), len(variables)))
+    for s_, (df, r) in enumerate(zip(frames, rows)):
+        for v, var in enumerate(variables):
+            stack[s_, :, v] = df[var].to_numpy(dtype=float)[r]
+
+    pairwise = {var: pairwise_matrices(stack[:, :, v]) for v, var in enumerate(variables)}
+    deviation = {var: median_deviation(stack[:, :, v]).set_axis(names) for v, var in enumerate(variables)}
+
+    energies = [
+        annual_irradiation(ds.df, ds.units_by_col, ds.time_step_minutes, energy_unit=energy_unit, column_stats=ds.column_stats)
+        for ds in datasets
+    ]
+    all_warnings = [f"[{n}] {w}" for n, ds, e in zip(names, datasets, energies) for w in ds.warnings + e.warnings]
+    all_warnings += align_warnings
+
+    report_stem = _report_stem(names, stack)
+    pdf_path = run.reports_dir / f"TMY_Comparison__{report_stem}.pdf"
+    log_path = run.logs_dir / f"TMY_Compare__{report_stem}.log"
+
+    result = TMYMultiCompareResult(
+        datasets=datasets,
+        names=names,
+        variables=variables,
+        alignment=mode,
+        times=times,
+        stack=stack,
+        pairwise=pairwise,
+        deviation=deviation,
+        energies=energies,
+        alignment_warnings=align_warnings,
+        report_pdf=pdf_path,
+        log_path=log_path,
+        run_dir=run.run_dir,
+    )
+    generate_multi_compare_pdf(result, pdf_path)
+
+    log_text = write_run_log(
+        log_path=log_path,
+        tool_name=tool_name,
+        sources=names,
+        header_info={"Alignment": mode, "Aligned slots": str(len(times)), "Variables": ", ".join(variables)},
+        units_by_col=None,
+        time_step_minutes=step,
+        quality=None,
+        warnings=all_warnings,
+    )
+    return replace(result, pdf_bytes=pdf_path.read_bytes(), log_text=log_text)
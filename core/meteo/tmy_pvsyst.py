@@ -1,19 +1,48 @@
 # core/meteo/tmy_pvsyst.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+import itertools
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-from utils.io import read_text_lines, split_pvsyst_hash_header, detect_separator, read_delimited_from_lines
+from utils.io import (
+    BufferSource,
+    buffer_reader,
+    detect_separator,
+    iter_lines,
+    read_delimited_from_buffer,
+    source_buffer,
+)
+from utils.frames import owned_copy
+from utils.parse_cache import cache_enabled, cache_key, load_frame, store_frame
+from utils.pyramid import MinMaxPyramid, build_minmax_pyramid
+from utils.binning import Histogram, compute_histogram
+from utils.column_stats import ColumnStats, compute_column_stats
 from utils.units import normalize_unit, convert_irradiance_units, UnitConversionResult
 from utils.time_series import parse_time_step_from_header, detect_time_step_from_datetime, resample_to_hourly
 from utils.validation import basic_quality_check, DataQuality
 
 
-TextSource = Union[str, Path, bytes]
+TextSource = BufferSource
+
+DATE_FIELDS = ["YEAR", "MONTH", "DAY", "HOUR"]
+
+METEO_RENAME: Dict[str, str] = {
+    "GHI": "ghi",
+    "DNI": "dni",
+    "DHI": "dhi",
+    "Tamb": "temp",
+    "WindVel": "wind_speed",
+    "WindDir": "wind_direction",
+    "GPI": "gpi",
+}
+
+# Columns kept in the normalized dataset (v1)
+KEEP_COLUMNS = ["datetime", "ghi", "dni", "dhi", "gpi", "temp", "wind_speed", "wind_direction"]
 
 
 @dataclass(frozen=True)
@@ -25,6 +54,22 @@ class TMYDataset:
     quality: DataQuality
     source_name: str
     warnings: List[str]
+    column_stats: Optional[ColumnStats] = None  # column stats of df (computed once), shared by reports / UI
+    _pyramids: Dict[str, MinMaxPyramid] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _histograms: Dict[Tuple[str, int], Histogram] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def pyramid(self, col: str) -> MinMaxPyramid:
+        """Min/max pyramid of `col` for zoomable charts, built on first use."""
+        if col not in self._pyramids:
+            self._pyramids[col] = build_minmax_pyramid(self.df["datetime"], self.df[col])
+        return self._pyramids[col]
+
+    def histogram(self, col: str, nbins: int = 60) -> Histogram:
+        """Bin edges + counts of `col`, computed once per (column, bin count)."""
+        key = (col, int(nbins))
+        if key not in self._histograms:
+            self._histograms[key] = compute_histogram(self.df[col].to_numpy(), nbins)
+        return self._histograms[key]
 
 
 def _extract_header_info(header_lines: List[str]) -> Dict[str, str]:
@@ -47,29 +92,15 @@ def _extract_header_info(header_lines: List[str]) -> Dict[str, str]:
     return info
 
 
-def _extract_columns_and_units(body_lines: List[str], sep: str) -> Tuple[List[str], Dict[str, str], List[str]]:
+def _extract_columns_and_units(col_line: str, unit_line: str, sep: str) -> Tuple[List[str], Dict[str, str]]:
     """
-    body_lines starts at:
+    Table header lines:
       YEAR;MONTH;...;WindDir
       ;;;;W/m2;...;°
-      data...
     Returns:
       - columns (raw names)
       - units_by_raw_col
-      - data_lines_only (starting at first data row)
     """
-    # find header row: starts with YEAR (TMY) typically
-    hdr_idx = None
-    for i, line in enumerate(body_lines[:50]):
-        if line.strip().upper().startswith("YEAR" + sep) or line.strip().upper() == "YEAR":
-            hdr_idx = i
-            break
-    if hdr_idx is None:
-        raise ValueError("Could not find the TMY table header row starting with 'YEAR'.")
-
-    col_line = body_lines[hdr_idx]
-    unit_line = body_lines[hdr_idx + 1] if hdr_idx + 1 < len(body_lines) else ""
-
     raw_cols = [c.strip() for c in col_line.split(sep)]
     raw_units = [normalize_unit(u.strip()) for u in unit_line.split(sep)]
 
@@ -81,22 +112,146 @@ def _extract_columns_and_units(body_lines: List[str], sep: str) -> Tuple[List[st
         u = raw_units[j] if j < len(raw_units) else ""
         units_by_col[col] = u
 
-    data_lines = body_lines[hdr_idx:]  # keep header+units for pandas
-    return raw_cols, units_by_col, data_lines
+    return raw_cols, units_by_col
+
+
+def _decode_line(line: bytes) -> str:
+    return line.decode("utf-8", errors="ignore")
+
+
+def _locate_tmy_table(view: memoryview) -> Tuple[List[str], str, str, str, int, int]:
+    """
+    Find the table boundaries at the byte level (only the header lines are
+    decoded): '#' header lines, separator, column / units lines, the offset
+    of the column line (from where the tolerant parser reads the view) and
+    the offset of the first data row (units row skipped by position).
+    """
+    header_lines: List[str] = []
+    body_start = len(view)
+    for start, _, line in iter_lines(view):
+        if not line.startswith(b"#"):
+            body_start = start
+            break
+        header_lines.append(_decode_line(line))
+
+    body = ((start, end, _decode_line(line)) for start, end, line in iter_lines(view, body_start) if line.strip())
+
+    # detect separator from first non-empty body line
+    first = next(body, None)
+    if first is None:
+        raise ValueError("Could not find the TMY table header row starting with 'YEAR'.")
+    sep = detect_separator(first[2])
+
+    # find header row: starts with YEAR (TMY) typically, within the first 50 body lines
+    for i, (start, _, line) in enumerate(itertools.chain([first], body)):
+        if i >= 50:
+            break
+        head = line.strip().upper()
+        if head.startswith("YEAR" + sep) or head == "YEAR":
+            unit_start, unit_end, unit_line = next(body, (len(view), len(view), ""))
+            # no units row (first field numeric): data starts on that line
+            data_offset = unit_start if _is_number(unit_line.split(sep)[0]) else unit_end + 1
+            return header_lines, sep, line, unit_line, start, data_offset
+
+    raise ValueError("Could not find the TMY table header row starting with 'YEAR'.")
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
 
 
 def _rename_meteo_columns(df: pd.DataFrame) -> pd.DataFrame:
-    rename = {
-        "GHI": "ghi",
-        "DNI": "dni",
-        "DHI": "dhi",
-        "Tamb": "temp",
-        "WindVel": "wind_speed",
-        "WindDir": "wind_direction",
-        "GPI": "gpi",
-    }
-    out = df.rename(columns={k: v for k, v in rename.items() if k in df.columns}).copy()
-    return out
+    # copy-on-write: the renamed frame shares the column data
+    return df.rename(columns={k: v for k, v in METEO_RENAME.items() if k in df.columns})
+
+
+# =========================================================
+# FAST PATH (C parser + integer date arithmetic)
+# =========================================================
+
+def _read_tmy_table_fast(
+    view: memoryview,
+    raw_cols: List[str],
+    data_offset: int,
+    sep: str,
+) -> Optional[pd.DataFrame]:
+    """
+    Typed read of the data rows with the C parser: units row skipped by
+    position, only the date fields + kept meteo columns parsed, and an
+    hourly 'datetime' built from YEAR/MONTH/DAY/HOUR with integer arithmetic.
+
+    Returns None when the table is not clean (text in a numeric column,
+    missing / invalid date fields, ragged rows...): the caller then uses the
+    tolerant reader, which coerces such values to NaN / NaT.
+    """
+    # header names as the tolerant reader sees them
+    names = [c if c else f"Unnamed: {j}" for j, c in enumerate(raw_cols)]
+    if len(set(names)) != len(names) or not set(DATE_FIELDS) <= set(names):
+        return None
+    kept = [c for c in names if c != "datetime" and METEO_RENAME.get(c, c) in KEEP_COLUMNS]
+    if len({METEO_RENAME.get(c, c) for c in kept}) != len(kept):
+        return None
+
+    try:
+        df = pd.read_csv(
+            buffer_reader(view[data_offset:]),
+            sep=sep,
+            header=None,
+            names=names,
+            usecols=DATE_FIELDS + kept,
+            engine="c",
+            encoding="utf-8",
+            encoding_errors="ignore",
+        )
+    except (ValueError, pd.errors.ParserError):
+        return None
+
+    # extra fields turn the leading columns into an index
+    if df.empty or not isinstance(df.index, pd.RangeIndex):
+        return None
+    if any(df[c].dtype.kind not in "iu" for c in DATE_FIELDS):
+        return None
+    if any(df[c].dtype.kind not in "iuf" for c in kept):
+        return None
+
+    y, m, d, h = (df[c].to_numpy(dtype=np.int64) for c in DATE_FIELDS)
+    if not (((y >= 1678) & (y <= 2261) & (m >= 1) & (m <= 12) & (h >= 0) & (h <= 23)).all()):
+        return None
+
+    # days since epoch of each month start, and month lengths
+    months = (y - 1970) * 12 + (m - 1)
+    month_start = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    month_len = (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) - month_start
+    if not ((d >= 1) & (d <= month_len)).all():
+        return None
+
+    minutes = ((month_start + d - 1) * 24 + h) * 60
+    df["datetime"] = minutes.astype("datetime64[m]").astype("datetime64[us]")
+    return df
+
+
+def _add_subhourly_offsets(df: pd.DataFrame, time_step_minutes: int) -> pd.DataFrame:
+    """
+    Sort by hourly datetime (stable: file order kept inside each hour) and,
+    when sub-hourly, shift the i-th row of each hour by i * step minutes.
+    Rank inside each hour = position in its run of equal timestamps.
+    """
+    dt = df["datetime"].to_numpy()
+    if (dt[1:] < dt[:-1]).any():
+        order = np.argsort(dt, kind="stable")
+        df = df.take(order).reset_index(drop=True)
+        dt = dt[order]
+
+    if time_step_minutes and time_step_minutes < 60:
+        n = len(dt)
+        run_starts = np.flatnonzero(np.r_[True, dt[1:] != dt[:-1]])
+        rank = np.arange(n) - np.repeat(run_starts, np.diff(np.r_[run_starts, n]))
+        df["datetime"] = dt + (rank * time_step_minutes).astype("timedelta64[m]")
+    return df
 
 
 def read_tmy_pvsyst(
@@ -104,6 +259,7 @@ def read_tmy_pvsyst(
     source_name: Optional[str] = None,
     target_irradiance_unit: str = "kW/m²",
     resample_hourly_if_subhourly: bool = True,
+    source_key: Optional[str] = None,
 ) -> TMYDataset:
     """
     Read a PVSyst TMY file (hourly or sub-hourly) with:
@@ -111,45 +267,92 @@ def read_tmy_pvsyst(
       - table header line (YEAR;MONTH;...)
       - units line (;;;;W/m2;...;deg.C;...)
     Returns a normalized dataset (datetime + canonical columns).
+
+    Parsed datasets are cached on disk, keyed by file content + options;
+    `source_key` is the content's SHA-256 hex digest when the caller already
+    has it (the source is then not hashed again).
     """
     if source_name is None:
-        source_name = Path(source).name if isinstance(source, (str, Path)) else "uploaded_tmy.csv"
-
+        name = source if isinstance(source, (str, Path)) else getattr(source, "name", None)
+        source_name = Path(name).name if isinstance(name, (str, Path)) and str(name) else "uploaded_tmy.csv"
+
+    with source_buffer(source) as view:
+        if not cache_enabled():
+            return _parse_tmy_pvsyst(view, source_name, target_irradiance_unit, resample_hourly_if_subhourly)
+
+        key = cache_key(
+            view,
+            "tmy_pvsyst",
+            source_key=source_key,
+            target_irradiance_unit=target_irradiance_unit,
+            resample_hourly_if_subhourly=resample_hourly_if_subhourly,
+        )
+        hit = load_frame(key)
+        if hit is not None:
+            step = hit.meta["time_step_minutes"]
+            column_stats = compute_column_stats(hit.df, step_minutes=step)
+            return TMYDataset(
+                df=hit.df,
+                header_info=hit.meta["header_info"],
+                units_by_col=hit.meta["units_by_col"],
+                time_step_minutes=step,
+                quality=basic_quality_check(hit.df, step_minutes=step, column_stats=column_stats),
+                source_name=source_name,
+                warnings=list(hit.meta["warnings"]),
+                column_stats=column_stats,
+            )
+
+        dataset = _parse_tmy_pvsyst(view, source_name, target_irradiance_unit, resample_hourly_if_subhourly)
+
+    store_frame(key, dataset.df, {
+        "header_info": dataset.header_info,
+        "units_by_col": dataset.units_by_col,
+        "time_step_minutes": dataset.time_step_minutes,
+        "warnings": dataset.warnings,
+    })
+    return dataset
+
+
+def _parse_tmy_pvsyst(
+    source: memoryview,
+    source_name: str,
+    target_irradiance_unit: str,
+    resample_hourly_if_subhourly: bool,
+) -> TMYDataset:
     warnings: List[str] = []
 
-    lines = read_text_lines(source)
-    blocks = split_pvsyst_hash_header(lines)
-    header_info = _extract_header_info(blocks.header_lines)
-
-    # detect separator from first non-empty body line
-    first = next((l for l in blocks.body_lines if l.strip()), "")
-    sep = detect_separator(first)
+    header_lines, sep, col_line, unit_line, table_offset, data_offset = _locate_tmy_table(source)
+    header_info = _extract_header_info(header_lines)
 
     # Extract units mapping from the table header lines (YEAR... + units line)
-    _, units_by_raw_col, table_lines = _extract_columns_and_units(blocks.body_lines, sep=sep)
-
-    # Read the whole table (pandas) from these lines (it includes header row and units row)
-    df_raw = read_delimited_from_lines(table_lines, sep=sep)
-    df_raw = df_raw.rename(columns=lambda x: str(x).strip())
-
-    # Drop the units row from data: keep only rows where YEAR is numeric
-    if "YEAR" in df_raw.columns:
-        df_raw["YEAR"] = pd.to_numeric(df_raw["YEAR"], errors="coerce")
-        df_raw = df_raw[df_raw["YEAR"].notna()].copy()
-        df_raw["YEAR"] = df_raw["YEAR"].astype(int)
-
-
-    # Build datetime from YEAR/MONTH/DAY/HOUR + sub-hourly minute offsets by occurrence
-    for c in ["MONTH", "DAY", "HOUR"]:
-        if c in df_raw.columns:
-            df_raw[c] = pd.to_numeric(df_raw[c], errors="coerce")
-
-    df_raw["datetime"] = pd.to_datetime(
-        df_raw[["YEAR", "MONTH", "DAY", "HOUR"]].rename(
-            columns={"YEAR": "year", "MONTH": "month", "DAY": "day", "HOUR": "hour"}
-        ),
-        errors="coerce",
-    )
+    raw_cols, units_by_raw_col = _extract_columns_and_units(col_line, unit_line, sep=sep)
+
+    # Fast path: typed C-parser read + integer datetime (clean files)
+    df_raw = _read_tmy_table_fast(source, raw_cols, data_offset, sep)
+    fast = df_raw is not None
+
+    if not fast:
+        # Read the whole table (pandas) straight from the view (it includes header row and units row)
+        df_raw = read_delimited_from_buffer(source[table_offset:], sep=sep)
+        df_raw = df_raw.rename(columns=lambda x: str(x).strip())
+
+        # Drop the units row from data: keep only rows where YEAR is numeric
+        if "YEAR" in df_raw.columns:
+            df_raw["YEAR"] = pd.to_numeric(df_raw["YEAR"], errors="coerce")
+            df_raw = owned_copy(df_raw[df_raw["YEAR"].notna()])
+            df_raw["YEAR"] = df_raw["YEAR"].astype(int)
+
+        # Build datetime from YEAR/MONTH/DAY/HOUR + sub-hourly minute offsets by occurrence
+        for c in ["MONTH", "DAY", "HOUR"]:
+            if c in df_raw.columns:
+                df_raw[c] = pd.to_numeric(df_raw[c], errors="coerce")
+
+        df_raw["datetime"] = pd.to_datetime(
+            df_raw[["YEAR", "MONTH", "DAY", "HOUR"]].rename(
+                columns={"YEAR": "year", "MONTH": "month", "DAY": "day", "HOUR": "hour"}
+            ),
+            errors="coerce",
+        )
 
     # Detect time step from header, fallback auto
     ts = parse_time_step_from_header(header_info)
@@ -161,18 +364,21 @@ def read_tmy_pvsyst(
             warnings.append("[timestep] Could not detect timestep from header or datetime; assuming 60 min.")
             time_step_minutes = 60
 
-    # Sub-hourly: add minute offsets inside each hour (cumcount * step)
-    df_raw = df_raw.sort_values("datetime").reset_index(drop=True)
-    if time_step_minutes and time_step_minutes < 60:
-        df_raw["minute_offset"] = df_raw.groupby(["YEAR", "MONTH", "DAY", "HOUR"]).cumcount() * time_step_minutes
-        df_raw["datetime"] = df_raw["datetime"] + pd.to_timedelta(df_raw["minute_offset"], unit="m")
-        df_raw = df_raw.drop(columns=["minute_offset"], errors="ignore")
-
-    # Convert numeric columns (except datetime and date fields)
-    for col in df_raw.columns:
-        if col in {"datetime", "YEAR", "MONTH", "DAY", "HOUR"}:
-            continue
-        df_raw[col] = pd.to_numeric(df_raw[col], errors="coerce")
+    # Sub-hourly: add minute offsets inside each hour (rank * step)
+    if fast:
+        df_raw = _add_subhourly_offsets(df_raw, time_step_minutes)
+    else:
+        df_raw = df_raw.sort_values("datetime", kind="stable").reset_index(drop=True)
+        if time_step_minutes and time_step_minutes < 60:
+            df_raw["minute_offset"] = df_raw.groupby(["YEAR", "MONTH", "DAY", "HOUR"]).cumcount() * time_step_minutes
+            df_raw["datetime"] = df_raw["datetime"] + pd.to_timedelta(df_raw["minute_offset"], unit="m")
+            df_raw = df_raw.drop(columns=["minute_offset"], errors="ignore")
+
+        # Convert numeric columns (except datetime and date fields)
+        for col in df_raw.columns:
+            if col in {"datetime", "YEAR", "MONTH", "DAY", "HOUR"}:
+                continue
+            df_raw[col] = pd.to_numeric(df_raw[col], errors="coerce")
 
     # Rename to canonical meteo names
     df = _rename_meteo_columns(df_raw)
@@ -181,17 +387,11 @@ def read_tmy_pvsyst(
     units_by_col: Dict[str, str] = {"datetime": ""}
     for raw_col, u in units_by_raw_col.items():
         # rename if known
-        mapping = {
-            "GHI": "ghi", "DNI": "dni", "DHI": "dhi",
-            "Tamb": "temp", "WindVel": "wind_speed", "WindDir": "wind_direction",
-            "GPI": "gpi",
-        }
-        key = mapping.get(raw_col, raw_col)
+        key = METEO_RENAME.get(raw_col, raw_col)
         units_by_col[key] = normalize_unit(u)
 
     # Keep only meteo columns (v1)
-    keep = ["datetime", "ghi", "dni", "dhi", "gpi", "temp", "wind_speed", "wind_direction"]
-    df = df[[c for c in keep if c in df.columns]].copy()
+    df = df[[c for c in KEEP_COLUMNS if c in df.columns]]
 
     # Convert irradiance units to target
     conv: UnitConversionResult = convert_irradiance_units(df, units_by_col, target_unit=target_irradiance_unit)
@@ -210,8 +410,9 @@ def read_tmy_pvsyst(
         time_step_minutes = 60
         warnings.append("[resample] Sub-hourly data resampled to 1H (sum irradiance / mean temp+wind).")
 
-    # Quality check
-    quality = basic_quality_check(df, step_minutes=time_step_minutes)
+    # Stats (computed once) + quality check
+    column_stats = compute_column_stats(df, step_minutes=time_step_minutes)
+    quality = basic_quality_check(df, step_minutes=time_step_minutes, column_stats=column_stats)
     if quality.warning:
         warnings.append(f"[quality] {quality.warning}")
 
@@ -223,4 +424,5 @@ def read_tmy_pvsyst(
         quality=quality,
         source_name=source_name,
         warnings=warnings,
+        column_stats=column_stats,
     )
@@ -1,89 +1,216 @@
 from __future__ import annotations
 
-from typing import Callable, Dict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+import os
+import time
+
+import numpy as np
 import pandas as pd
 
-from .hourly_models import AnalysisContext
+from .hourly_models import AnalysisContext, AnalysisOptions
+from .hourly_threshold import ThresholdIndex, build_threshold_index
 from utils import check_required_columns, suggest_similar_columns  # adapte si besoin
+from utils.memo import StageMemo
 
 
 AnalysisFunc = Callable[[AnalysisContext], None]
-ANALYSIS_REGISTRY: Dict[str, AnalysisFunc] = {}
 
 
-def register_analysis(analysis_id: str, func: AnalysisFunc) -> None:
-    ANALYSIS_REGISTRY[analysis_id] = func
-
-
-def register_analyses() -> None:
-    register_analysis("threshold", analyze_threshold)
-    register_analysis("power_distribution", analyze_power_distribution)
-    register_analysis("inverter_clipping", analyze_inverter_clipping)
-
-
-def run_all_analyses(context: AnalysisContext) -> None:
-    for func in ANALYSIS_REGISTRY.values():
-        func(context)
-
-
-def analyze_threshold(context: AnalysisContext) -> None:
-    df = context.df_raw.copy()
-    threshold_kw = float(context.options.threshold_kw)
-
-    df_prod = df[df["E_Grid"] > 0].copy()
-    df_above = df[df["E_Grid"] > threshold_kw].copy()
-
-    hours_prod = int(len(df_prod))
-    hours_above = int(len(df_above))
-
-    pct_above_global = 100.0 * hours_above / hours_prod if hours_prod > 0 else 0.0
+@dataclass(frozen=True)
+class AnalysisSpec:
+    analysis_id: str
+    func: AnalysisFunc
+    columns: Tuple[str, ...] = ()      # colonnes du fichier lues par l'analyse
+    depends_on: Tuple[str, ...] = ()   # analyses dont les résultats sont lus
+    options: Tuple[str, ...] = ()      # champs d'AnalysisOptions lus par l'analyse
+
+
+def _build_registry(*specs: AnalysisSpec) -> Mapping[str, AnalysisSpec]:
+    """Registre figé, construit une seule fois à l'import (dépendances vérifiées, sans cycle)."""
+    registry: Dict[str, AnalysisSpec] = {}
+    for spec in specs:
+        if spec.analysis_id in registry:
+            raise ValueError(f"Analyse '{spec.analysis_id}' enregistrée deux fois.")
+        registry[spec.analysis_id] = spec
+
+    for spec in specs:
+        unknown = [d for d in spec.depends_on if d not in registry]
+        if unknown:
+            raise ValueError(f"Analyse '{spec.analysis_id}' : dépendances inconnues {unknown}.")
+
+    # Détection de cycle (Kahn)
+    remaining = {aid: set(spec.depends_on) for aid, spec in registry.items()}
+    while remaining:
+        ready = [aid for aid, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dépendances cycliques entre analyses : {sorted(remaining)}.")
+        for aid in ready:
+            del remaining[aid]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return MappingProxyType(registry)
+
+
+def required_columns() -> List[str]:
+    """Union (ordonnée) des colonnes déclarées par les analyses enregistrées."""
+    cols: List[str] = []
+    for spec in ANALYSIS_REGISTRY.values():
+        cols.extend(c for c in spec.columns if c not in cols)
+    return cols
+
+
+def _run_timed(spec: AnalysisSpec, context: AnalysisContext) -> float:
+    t0 = time.perf_counter()
+    spec.func(context)
+    return time.perf_counter() - t0
+
+
+def analysis_keys(source_key: str, options: AnalysisOptions) -> Dict[str, Tuple]:
+    """
+    Clé de mémoïsation par analyse : contenu source + options effectivement
+    lues + clés des dépendances (un changement de seuil n'invalide donc que
+    les analyses qui lisent threshold_kw, directement ou non).
+    """
+    keys: Dict[str, Tuple] = {}
+
+    def key_of(aid: str) -> Tuple:
+        if aid not in keys:
+            spec = ANALYSIS_REGISTRY[aid]
+            keys[aid] = (
+                "analysis",
+                aid,
+                source_key,
+                tuple((o, getattr(options, o)) for o in spec.options),
+                tuple(key_of(d) for d in spec.depends_on),
+            )
+        return keys[aid]
+
+    for aid in ANALYSIS_REGISTRY:
+        key_of(aid)
+    return keys
+
+
+def run_all_analyses(
+    context: AnalysisContext,
+    max_workers: Optional[int] = None,
+    memo: Optional[StageMemo] = None,
+    source_key: Optional[str] = None,
+) -> Dict[str, bool]:
+    """
+    Exécute les analyses enregistrées sur un pool de threads : une analyse
+    démarre dès que ses dépendances sont terminées (les calculs NumPy/pandas
+    relâchent le GIL). Les durées sont enregistrées dans context.timings.
+
+    Avec `memo` + `source_key`, les résultats déjà calculés pour le même
+    contenu et les mêmes options sont réutilisés. Retourne {analyse: hit}.
+    """
+    pending = dict(ANALYSIS_REGISTRY)
+    done: set = set()
+    hits: Dict[str, bool] = {aid: False for aid in pending}
+
+    keys = analysis_keys(source_key, context.options) if memo is not None and source_key else {}
+    for aid, key in keys.items():
+        hit, value = memo.get(key)
+        if hit:
+            context.results[aid] = value
+            hits[aid] = True
+            done.add(aid)
+            del pending[aid]
+
+    if not pending:
+        return hits
+
+    workers = max_workers or min(len(pending), os.cpu_count() or 1) or 1
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hourly-analysis") as pool:
+        running: Dict[Future, str] = {}
+
+        def submit_ready() -> None:
+            for aid, spec in list(pending.items()):
+                if all(d in done for d in spec.depends_on):
+                    running[pool.submit(_run_timed, spec, context)] = aid
+                    del pending[aid]
+
+        submit_ready()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                aid = running.pop(fut)
+                context.timings[aid] = fut.result()  # propage l'exception éventuelle
+                done.add(aid)
+                if aid in keys:
+                    memo.put(keys[aid], context.results.get(aid))
+            submit_ready()
+
+    return hits
+
+
+MONTH_NAMES = {
+    1: "Janvier", 2: "Février", 3: "Mars", 4: "Avril",
+    5: "Mai", 6: "Juin", 7: "Juillet", 8: "Août",
+    9: "Septembre", 10: "Octobre", 11: "Novembre", 12: "Décembre"
+}
+
+SEASON_BY_MONTH = {
+    12: "Hiver", 1: "Hiver", 2: "Hiver",
+    3: "Printemps", 4: "Printemps", 5: "Printemps",
+    6: "Été", 7: "Été", 8: "Été",
+    9: "Automne", 10: "Automne", 11: "Automne"
+}
+
+
+def threshold_tables(index: ThresholdIndex, threshold_kw: float) -> Dict[str, Any]:
+    """
+    Synthèse + tableaux mensuel / saisonnier / % mensuel pour un seuil donné,
+    calculés à partir de l'index (O(log n) : utilisable à chaque interaction UI).
+    """
+    threshold_kw = float(threshold_kw)
+    hours_prod = int(index.hours_above(0.0)[0])
+    hours_above = int(index.hours_above(threshold_kw)[0])
 
     summary = {
         "threshold_kw": threshold_kw,
         "hours_prod": hours_prod,
         "hours_above": hours_above,
-        "pct_above_prod_time": pct_above_global,
-        "energy_kwh": float(df_above["E_Grid"].sum()),
+        "pct_above_prod_time": 100.0 * hours_above / hours_prod if hours_prod > 0 else 0.0,
+        "energy_kwh": float(index.energy_above(threshold_kw)[0]),
+        "curtailed_kwh": float(index.curtailed_energy(threshold_kw)[0]),
     }
+    return threshold_tables_from_breakdown(summary, index.monthly_breakdown(threshold_kw))
+
+
+def threshold_tables_from_breakdown(summary: Dict[str, Any], by_month: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Tableaux de l'analyse seuil à partir du tableau 12 mois
+    (month, hours_prod, hours_above, energy_kwh, curtailed_kwh) : partagé par
+    l'index trié et par les accumulateurs du mode flux.
+    """
+    by_month = by_month.assign(
+        month_name=by_month["month"].map(MONTH_NAMES),
+        season=by_month["month"].map(SEASON_BY_MONTH),
+    )
 
-    month_map = {
-        1: "Janvier", 2: "Février", 3: "Mars", 4: "Avril",
-        5: "Mai", 6: "Juin", 7: "Juillet", 8: "Août",
-        9: "Septembre", 10: "Octobre", 11: "Novembre", 12: "Décembre"
-    }
+    above = by_month[by_month["hours_above"] > 0]
+    monthly = above[["month_name", "hours_above", "energy_kwh"]].reset_index(drop=True)
 
-    df_above["month"] = df_above.index.month
-    monthly = (
-        df_above.groupby("month", observed=False)["E_Grid"]
-        .agg(hours_above="count", energy_kwh="sum")
-        .reset_index()
-    )
-    monthly["month_name"] = monthly["month"].map(month_map)
-    monthly = monthly[["month_name", "hours_above", "energy_kwh"]]
-
-    df_above["season"] = df_above.index.month.map({
-        12: "Hiver", 1: "Hiver", 2: "Hiver",
-        3: "Printemps", 4: "Printemps", 5: "Printemps",
-        6: "Été", 7: "Été", 8: "Été",
-        9: "Automne", 10: "Automne", 11: "Automne"
-    })
     seasonal = (
-        df_above.groupby("season", observed=False)["E_Grid"]
-        .agg(hours_above="count", energy_kwh="sum")
+        above.groupby("season", observed=False)[["hours_above", "energy_kwh"]]
+        .sum()
         .reset_index()
     )
 
-    df_prod["month"] = df_prod.index.month
-    monthly_pct = (
-        df_above.groupby("month", observed=False).size()
-        / df_prod.groupby("month", observed=False).size()
-        * 100
-    ).fillna(0).reset_index(name="pct_above")
-
-    monthly_pct["month_name"] = monthly_pct["month"].map(month_map)
-    monthly_pct = monthly_pct[["month_name", "pct_above"]]
+    active = by_month[(by_month["hours_prod"] > 0) | (by_month["hours_above"] > 0)]
+    prod = active["hours_prod"].where(active["hours_prod"] > 0)
+    monthly_pct = pd.DataFrame({
+        "month_name": active["month_name"],
+        "pct_above": (active["hours_above"] / prod * 100).fillna(0),
+    }).reset_index(drop=True)
 
-    context.results["threshold"] = {
+    return {
         "summary": summary,
         "monthly": monthly,
         "seasonal": seasonal,
@@ -91,74 +218,129 @@ def analyze_threshold(context: AnalysisContext) -> None:
     }
 
 
+def analyze_threshold_index(context: AnalysisContext) -> None:
+    features = context.features
+    context.results["threshold_index"] = build_threshold_index(features.column("E_Grid"), features.month)
+
+
+def analyze_threshold(context: AnalysisContext) -> None:
+    index = context.results["threshold_index"]
+
+    context.results["threshold"] = {
+        **threshold_tables(index, context.options.threshold_kw),
+        "index": index,
+    }
+
+
+POWER_CLASS_BINS = np.array([0, 0.5, 0.7, 0.9, 1.01])
+POWER_CLASS_LABELS = ["< 50 %", "50–70 %", "70–90 %", "> 90 %"]
+
+
+def power_class_codes(p: np.ndarray, p_max: float) -> np.ndarray:
+    """Classe (index dans POWER_CLASS_LABELS) de chaque puissance rapportée à p_max."""
+    # Classes fermées à droite, comme pd.cut : (0, 0.5], (0.5, 0.7], ...
+    return np.searchsorted(POWER_CLASS_BINS, p / p_max, side="left") - 1
+
+
+def power_distribution_result(p_max: float, hours: np.ndarray, energy: np.ndarray) -> Dict[str, Any]:
+    summary = pd.DataFrame({
+        "class": pd.Categorical(POWER_CLASS_LABELS, categories=POWER_CLASS_LABELS, ordered=True),
+        "hours": hours,
+        "energy_kwh": energy,
+    })
+    summary["pct_time"] = summary["hours"] / summary["hours"].sum() * 100
+    return {"p_max": p_max, "summary": summary}
+
+
 def analyze_power_distribution(context: AnalysisContext) -> None:
-    df = context.df_raw.copy()
-    df = df[df["E_Grid"] > 0]
+    features = context.features
+    p = features.column("E_Grid")[features.production_mask]
 
-    if df.empty:
+    if p.size == 0:
         context.results["power_distribution"] = None
         return
 
-    p_max = df["E_Grid"].max()
-    df["ratio"] = df["E_Grid"] / p_max
+    p_max = p.max()
+    codes = power_class_codes(p, p_max)
+    n_classes = len(POWER_CLASS_LABELS)
 
-    bins = [0, 0.5, 0.7, 0.9, 1.01]
-    labels = ["< 50 %", "50–70 %", "70–90 %", "> 90 %"]
+    hours = np.bincount(codes, minlength=n_classes)[:n_classes]
+    energy = np.bincount(codes, weights=p, minlength=n_classes)[:n_classes]
 
-    df["class"] = pd.cut(df["ratio"], bins=bins, labels=labels)
+    context.results["power_distribution"] = power_distribution_result(p_max, hours, energy)
+
+
+CLIPPING_COLUMNS = ["EOutInv", "IL_Pmax"]
 
-    summary = (
-        df.groupby("class", observed=False)["E_Grid"]
-        .agg(hours=("count"), energy_kwh=("sum"))
-        .reset_index()
-    )
-    summary["pct_time"] = summary["hours"] / summary["hours"].sum() * 100
 
-    context.results["power_distribution"] = {"p_max": p_max, "summary": summary}
+def clipping_unavailable(columns: List[str]) -> Optional[Dict[str, Any]]:
+    """Résultat « indisponible » si les colonnes d'écrêtage manquent, sinon None."""
+    ok, missing = check_required_columns(columns, CLIPPING_COLUMNS)
+    if ok:
+        return None
+    return {
+        "available": False,
+        "missing_columns": missing,
+        "suggestions": suggest_similar_columns(columns, missing),
+    }
 
 
 def analyze_inverter_clipping(context: AnalysisContext) -> None:
-    df = context.df_raw.copy()
-    required_cols = ["EOutInv", "IL_Pmax"]
-
-    ok, missing = check_required_columns(df.columns.tolist(), required_cols)
-    if not ok:
-        context.results["inverter_clipping"] = {
-            "available": False,
-            "missing_columns": missing,
-            "suggestions": suggest_similar_columns(df.columns.tolist(), missing),
-        }
+    columns = context.available_columns or context.df_raw.columns.tolist()
+    unavailable = clipping_unavailable(columns)
+    if unavailable is not None:
+        context.results["inverter_clipping"] = unavailable
         return
 
-    df = df[(df["EOutInv"] > 0) | (df["IL_Pmax"] > 0)].copy()
-    if df.empty:
+    features = context.features
+    e_out = features.column("EOutInv")
+    il_pmax = features.column("IL_Pmax")
+
+    mask = (e_out > 0) | (il_pmax > 0)
+    if not mask.any():
         context.results["inverter_clipping"] = {"available": True, "empty": True}
         return
 
-    df["E_potential"] = df["EOutInv"] + df["IL_Pmax"]
-    total_potential = df["E_potential"].sum()
-    total_clipped = df["IL_Pmax"].sum()
-    pct_clipping = 100.0 * total_clipped / total_potential if total_potential > 0 else 0.0
-    hours_clipping = int((df["IL_Pmax"] > 0).sum())
+    clipped = il_pmax[mask]
+    potential = e_out[mask] + clipped
+    months = features.month[mask]
+
+    # Sommes en ignorant les NaN (comme pandas)
+    clipped0 = np.nan_to_num(clipped)
+    potential0 = np.nan_to_num(potential)
+
+    context.results["inverter_clipping"] = clipping_result(
+        month_counts=np.bincount(months, minlength=13),
+        month_clipped=np.bincount(months, weights=clipped0, minlength=13),
+        month_potential=np.bincount(months, weights=potential0, minlength=13),
+        total_clipped=clipped0.sum(),
+        total_potential=potential0.sum(),
+        hours_clipping=int((clipped > 0).sum()),
+    )
 
-    month_map = {
-        1: "Janvier", 2: "Février", 3: "Mars", 4: "Avril",
-        5: "Mai", 6: "Juin", 7: "Juillet", 8: "Août",
-        9: "Septembre", 10: "Octobre", 11: "Novembre", 12: "Décembre"
-    }
 
-    df["month"] = df.index.month
-    monthly = (
-        df.groupby("month", observed=False)[["IL_Pmax", "E_potential"]]
-        .sum()
-        .reset_index()
-    )
-    monthly["month_name"] = monthly["month"].map(month_map)
+def clipping_result(
+    month_counts: np.ndarray,
+    month_clipped: np.ndarray,
+    month_potential: np.ndarray,
+    total_clipped: float,
+    total_potential: float,
+    hours_clipping: int,
+) -> Dict[str, Any]:
+    """Résultat de l'analyse d'écrêtage à partir des sommes par mois (tableaux indexés 0..12)."""
+    pct_clipping = 100.0 * total_clipped / total_potential if total_potential > 0 else 0.0
+
+    present = np.flatnonzero(month_counts)
+    monthly = pd.DataFrame({
+        "month_name": [MONTH_NAMES[m] for m in present],
+        "IL_Pmax": month_clipped[present],
+        "E_potential": month_potential[present],
+    })
     monthly["pct_clipping"] = (monthly["IL_Pmax"] / monthly["E_potential"] * 100).fillna(0)
 
     monthly = monthly[["month_name", "IL_Pmax", "pct_clipping"]]
 
-    context.results["inverter_clipping"] = {
+    return {
         "available": True,
         "summary": {
             "energy_clipped_kwh": float(total_clipped),
@@ -167,3 +349,11 @@ def analyze_inverter_clipping(context: AnalysisContext) -> None:
         },
         "monthly": monthly,
     }
+
+
+ANALYSIS_REGISTRY: Mapping[str, AnalysisSpec] = _build_registry(
+    AnalysisSpec("threshold_index", analyze_threshold_index, columns=("E_Grid",)),
+    AnalysisSpec("threshold", analyze_threshold, depends_on=("threshold_index",), options=("threshold_kw",)),
+    AnalysisSpec("power_distribution", analyze_power_distribution, columns=("E_Grid",)),
+    AnalysisSpec("inverter_clipping", analyze_inverter_clipping, columns=("EOutInv", "IL_Pmax")),
+)
@@ -1,17 +1,32 @@
 # export_excel.py
 
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
 import pandas as pd
+import xlsxwriter
 
 from .hourly_models import AnalysisContext
-from utils import format_number
+from config import HOURLY_EXCEL_RAW_DATA
+
+
+# Nombre de lignes converties en listes Python à la fois (feuille de données)
+_ROW_CHUNK = 4096
+
+# Nombre maximal de lignes d'une feuille Excel (en-tête compris)
+_EXCEL_MAX_ROWS = 1_048_576
 
 
 # =========================================================
 # EXPORT EXCEL GLOBAL (DYNAMIQUE)
 # =========================================================
 
-def export_excel(context: AnalysisContext, output: Path) -> None:
+def export_excel(
+    context: AnalysisContext,
+    output: Path,
+    raw_data: str = HOURLY_EXCEL_RAW_DATA,
+) -> None:
     """
     Export Excel dynamique :
     - Synthèse globale (équivalent V1)
@@ -19,64 +34,122 @@ def export_excel(context: AnalysisContext, output: Path) -> None:
     - Distribution de puissance (si présente)
     - Données horaires
     - Unités
+
+    Le classeur est écrit en mode « constant_memory » d'xlsxwriter (lignes
+    écrites dans l'ordre puis vidées sur disque) : la mémoire reste bornée
+    quelle que soit la taille des données horaires.
+
+    raw_data :
+    - "sheet" : données horaires dans le classeur (défaut), réparties sur
+                plusieurs feuilles au-delà de la limite de lignes d'Excel
+    - "none"  : pas de données horaires
     """
 
     if "threshold" not in context.results:
         raise ValueError("Analyse 'threshold' absente — export Excel impossible.")
 
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        workbook = writer.book
+    workbook = xlsxwriter.Workbook(str(output), {"constant_memory": True})
+    try:
+        fmts = _formats(workbook)
 
-        _export_synthese(writer, context)
-        _export_threshold_excel(writer, workbook, context.results["threshold"])
+        _export_synthese(workbook, fmts, context)
+        _export_threshold_excel(workbook, fmts, context.results["threshold"])
 
-        if "power_distribution" in context.results:
+        if context.results.get("power_distribution"):
             _export_power_distribution_excel(
-                writer, context.results["power_distribution"]
+                workbook, fmts, context.results["power_distribution"]
             )
 
-        context.df_raw.to_excel(writer, sheet_name="Données horaires", index=True)
-        _export_units(writer, context)
+        if raw_data != "none":
+            _export_hourly_data(workbook, fmts, context.load_full_dataframe())
+
+        _export_units(workbook, fmts, context)
+    finally:
+        workbook.close()
+
+
+# =========================================================
+# FORMATS / ÉCRITURE PAR LIGNES
+# =========================================================
+
+def _formats(workbook) -> Dict[str, object]:
+    """Formats créés une fois par classeur (jamais par cellule)."""
+    return {
+        "header": workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"}),
+        "datetime": workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"}),
+        "int": workbook.add_format({"num_format": "#,##0"}),
+        "dec1": workbook.add_format({"num_format": "#,##0.0"}),
+        "pct1": workbook.add_format({"num_format": '0.0" %"'}),
+        "pct2": workbook.add_format({"num_format": '0.00" %"'}),
+    }
+
+
+def _cell_values(values: Sequence) -> List:
+    """Valeurs natives Python ; NaN / NaT -> None (cellule vide)."""
+    s = pd.Series(values)
+    return s.astype(object).where(s.notna(), None).tolist()
+
+
+def _write_table(
+    workbook,
+    fmts: Dict[str, object],
+    sheet_name: str,
+    columns: Dict[str, Sequence],
+    col_formats: Optional[Dict[str, object]] = None,
+):
+    """
+    Écrit un petit tableau ligne par ligne (compatible constant_memory) :
+    les nombres restent numériques, mis en forme par un format de colonne.
+    """
+    col_formats = col_formats or {}
+    worksheet = workbook.add_worksheet(sheet_name)
+
+    headers = list(columns)
+    worksheet.write_row(0, 0, headers, fmts["header"])
+
+    data = [_cell_values(columns[h]) for h in headers]
+    formats = [col_formats.get(h) for h in headers]
+    n_rows = len(data[0]) if data else 0
+
+    for r in range(n_rows):
+        for c, col in enumerate(data):
+            v = col[r]
+            if v is not None:
+                worksheet.write(r + 1, c, v, formats[c])
+
+    return worksheet
 
 
 # =========================================================
 # SYNTHÈSE GLOBALE
 # =========================================================
 
-def _export_synthese(writer, context: AnalysisContext) -> None:
+def _export_synthese(workbook, fmts, context: AnalysisContext) -> None:
     summary = context.results["threshold"]["summary"]
 
-    df = pd.DataFrame({
-        "Clé": [
-            "Version PVSyst",
-            "Fichier analysé",
-            "Date de simulation",
-            "Seuil de puissance (kW)",
-            "Heures de fonctionnement (h)",
-            "Heures > seuil (h)",
-            "Temps de fonctionnement > seuil (%)",
-            "Énergie produite > seuil (kWh)",
-        ],
-        "Valeur": [
-            context.general_info.get("PVSyst_version", ""),
-            context.input_file.name,
-            context.general_info.get("Simulation_date", ""),
-            format_number(summary["threshold_kw"], 1),
-            format_number(summary["hours_prod"], 0),
-            format_number(summary["hours_above"], 0),
-            f"{summary['pct_above_prod_time']:.1f} %",
-            format_number(summary["energy_kwh"], 0),
-        ],
-    })
+    rows = [
+        ("Version PVSyst", context.general_info.get("PVSyst_version", ""), None),
+        ("Fichier analysé", context.input_file.name, None),
+        ("Date de simulation", context.general_info.get("Simulation_date", ""), None),
+        ("Seuil de puissance (kW)", float(summary["threshold_kw"]), fmts["dec1"]),
+        ("Heures de fonctionnement (h)", int(summary["hours_prod"]), fmts["int"]),
+        ("Heures > seuil (h)", int(summary["hours_above"]), fmts["int"]),
+        ("Temps de fonctionnement > seuil (%)", float(summary["pct_above_prod_time"]), fmts["pct1"]),
+        ("Énergie produite > seuil (kWh)", float(summary["energy_kwh"]), fmts["int"]),
+    ]
 
-    df.to_excel(writer, sheet_name="Synthèse", index=False)
+    worksheet = workbook.add_worksheet("Synthèse")
+    worksheet.write_row(0, 0, ["Clé", "Valeur"], fmts["header"])
+    for r, (key, value, fmt) in enumerate(rows, start=1):
+        worksheet.write(r, 0, key)
+        worksheet.write(r, 1, value, fmt)
 
 
 # =========================================================
 # ANALYSE SEUIL — EXCEL
 # =========================================================
 
-def _export_threshold_excel(writer, workbook, res: dict) -> None:
+def _export_threshold_excel(workbook, fmts, res: dict) -> None:
     monthly = res["monthly"]
     seasonal = res["seasonal"]
     monthly_pct = res.get("monthly_pct")
@@ -85,9 +158,7 @@ def _export_threshold_excel(writer, workbook, res: dict) -> None:
     # Mensuel
     # -----------------------------------------------------
     sheet_month = "Seuil — Mensuel"
-    monthly.to_excel(writer, sheet_name=sheet_month, index=False)
-
-    worksheet = writer.sheets[sheet_month]
+    worksheet = _write_table(workbook, fmts, sheet_month, {c: monthly[c] for c in monthly.columns})
 
     chart_month = workbook.add_chart({"type": "column"})
     chart_month.add_series({
@@ -105,9 +176,7 @@ def _export_threshold_excel(writer, workbook, res: dict) -> None:
     # Saisonnier
     # -----------------------------------------------------
     sheet_season = "Seuil — Saisonnier"
-    seasonal.to_excel(writer, sheet_name=sheet_season, index=False)
-
-    worksheet = writer.sheets[sheet_season]
+    worksheet = _write_table(workbook, fmts, sheet_season, {c: seasonal[c] for c in seasonal.columns})
 
     chart_season = workbook.add_chart({"type": "column"})
     chart_season.add_series({
@@ -125,13 +194,10 @@ def _export_threshold_excel(writer, workbook, res: dict) -> None:
     # % mensuel > seuil
     # -----------------------------------------------------
     if monthly_pct is not None:
-        df_pct = monthly_pct.copy()
-        df_pct["% du temps > seuil"] = df_pct["pct_above"].map(
-            lambda x: f"{x:.1f} %"
-        )
-
-        df_pct[["month_name", "% du temps > seuil"]].to_excel(
-            writer, sheet_name="Seuil — % mensuel", index=False
+        _write_table(
+            workbook, fmts, "Seuil — % mensuel",
+            {"month_name": monthly_pct["month_name"], "% du temps > seuil": monthly_pct["pct_above"]},
+            col_formats={"% du temps > seuil": fmts["pct1"]},
         )
 
 
@@ -139,26 +205,72 @@ def _export_threshold_excel(writer, workbook, res: dict) -> None:
 # DISTRIBUTION DE PUISSANCE — EXCEL
 # =========================================================
 
-def _export_power_distribution_excel(writer, res: dict) -> None:
-    df = res["summary"].copy()
-
-    df["% du temps"] = df["pct_time"].map(lambda x: f"{x:.1f} %")
-    df["Énergie (kWh)"] = df["energy_kwh"].map(
-        lambda x: format_number(x, 0)
+def _export_power_distribution_excel(workbook, fmts, res: dict) -> None:
+    df = res["summary"]
+
+    _write_table(
+        workbook, fmts, "Distribution puissance",
+        {
+            "class": df["class"].astype(str),
+            "% du temps": df["pct_time"],
+            "Énergie (kWh)": df["energy_kwh"],
+        },
+        col_formats={"% du temps": fmts["pct1"], "Énergie (kWh)": fmts["int"]},
     )
 
-    df[["class", "% du temps", "Énergie (kWh)"]].to_excel(
-        writer, sheet_name="Distribution puissance",
-        index=False
-    )
+
+# =========================================================
+# DONNÉES HORAIRES (ÉCRITURE EN FLUX)
+# =========================================================
+
+def _export_hourly_data(workbook, fmts, df: pd.DataFrame) -> None:
+    """
+    Feuilles « Données horaires » écrites ligne à ligne depuis des tableaux
+    NumPy, par blocs de _ROW_CHUNK lignes (mémoire bornée en constant_memory).
+    Au-delà de la limite de lignes d'Excel (xlsxwriter ignorerait les lignes
+    en trop sans erreur), les données continuent sur « Données horaires (2) »,
+    « (3) »…
+    """
+    rows_per_sheet = _EXCEL_MAX_ROWS - 1  # + ligne d'en-tête
+    n = len(df)
+    for part, sheet_start in enumerate(range(0, max(n, 1), rows_per_sheet), start=1):
+        name = "Données horaires" if part == 1 else f"Données horaires ({part})"
+        _write_hourly_sheet(workbook, fmts, name, df, sheet_start, min(sheet_start + rows_per_sheet, n))
+
+
+def _write_hourly_sheet(workbook, fmts, sheet_name: str, df: pd.DataFrame, first: int, last: int) -> None:
+    """Lignes first..last (exclu) de df sur une feuille."""
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [df.index.name or "", *map(str, df.columns)], fmts["header"])
+
+    write_number = worksheet.write_number
+    write_datetime = worksheet.write_datetime
+    dt_fmt = fmts["datetime"]
+
+    for start in range(first, last, _ROW_CHUNK):
+        stop = min(start + _ROW_CHUNK, last)
+        dates = df.index[start:stop].to_pydatetime()
+        block = df.iloc[start:stop].to_numpy(dtype=float)
+        nan_free = not np.isnan(block).any()
+
+        for i, row in enumerate(block.tolist()):
+            r = start - first + i + 1
+            write_datetime(r, 0, dates[i], dt_fmt)
+            if nan_free:
+                for c, v in enumerate(row, start=1):
+                    write_number(r, c, v)
+            else:
+                for c, v in enumerate(row, start=1):
+                    if v == v:  # NaN -> cellule vide
+                        write_number(r, c, v)
 
 
 # =========================================================
 # UNITÉS
 # =========================================================
 
-def _export_units(writer, context: AnalysisContext) -> None:
-    df_units = pd.DataFrame(
-        [{"Paramètre": k, "Unité": v} for k, v in context.units_map.items()]
+def _export_units(workbook, fmts, context: AnalysisContext) -> None:
+    _write_table(
+        workbook, fmts, "Unités",
+        {"Paramètre": list(context.units_map.keys()), "Unité": list(context.units_map.values())},
     )
-    df_units.to_excel(writer, sheet_name="Unités", index=False)
@@ -2,10 +2,13 @@
 
 from pathlib import Path
 from datetime import datetime
-import tempfile
+from io import BytesIO
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Table, TableStyle,
     Spacer, Image
@@ -16,42 +19,85 @@ from reportlab.lib.units import cm
 from reportlab.lib import colors
 
 from .hourly_models import AnalysisContext
-from config import APP_NAME
+from config import APP_NAME, HOURLY_PDF_VECTOR_CHARTS
 from utils import format_number
 
 
 # =========================================================
-# GRAPHIQUES (MATPLOTLIB → PNG)
+# GRAPHIQUES
 # =========================================================
 
-def _generate_monthly_chart(monthly_df, output_png: Path) -> Path:
-    """Graphe mensuel Heures > seuil (équivalent V1)."""
-    width = 5.0
-    height = 2.8
+_CHART_TITLE = "Répartition mensuelle – Heures > seuil"
 
-    fig, ax = plt.subplots(figsize=(width, height))
+
+def _generate_monthly_chart(monthly_df, width: float, height: float) -> Image:
+    """
+    Graphe mensuel Heures > seuil (équivalent V1), matplotlib → PNG en mémoire.
+    API objet (Figure + canvas Agg) : aucun état global pyplot, rendu
+    possible depuis plusieurs threads en parallèle.
+    """
+    fig = Figure(figsize=(5.0, 2.8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
     ax.bar(monthly_df["month_name"], monthly_df["hours_above"])
-    ax.set_title("Répartition mensuelle – Heures > seuil", fontsize=10)
+    ax.set_title(_CHART_TITLE, fontsize=10)
     ax.set_ylabel("Heures", fontsize=9)
-    plt.xticks(rotation=45, ha="right", fontsize=8)
-    plt.tight_layout()
-    plt.savefig(output_png, dpi=200)
-    plt.close(fig)
-
-    return output_png
+    ax.tick_params(axis="x", labelrotation=45, labelsize=8)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    fig.tight_layout()
+
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=200)
+    buf.seek(0)
+    return Image(buf, width=width, height=height)
+
+
+def _monthly_chart_vector(monthly_df, width: float, height: float) -> Drawing:
+    """Même graphe, dessiné directement en graphiques vectoriels reportlab (pas de PNG)."""
+    drawing = Drawing(width, height)
+    drawing.add(String(width / 2, height - 12, _CHART_TITLE, fontSize=10, textAnchor="middle"))
+
+    chart = VerticalBarChart()
+    chart.x = 1.2 * cm
+    chart.y = 1.3 * cm
+    chart.width = width - 1.6 * cm
+    chart.height = height - 1.3 * cm - 20
+    chart.data = [[float(v) for v in monthly_df["hours_above"]]]
+    chart.bars[0].fillColor = colors.HexColor("#1f77b4")
+    chart.bars[0].strokeColor = None
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.categoryAxis.categoryNames = [str(m) for m in monthly_df["month_name"]]
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = "ne"
+    drawing.add(chart)
+
+    y_label = Group(String(0, 0, "Heures", fontSize=8, textAnchor="middle"))
+    y_label.transform = (0, 1, -1, 0, 8, chart.y + chart.height / 2)  # rotation 90°
+    drawing.add(y_label)
+    return drawing
 
 
 # =========================================================
 # EXPORT PDF GLOBAL (DYNAMIQUE)
 # =========================================================
 
-def export_pdf(context: AnalysisContext, pdf_path: Path) -> None:
+def export_pdf(
+    context: AnalysisContext,
+    pdf_path: Path,
+    vector_charts: bool = HOURLY_PDF_VECTOR_CHARTS,
+) -> None:
     """
     PDF 1 page (tant que possible), dynamique :
     - Synthèse générale
     - Analyse seuil (tableau + graphe mensuel)
     - % du temps > seuil par mois
     - Distribution de puissance (si présente)
+
+    vector_charts : graphe mensuel en dessin vectoriel reportlab plutôt
+    qu'en image matplotlib.
     """
 
     if "threshold" not in context.results:
@@ -63,125 +109,123 @@ def export_pdf(context: AnalysisContext, pdf_path: Path) -> None:
     monthly_pct = threshold_res.get("monthly_pct")
 
     # -----------------------------------------------------
-    # Génération graphe mensuel
+    # Document PDF
     # -----------------------------------------------------
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-        chart_png = tmpdir / f"{pdf_path.stem}_monthly.png"
-        _generate_monthly_chart(monthly, chart_png)
-
-        # -------------------------------------------------
-        # Document PDF
-        # -------------------------------------------------
-        doc = SimpleDocTemplate(
-            str(pdf_path),
-            pagesize=A4,
-            leftMargin=2 * cm,
-            rightMargin=2 * cm,
-            topMargin=2 * cm,
-            bottomMargin=2 * cm
-        )
-
-        styles = getSampleStyleSheet()
-        elems = []
-
-        # =================================================
-        # TITRE
-        # =================================================
-        elems.append(Paragraph(f"<b>{APP_NAME}</b>", styles["Title"]))
-        elems.append(Spacer(1, 10))
-
-        # =================================================
-        # SYNTHÈSE GÉNÉRALE
-        # =================================================
-        elems.append(Paragraph("<b>Synthèse générale</b>", styles["Heading2"]))
+    doc = SimpleDocTemplate(
+        str(pdf_path),
+        pagesize=A4,
+        leftMargin=2 * cm,
+        rightMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm
+    )
+
+    styles = getSampleStyleSheet()
+    elems = []
+
+    # =================================================
+    # TITRE
+    # =================================================
+    elems.append(Paragraph(f"<b>{APP_NAME}</b>", styles["Title"]))
+    elems.append(Spacer(1, 10))
+
+    # =================================================
+    # SYNTHÈSE GÉNÉRALE
+    # =================================================
+    elems.append(Paragraph("<b>Synthèse générale</b>", styles["Heading2"]))
+    elems.append(Spacer(1, 6))
+
+    synth = [
+        ["Version PVSyst", context.general_info.get("PVSyst_version", "")],
+        ["Fichier analysé", context.input_file.name],
+        ["Date de simulation", context.general_info.get("Simulation_date", "")],
+        ["Seuil (kW)", format_number(summary["threshold_kw"], 1)],
+        ["Heures de fonctionnement (h)", format_number(summary["hours_prod"], 0)],
+        ["Heures > seuil (annuel)", format_number(summary["hours_above"], 0)],
+        ["Fonctionnement > seuil (%)", f"{summary['pct_above_prod_time']:.1f} %"],
+        ["Énergie > seuil (kWh/an)", format_number(summary["energy_kwh"], 0)],
+    ]
+
+    elems.append(_styled_table(synth, [7.5 * cm, 6.5 * cm]))
+    elems.append(Spacer(1, 10))
+
+    # =================================================
+    # SYNTHÈSE TEMPORELLE — TABLEAU MENSUEL
+    # =================================================
+    elems.append(Paragraph("<b>Synthèse temporelle</b>", styles["Heading2"]))
+    elems.append(Spacer(1, 6))
+
+    monthly_data = [["Mois", "Heures > seuil (h)", "Énergie (kWh)"]]
+    for _, row in monthly.iterrows():
+        monthly_data.append([
+            row["month_name"],
+            format_number(row["hours_above"], 0),
+            format_number(row["energy_kwh"], 0),
+        ])
+
+    elems.append(_styled_table(monthly_data, [4.5 * cm, 4.5 * cm, 4.5 * cm]))
+    elems.append(Spacer(1, 8))
+
+    # =================================================
+    # % DU TEMPS > SEUIL PAR MOIS
+    # =================================================
+    if monthly_pct is not None:
+        elems.append(Paragraph("<b>% du temps de fonctionnement > seuil</b>", styles["Heading3"]))
         elems.append(Spacer(1, 6))
 
-        synth = [
-            ["Version PVSyst", context.general_info.get("PVSyst_version", "")],
-            ["Fichier analysé", context.input_file.name],
-            ["Date de simulation", context.general_info.get("Simulation_date", "")],
-            ["Seuil (kW)", format_number(summary["threshold_kw"], 1)],
-            ["Heures de fonctionnement (h)", format_number(summary["hours_prod"], 0)],
-            ["Heures > seuil (annuel)", format_number(summary["hours_above"], 0)],
-            ["Fonctionnement > seuil (%)", f"{summary['pct_above_prod_time']:.1f} %"],
-            ["Énergie > seuil (kWh/an)", format_number(summary["energy_kwh"], 0)],
-        ]
-
-        elems.append(_styled_table(synth, [7.5 * cm, 6.5 * cm]))
-        elems.append(Spacer(1, 10))
+        pct_data = [["Mois", "% du temps > seuil"]]
+        for _, row in monthly_pct.iterrows():
+            pct_data.append([
+                row["month_name"],
+                f"{row['pct_above']:.1f} %",
+            ])
+
+        elems.append(_styled_table(pct_data, [6.0 * cm, 6.0 * cm]))
+        elems.append(Spacer(1, 8))
 
-        # =================================================
-        # SYNTHÈSE TEMPORELLE — TABLEAU MENSUEL
-        # =================================================
-        elems.append(Paragraph("<b>Synthèse temporelle</b>", styles["Heading2"]))
+    # =================================================
+    # GRAPHE MENSUEL (UNIQUE)
+    # =================================================
+    img_width = 13.0 * cm
+    img_height = 6.0 * cm
+    if monthly.empty:
+        # aucune heure au-dessus du seuil : pas de barres à tracer
+        elems.append(Paragraph(f"{_CHART_TITLE} : aucune heure au-dessus du seuil.", styles["Normal"]))
+    elif vector_charts:
+        elems.append(_monthly_chart_vector(monthly, img_width, img_height))
+    else:
+        elems.append(_generate_monthly_chart(monthly, img_width, img_height))
+
+    # =================================================
+    # DISTRIBUTION DE PUISSANCE
+    # =================================================
+    power_dist = context.results.get("power_distribution")
+    if power_dist:
+        elems.append(Spacer(1, 10))
+        elems.append(Paragraph("<b>Distribution de puissance</b>", styles["Heading2"]))
         elems.append(Spacer(1, 6))
 
-        monthly_data = [["Mois", "Heures > seuil (h)", "Énergie (kWh)"]]
-        for _, row in monthly.iterrows():
-            monthly_data.append([
-                row["month_name"],
-                format_number(row["hours_above"], 0),
+        dist_data = [["Classe", "% du temps", "Énergie (kWh)"]]
+        for _, row in power_dist["summary"].iterrows():
+            dist_data.append([
+                row["class"],
+                f"{row['pct_time']:.1f} %",
                 format_number(row["energy_kwh"], 0),
             ])
 
-        elems.append(_styled_table(monthly_data, [4.5 * cm, 4.5 * cm, 4.5 * cm]))
-        elems.append(Spacer(1, 8))
+        elems.append(_styled_table(dist_data, [5.0 * cm, 4.0 * cm, 4.0 * cm]))
+
+    # =================================================
+    # FOOTER
+    # =================================================
+    now = datetime.now().strftime("%d/%m/%Y %H:%M")
+
+    def footer(canvas, _doc):
+        canvas.setFont("Helvetica", 8)
+        canvas.setFillColor(colors.grey)
+        canvas.drawRightString(19 * cm, 1.2 * cm, now)
 
-        # =================================================
-        # % DU TEMPS > SEUIL PAR MOIS
-        # =================================================
-        if monthly_pct is not None:
-            elems.append(Paragraph("<b>% du temps de fonctionnement > seuil</b>", styles["Heading3"]))
-            elems.append(Spacer(1, 6))
-
-            pct_data = [["Mois", "% du temps > seuil"]]
-            for _, row in monthly_pct.iterrows():
-                pct_data.append([
-                    row["month_name"],
-                    f"{row['pct_above']:.1f} %",
-                ])
-
-            elems.append(_styled_table(pct_data, [6.0 * cm, 6.0 * cm]))
-            elems.append(Spacer(1, 8))
-
-        # =================================================
-        # GRAPHE MENSUEL (UNIQUE)
-        # =================================================
-        img_width = 13.0 * cm
-        img_height = 6.0 * cm
-        elems.append(Image(str(chart_png), width=img_width, height=img_height))
-
-        # =================================================
-        # DISTRIBUTION DE PUISSANCE
-        # =================================================
-        power_dist = context.results.get("power_distribution")
-        if power_dist:
-            elems.append(Spacer(1, 10))
-            elems.append(Paragraph("<b>Distribution de puissance</b>", styles["Heading2"]))
-            elems.append(Spacer(1, 6))
-
-            dist_data = [["Classe", "% du temps", "Énergie (kWh)"]]
-            for _, row in power_dist["summary"].iterrows():
-                dist_data.append([
-                    row["class"],
-                    f"{row['pct_time']:.1f} %",
-                    format_number(row["energy_kwh"], 0),
-                ])
-
-            elems.append(_styled_table(dist_data, [5.0 * cm, 4.0 * cm, 4.0 * cm]))
-
-        # =================================================
-        # FOOTER
-        # =================================================
-        now = datetime.now().strftime("%d/%m/%Y %H:%M")
-
-        def footer(canvas, _doc):
-            canvas.setFont("Helvetica", 8)
-            canvas.setFillColor(colors.grey)
-            canvas.drawRightString(19 * cm, 1.2 * cm, now)
-
-        doc.build(elems, onFirstPage=footer, onLaterPages=footer)
+    doc.build(elems, onFirstPage=footer, onLaterPages=footer)
 
 
 # =========================================================
@@ -1,20 +1,24 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import re
+
 import pandas as pd
 
 from config import PVSYST_DATE_FMT
+from utils.io import BufferSource, buffer_reader, line_end, source_buffer
+from utils.parse_cache import cache_enabled, cache_key, load_frame, store_frame
 
 
-def _decode_bytes(source: bytes) -> str:
-    # PVSyst exports are often latin-1
+def _decode_bytes(source) -> str:
+    # PVSyst exports are often latin-1 (source : bytes ou memoryview)
     for enc in ("latin-1", "utf-8"):
         try:
-            return source.decode(enc)
+            return str(source, enc)
         except Exception:
             continue
     # fallback (will keep running but may mangle some chars)
-    return source.decode("latin-1", errors="ignore")
+    return str(source, "latin-1", errors="ignore")
 
 
 def parse_general_info(lines: List[str]) -> Dict[str, str]:
@@ -42,6 +46,7 @@ def detect_table(lines: List[str]) -> Tuple[List[str], List[str], int]:
 
 
 def load_hourly_dataframe(lines: List[str]) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """Chemin de secours (ligne à ligne) pour les fichiers que le lecteur C refuse."""
     headers, units, start = detect_table(lines)
 
     if "E_Grid" not in headers:
@@ -62,22 +67,234 @@ def load_hourly_dataframe(lines: List[str]) -> Tuple[pd.DataFrame, Dict[str, str
         )
         df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    n_total = len(df)
-    n_valid = df[numeric_cols].notna().any(axis=1).sum()
+    return _finalize_hourly_dataframe(df, headers, units)
+
+
+# Colonnes sur lesquelles porte le contrôle « ≥ 50 % de lignes valides » :
+# toujours lues, quelle que soit la projection, pour qu'un même fichier soit
+# accepté ou refusé indépendamment des analyses demandées.
+VALIDITY_COLUMNS = ("E_Grid",)
+
+
+def count_valid_rows(df: pd.DataFrame) -> int:
+    """Lignes ayant au moins une valeur numérique dans VALIDITY_COLUMNS."""
+    cols = [c for c in VALIDITY_COLUMNS if c in df.columns]
+    return int(df[cols].notna().any(axis=1).sum()) if cols else 0
+
+
+def check_valid_rows(n_valid: int, n_total: int) -> None:
     if n_total > 0 and n_valid / n_total < 0.5:
         raise ValueError(
             "Moins de 50 % des lignes contiennent des valeurs numériques valides. "
             "Vérifiez le séparateur décimal du fichier PVSyst."
         )
 
+
+def _finalize_hourly_dataframe(
+    df: pd.DataFrame, headers: List[str], units: List[str]
+) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    check_valid_rows(count_valid_rows(df), len(df))
+
     df = df.set_index("date").sort_index()
     units_map = dict(zip(headers, units))
     return df, units_map
 
 
-def read_hourly_from_bytes(source: bytes) -> tuple[dict, pd.DataFrame, dict]:
+# =========================================================
+# LECTURE RAPIDE (moteur C de pandas)
+# =========================================================
+
+_TABLE_HEADER_RE = re.compile(rb"^date;", re.IGNORECASE | re.MULTILINE)
+
+# Taille de l'échantillon utilisé pour détecter le séparateur décimal
+_DECIMAL_SAMPLE_BYTES = 64 * 1024
+
+
+def locate_table(source) -> Optional[Tuple[List[str], List[str], List[str], int]]:
+    """
+    Localise la table horaire directement dans les octets bruts (bytes ou
+    memoryview : seuls le préambule et les deux lignes d'en-tête sont copiés).
+
+    Retourne (lignes de préambule, en-têtes, unités, offset de la première
+    ligne de données), ou None si la ligne 'date;...' est introuvable.
+    """
+    m = _TABLE_HEADER_RE.search(source)
+    if m is None:
+        return None
+
+    header_start = m.start()
+    header_end = line_end(source, header_start)
+    if header_end >= len(source):
+        return None
+    units_end = line_end(source, header_end + 1)
+
+    preamble = _decode_bytes(source[:header_start]).splitlines()
+    headers = [h.strip() for h in _decode_bytes(source[header_start:header_end]).split(";")]
+    units = [u.strip() for u in _decode_bytes(source[header_end + 1:units_end]).split(";")]
+    return preamble, headers, units, units_end + 1
+
+
+def _detect_decimal(sample: bytes) -> str:
+    # Avec ';' comme séparateur de champs, une virgule ne peut être qu'une décimale
+    return "," if b"," in sample else "."
+
+
+def _project_columns(headers: List[str], columns: Optional[Sequence[str]]) -> List[str]:
+    """
+    Colonnes numériques à lire : toutes, ou la projection demandée (ordre du
+    fichier) plus VALIDITY_COLUMNS.
+    """
+    numeric_cols = [c for c in headers if c != "date"]
+    if columns is None:
+        return numeric_cols
+    wanted = set(columns) | set(VALIDITY_COLUMNS)
+    return [c for c in numeric_cols if c in wanted]
+
+
+def load_hourly_dataframe_bulk(
+    source: memoryview,
+    headers: List[str],
+    units: List[str],
+    data_offset: int,
+    columns: Optional[Sequence[str]] = None,
+) -> Optional[Tuple[pd.DataFrame, Dict[str, str]]]:
+    """
+    Lecture vectorisée de la table : le tampon brut est passé tel quel au
+    lecteur C de pandas (décimale native, colonnes float typées, dates au
+    format fixe). Seules `columns` (+ date) sont converties si fourni.
+    Retourne None si le fichier doit passer par le chemin lent.
+    """
+    if "E_Grid" not in headers:
+        raise ValueError("Colonne obligatoire 'E_Grid' absente.")
+
+    numeric_cols = _project_columns(headers, columns)
+
+    try:
+        df = pd.read_csv(**_read_csv_kwargs(source, headers, data_offset, numeric_cols))
+    except (ValueError, pd.errors.ParserError):
+        return None
+
+    df["date"] = pd.to_datetime(df["date"], format=PVSYST_DATE_FMT, errors="coerce")
+    df = df.dropna(subset=["date"])
+
+    return _finalize_hourly_dataframe(df, headers, units)
+
+
+def _read_csv_kwargs(view: memoryview, headers: List[str], data_offset: int, numeric_cols: List[str]) -> dict:
+    """
+    Arguments de pd.read_csv (moteur C) pour la table qui commence à
+    data_offset : le lecteur lit la vue en place, sans copie de la source.
+    """
+    sample = bytes(view[data_offset:data_offset + _DECIMAL_SAMPLE_BYTES])
+    return dict(
+        filepath_or_buffer=buffer_reader(view[data_offset:]),
+        sep=";",
+        header=None,
+        names=headers,
+        usecols=["date", *numeric_cols],
+        index_col=False,
+        decimal=_detect_decimal(sample),
+        dtype={"date": str, **{c: "float64" for c in numeric_cols}},
+        encoding="latin-1",
+        engine="c",
+    )
+
+
+def iter_hourly_chunks(
+    source: BufferSource,
+    headers: List[str],
+    data_offset: int,
+    columns: Sequence[str],
+    chunk_rows: int,
+) -> Iterator[pd.DataFrame]:
+    """
+    Mode flux : la table est lue par blocs de `chunk_rows` lignes (moteur C),
+    chaque bloc est rendu indexé par date (lignes sans date exclues), dans
+    l'ordre du fichier. Seules `columns` (+ date) sont converties.
+    Lève ValueError / ParserError si le fichier relève du chemin lent.
+    """
+    numeric_cols = _project_columns(headers, columns)
+    with source_buffer(source) as view:
+        reader = pd.read_csv(**_read_csv_kwargs(view, headers, data_offset, numeric_cols), chunksize=chunk_rows)
+        with reader:
+            for chunk in reader:
+                chunk["date"] = pd.to_datetime(chunk["date"], format=PVSYST_DATE_FMT, errors="coerce")
+                yield chunk.dropna(subset=["date"]).set_index("date")
+
+
+def read_hourly_from_bytes(
+    source: BufferSource,
+    columns: Optional[Sequence[str]] = None,
+    source_key: Optional[str] = None,
+) -> tuple[dict, pd.DataFrame, dict]:
+    """
+    `source` : octets, memoryview, fichier uploadé (BytesIO) ou chemin
+    (mappé en mémoire) — jamais recopié avant le parseur.
+
+    `columns` : projection optionnelle (la colonne 'date' et 'E_Grid' sont
+    toujours lues). Les autres colonnes restent disponibles via
+    load_hourly_columns ; units_map décrit toujours l'ensemble du fichier.
+
+    Le résultat est mis en cache sur disque (clé = contenu + options) :
+    un fichier déjà lu n'est ni décodé ni re-parsé. `source_key` : empreinte
+    SHA-256 du contenu si l'appelant l'a déjà calculée (pas de second hachage).
+    """
+    if columns is not None:
+        columns = ["E_Grid", *columns]
+
+    with source_buffer(source) as view:
+        if not cache_enabled():
+            return _parse_hourly_bytes(view, columns)
+
+        key = cache_key(
+            view,
+            "hourly",
+            source_key=source_key,
+            date_fmt=PVSYST_DATE_FMT,
+            columns=None if columns is None else sorted(set(columns)),
+        )
+        hit = load_frame(key)
+        if hit is not None:
+            return hit.meta["general_info"], hit.df, hit.meta["units_map"]
+
+        general_info, df, units_map = _parse_hourly_bytes(view, columns)
+
+    store_frame(key, df, {"general_info": general_info, "units_map": units_map})
+    return general_info, df, units_map
+
+
+def _parse_hourly_bytes(
+    source: memoryview,
+    columns: Optional[Sequence[str]],
+) -> tuple[dict, pd.DataFrame, dict]:
+    located = locate_table(source)
+    if located is not None:
+        preamble, headers, units, data_offset = located
+        parsed = load_hourly_dataframe_bulk(source, headers, units, data_offset, columns=columns)
+        if parsed is not None:
+            df, units_map = parsed
+            return parse_general_info(preamble), df, units_map
+
+    # Secours : découpage ligne à ligne en Python
     text = _decode_bytes(source)
     lines = text.splitlines()
     general_info = parse_general_info(lines)
     df, units_map = load_hourly_dataframe(lines)
+    if columns is not None:
+        df = df[_project_columns(["date", *df.columns], columns)]
     return general_info, df, units_map
+
+
+def load_hourly_columns(
+    source: BufferSource,
+    columns: Sequence[str],
+    source_key: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Chargement à la demande de colonnes non projetées lors de la lecture
+    initiale (ex. feuille Excel « Données horaires »). Les lignes sont dans
+    le même ordre que le DataFrame de read_hourly_from_bytes.
+    """
+    _, df, _ = read_hourly_from_bytes(source, columns=columns, source_key=source_key)
+    wanted = set(columns)
+    return df[[c for c in df.columns if c in wanted]]
@@ -1,10 +1,71 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
 import pandas as pd
 
+from utils.pyramid import MinMaxPyramid, build_minmax_pyramid
+
+
+ColumnLoader = Callable[[List[str]], pd.DataFrame]
+
+# Codes saison (HourlyFeatures.season) -> libellé
+SEASON_LABELS = ("Hiver", "Printemps", "Été", "Automne")
+_SEASON_CODE_BY_MONTH = np.array([-1, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)
+
+
+def _read_only(a: np.ndarray) -> np.ndarray:
+    a = a.view()
+    a.flags.writeable = False
+    return a
+
+
+class HourlyFeatures:
+    """
+    Tableaux dérivés de df_raw, calculés à la première demande puis partagés
+    par toutes les analyses (lecture seule, sans copie du DataFrame).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        self._columns: Dict[str, np.ndarray] = {}
+        self._pyramids: Dict[str, MinMaxPyramid] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        """Colonne numérique en float64 (vue sur le bloc pandas si possible)."""
+        if name not in self._columns:
+            self._columns[name] = _read_only(self._df[name].to_numpy(dtype=float))
+        return self._columns[name]
+
+    def pyramid(self, name: str) -> MinMaxPyramid:
+        """Pyramide min/max de la colonne (graphes zoomables), construite une fois."""
+        if name not in self._pyramids:
+            self._pyramids[name] = build_minmax_pyramid(self._df.index, self.column(name))
+        return self._pyramids[name]
+
+    @cached_property
+    def month(self) -> np.ndarray:
+        """Mois 1..12 (int8)."""
+        return _read_only(np.asarray(self._df.index.month, dtype=np.int8))
+
+    @cached_property
+    def season(self) -> np.ndarray:
+        """Code saison (index dans SEASON_LABELS)."""
+        return _read_only(_SEASON_CODE_BY_MONTH[self.month])
+
+    @cached_property
+    def hour(self) -> np.ndarray:
+        """Heure de la journée 0..23 (int8)."""
+        return _read_only(np.asarray(self._df.index.hour, dtype=np.int8))
+
+    @cached_property
+    def production_mask(self) -> np.ndarray:
+        """E_Grid > 0 (heures de production)."""
+        return _read_only(self.column("E_Grid") > 0)
+
 
 @dataclass
 class AnalysisOptions:
@@ -20,3 +81,32 @@ class AnalysisContext:
 
     options: AnalysisOptions
     results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)  # durée (s) par analyse
+
+    # Colonnes présentes dans le fichier source (df_raw peut n'en contenir
+    # qu'une projection) et chargeur des colonnes manquantes à la demande.
+    available_columns: List[str] = field(default_factory=list)
+    column_loader: Optional[ColumnLoader] = None
+
+    # Mode flux (gros fichiers) : résultats issus des accumulateurs, df_raw
+    # ne contient que l'enveloppe min/max horaire de E_Grid (graphe).
+    streamed: bool = False
+
+    @cached_property
+    def features(self) -> HourlyFeatures:
+        return HourlyFeatures(self.df_raw)
+
+    def full_dataframe_available(self) -> bool:
+        """Faux si des colonnes manquent et que leur source n'est plus lisible."""
+        missing = any(c not in self.df_raw.columns for c in self.available_columns)
+        return not missing or getattr(self.column_loader, "available", True)
+
+    def load_full_dataframe(self) -> pd.DataFrame:
+        """df_raw complété des colonnes non chargées, dans l'ordre du fichier."""
+        missing = [c for c in self.available_columns if c not in self.df_raw.columns]
+        if not missing or self.column_loader is None:
+            return self.df_raw
+
+        extra = self.column_loader(missing).set_axis(self.df_raw.index)
+        full = pd.concat([self.df_raw, extra], axis=1)
+        return full[[c for c in self.available_columns if c in full.columns]]
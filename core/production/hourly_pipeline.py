@@ -1,59 +1,288 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+import tempfile
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence
 
-from config import OUTPUTS_DIR, OUTPUT_MODE
+from config import (
+    HOURLY_EXCEL_RAW_DATA,
+    HOURLY_PDF_VECTOR_CHARTS,
+    HOURLY_STREAMING_MIN_MB,
+    OUTPUTS_DIR,
+    OUTPUT_MODE,
+    REPORT_WORKERS,
+    STAGE_MEMO_MAX_ENTRIES,
+    STAGE_MEMO_MAX_MB,
+)
+from utils.artifacts import LazyArtifact
+from utils.io import BufferSource, source_buffer
+from utils.memo import StageMemo, content_hash
+from utils.parse_cache import pin_source, spool_source, unpin_source
 from utils.paths import make_run_folders
 
-from .hourly_io import read_hourly_from_bytes
+from .hourly_io import read_hourly_from_bytes, load_hourly_columns
 from .hourly_models import AnalysisContext, AnalysisOptions
-from .hourly_analyzer import register_analyses, run_all_analyses
+from .hourly_analyzer import analysis_keys, required_columns, run_all_analyses
 from .hourly_export_excel import export_excel
 from .hourly_export_pdf import export_pdf
+from .hourly_stream import stream_hourly_base
+
+
+# Mémoïsation des étapes : clé = hash du contenu + options lues par l'étape
+_STAGE_MEMO = StageMemo(max_entries=STAGE_MEMO_MAX_ENTRIES, max_bytes=STAGE_MEMO_MAX_MB * 1024 * 1024)
+
+# Génération des rapports en arrière-plan : le rendu n'utilise plus
+# matplotlib.pyplot (API Figure/Agg), Excel et PDF peuvent donc être
+# construits en parallèle, y compris pour plusieurs sessions.
+_REPORT_WORKER = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="hourly-reports")
 
 
 @dataclass
 class HourlyAnalysisResult:
     context: AnalysisContext
-    excel_bytes: bytes
-    pdf_bytes: bytes
+    excel: LazyArtifact
+    pdf: LazyArtifact
     run_dir: Path
+    cache_hits: Dict[str, bool] = field(default_factory=dict)  # étape -> résultat réutilisé
+    raw_data: str = "none"  # feuille « Données horaires » dans l'Excel ("sheet" | "none")
 
+    # Les rapports ne sont construits qu'au premier accès
+    @property
+    def excel_bytes(self) -> bytes:
+        return self.excel.get()
 
-def analyze_hourly_source(*, source: bytes, source_name: str, threshold_kw: float) -> HourlyAnalysisResult:
-    runpaths = make_run_folders(OUTPUTS_DIR, tool_name="hourly_results", mode=OUTPUT_MODE)
+    @property
+    def pdf_bytes(self) -> bytes:
+        return self.pdf.get()
 
-    general_info, df, units_map = read_hourly_from_bytes(source)
+    @property
+    def excel_available(self) -> bool:
+        """Faux si l'Excel, pas encore construit, a besoin d'une source qui n'est plus disponible."""
+        if self.excel.ready or self.raw_data != "sheet":
+            return True
+        return self.context.full_dataframe_available()
 
-    # Sauvegarde du fichier source dans le run (trace)
-    input_path = runpaths.run_dir / source_name
+
+def _report_artifact(key: tuple, path: Path, build: Callable[[AnalysisContext, Path], None], context: AnalysisContext) -> tuple[LazyArtifact, bool]:
+    """Rapport mémoïsé ; en cas de hit, les octets sont simplement réécrits dans le run."""
+    hit, data = _STAGE_MEMO.get(key)
+    if hit:
+        _publish(path, data)
+        return LazyArtifact.from_bytes(data), True
+
+    return LazyArtifact(partial(_build_report, key, path, build, context)), False
+
+
+def _build_report(key: tuple, path: Path, build: Callable[[AnalysisContext, Path], None], context: AnalysisContext) -> bytes:
+    # fonction de module (et non closure) : un rapport non encore construit
+    # reste sérialisable (déchargement des résultats de session sur disque)
+    #
+    # Chaque construction écrit dans son propre fichier temporaire : en mode
+    # "latest", deux constructions concurrentes visent le même chemin, et
+    # relire ce chemin pourrait rendre (et mémoïser) le rapport de l'autre.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}_", suffix=path.suffix)
+    os.close(fd)
+    tmp_path = Path(tmp)
     try:
-        input_path.write_bytes(source)
+        build(context, tmp_path)
+        out = tmp_path.read_bytes()
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    _STAGE_MEMO.put(key, out)
+    _publish(path, out)
+    return out
+
+
+def _publish(path: Path, data: bytes) -> None:
+    """Copie du rapport dans le run (remplacement atomique, non bloquant)."""
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}_", suffix=path.suffix)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
     except Exception:
         # non bloquant
-        pass
+        if tmp is not None:
+            Path(tmp).unlink(missing_ok=True)
+
+
+class _SpooledColumns:
+    """
+    Chargeur des colonnes non projetées depuis la copie de la source dans
+    le spool (adressée par son contenu) : un résultat mis en cache ne
+    retient pas le fichier uploadé de la session.
+
+    L'entrée du spool est épinglée (pas d'éviction LRU) tant que le
+    chargeur est vivant, et de nouveau après réhydratation d'un résultat
+    déchargé sur disque. Si elle a été évincée entre-temps, elle est
+    recréée depuis la copie du run si celle-ci a toujours le même contenu.
+    """
+
+    def __init__(self, path: Path, source_key: str, run_copy: Path):
+        self.path = Path(path)
+        self.source_key = source_key
+        self.run_copy = Path(run_copy)
+        pin_source(self.path)
+        weakref.finalize(self, unpin_source, self.path)
+
+    def __reduce__(self):
+        return (_SpooledColumns, (self.path, self.source_key, self.run_copy))
+
+    @property
+    def available(self) -> bool:
+        return self.path.exists() or self._respool()
 
+    def _respool(self) -> bool:
+        try:
+            with source_buffer(self.run_copy) as view:
+                if content_hash(view) != self.source_key:
+                    return False  # mode "latest" : écrasée par un autre fichier
+                return spool_source(view, self.source_key) is not None
+        except OSError:
+            return False
+
+    def __call__(self, columns: Sequence[str]):
+        if not self.available:
+            raise ValueError("Fichier source de l'analyse plus disponible — relancez l'analyse.")
+        return load_hourly_columns(self.path, columns, source_key=self.source_key)
+
+
+def _column_loader(source: BufferSource, source_key: str, run_copy: Path) -> Callable:
+    with source_buffer(source) as view:
+        spooled = spool_source(view, source_key)
+        if spooled is None:
+            # copie disque impossible : octets en mémoire (comptés par estimate_size)
+            return partial(load_hourly_columns, bytes(view), source_key=source_key)
+    return _SpooledColumns(spooled, source_key, run_copy)
+
+
+def analyze_hourly_source(
+    *,
+    source: BufferSource,
+    source_name: str,
+    threshold_kw: float,
+    prebuild_reports: bool = True,
+    streaming: Optional[bool] = None,
+    source_key: Optional[str] = None,
+) -> HourlyAnalysisResult:
+    """
+    Lecture + analyses (synchrones), puis rapports Excel/PDF sous forme de
+    LazyArtifact : construits au premier téléchargement, ou dès maintenant
+    en arrière-plan si prebuild_reports.
+
+    streaming : lecture par blocs dans des accumulateurs (mémoire bornée,
+    pas de balayage de seuil ni de feuille « Données horaires ») ; par
+    défaut à partir de HOURLY_STREAMING_MIN_MB.
+
+    `source` : octets, fichier uploadé (BytesIO), memoryview ou chemin ;
+    lu en place (pas de copie intermédiaire avant le parseur).
+    `source_key` : empreinte SHA-256 du contenu (utils.memo.content_hash)
+    si l'appelant l'a déjà calculée ; sinon calculée ici, une seule fois.
+    """
+    runpaths = make_run_folders(OUTPUTS_DIR, tool_name="hourly_results", mode=OUTPUT_MODE)
+    with source_buffer(source) as view:
+        source_key = source_key or content_hash(view)
+        source_size = view.nbytes
+    cache_hits: Dict[str, bool] = {}
+
+    # Seules les colonnes utilisées par les analyses sont lues ici ;
+    # le reste est chargé à la demande (export « Données horaires »).
+    columns = required_columns()
+
+    if streaming is None:
+        streaming = source_size >= HOURLY_STREAMING_MIN_MB * 1024 * 1024
+    streamed = None
+    if streaming:
+        # lecture + analyses indépendantes du seuil (une fois par fichier),
+        # puis tableaux de seuil relus depuis le spool E_Grid
+        base, cache_hits["stream"] = _STAGE_MEMO.get_or_compute(
+            ("stream", source_key, tuple(columns)),
+            lambda: stream_hourly_base(source, columns),
+        )
+        if base is not None:
+            streamed, cache_hits["stream_threshold"] = _STAGE_MEMO.get_or_compute(
+                ("stream_threshold", source_key, tuple(columns), float(threshold_kw)),
+                lambda: base.with_threshold(threshold_kw),
+            )
+
+    if streamed is None:
+        (general_info, df, units_map), cache_hits["parse"] = _STAGE_MEMO.get_or_compute(
+            ("parse", source_key, tuple(columns)),
+            lambda: read_hourly_from_bytes(source, columns=columns, source_key=source_key),
+        )
+    else:
+        general_info, df, units_map = streamed.general_info, streamed.envelope, streamed.units_map
+
+    # Sauvegarde du fichier source dans le run (trace)
+    input_path = runpaths.run_dir / source_name
+    source_written_key = ("source", source_key, str(input_path))
+    cache_hits["source"] = _STAGE_MEMO.get(source_written_key)[0] and input_path.exists()
+    if not cache_hits["source"]:
+        try:
+            with source_buffer(source) as view:
+                input_path.write_bytes(view)
+            _STAGE_MEMO.put(source_written_key, True)
+        except Exception:
+            # non bloquant
+            pass
+
+    options = AnalysisOptions(threshold_kw=float(threshold_kw))
     context = AnalysisContext(
         input_file=input_path,
         general_info=general_info,
         units_map=units_map,
         df_raw=df,
-        options=AnalysisOptions(threshold_kw=float(threshold_kw)),
+        options=options,
+        available_columns=[c for c in units_map if c != "date"],
+        column_loader=None if streamed is not None else _column_loader(source, source_key, input_path),
+        streamed=streamed is not None,
     )
 
-    register_analyses()
-    run_all_analyses(context)
+    if streamed is None:
+        analysis_hits = run_all_analyses(context, memo=_STAGE_MEMO, source_key=source_key)
+        cache_hits.update({f"analysis:{aid}": hit for aid, hit in analysis_hits.items()})
+    else:
+        context.results.update(streamed.results)
+
+    # Les rapports lisent tous les résultats : clé = clés de toutes les analyses
+    results_key = (source_key, source_name, context.streamed, tuple(sorted(analysis_keys(source_key, options).values())))
 
     excel_path = runpaths.reports_dir / "hourly_results_analysis.xlsx"
     pdf_path = runpaths.reports_dir / "hourly_results_analysis.pdf"
 
-    export_excel(context, excel_path)
-    export_pdf(context, pdf_path)
+    # En mode flux, les données horaires ne sont pas en mémoire (et
+    # dépasseraient souvent la limite de lignes d'une feuille Excel)
+    raw_data = "none" if context.streamed else HOURLY_EXCEL_RAW_DATA
+    excel, cache_hits["excel"] = _report_artifact(
+        ("excel", raw_data, *results_key),
+        excel_path,
+        partial(export_excel, raw_data=raw_data),
+        context,
+    )
+    pdf, cache_hits["pdf"] = _report_artifact(
+        ("pdf", HOURLY_PDF_VECTOR_CHARTS, *results_key),
+        pdf_path,
+        partial(export_pdf, vector_charts=HOURLY_PDF_VECTOR_CHARTS),
+        context,
+    )
+
+    if prebuild_reports:
+        excel.start(_REPORT_WORKER)
+        pdf.start(_REPORT_WORKER)
 
     return HourlyAnalysisResult(
         context=context,
-        excel_bytes=excel_path.read_bytes(),
-        pdf_bytes=pdf_path.read_bytes(),
+        excel=excel,
+        pdf=pdf,
         run_dir=runpaths.run_dir,
+        cache_hits=cache_hits,
+        raw_data=raw_data,
     )
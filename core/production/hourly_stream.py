@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import HOURLY_STREAM_CHUNK_ROWS
+from utils.io import BufferSource, source_buffer
+from utils.pyramid import MinMaxEnvelope
+
+from .hourly_io import check_valid_rows, count_valid_rows, iter_hourly_chunks, locate_table, parse_general_info
+from .hourly_analyzer import (
+    CLIPPING_COLUMNS,
+    POWER_CLASS_LABELS,
+    clipping_result,
+    clipping_unavailable,
+    power_class_codes,
+    power_distribution_result,
+    threshold_tables_from_breakdown,
+)
+
+
+# =========================================================
+# ACCUMULATEURS (mode flux)
+# =========================================================
+# Chaque accumulateur reçoit les blocs successifs du fichier (update) et ne
+# garde que des sommes par mois / par classe : mémoire constante quelle que
+# soit la longueur du fichier. Les tableaux par mois sont indexés 0..12
+# (comme np.bincount sur les mois 1..12).
+
+def _zeros(dtype=float) -> np.ndarray:
+    return np.zeros(13, dtype=dtype)
+
+
+@dataclass
+class ThresholdAccumulator:
+    """Heures de production / heures et énergie au-dessus du seuil, par mois."""
+    threshold_kw: float
+    hours_prod: np.ndarray = field(default_factory=lambda: _zeros(np.int64))
+    hours_above: np.ndarray = field(default_factory=lambda: _zeros(np.int64))
+    energy_above: np.ndarray = field(default_factory=_zeros)
+
+    def update(self, p: np.ndarray, months: np.ndarray) -> None:
+        above = p > self.threshold_kw  # NaN exclus, comme dans l'index trié
+        self.hours_prod += np.bincount(months[p > 0], minlength=13)
+        self.hours_above += np.bincount(months[above], minlength=13)
+        self.energy_above += np.bincount(months[above], weights=p[above], minlength=13)
+
+    def result(self) -> Dict[str, Any]:
+        t = float(self.threshold_kw)
+        hours_prod = int(self.hours_prod.sum())
+        hours_above = int(self.hours_above.sum())
+        energy = float(self.energy_above.sum())
+
+        summary = {
+            "threshold_kw": t,
+            "hours_prod": hours_prod,
+            "hours_above": hours_above,
+            "pct_above_prod_time": 100.0 * hours_above / hours_prod if hours_prod > 0 else 0.0,
+            "energy_kwh": energy,
+            "curtailed_kwh": energy - t * hours_above,
+        }
+        by_month = pd.DataFrame({
+            "month": np.arange(1, 13),
+            "hours_prod": self.hours_prod[1:],
+            "hours_above": self.hours_above[1:],
+            "energy_kwh": self.energy_above[1:],
+            "curtailed_kwh": self.energy_above[1:] - t * self.hours_above[1:],
+        })
+        return threshold_tables_from_breakdown(summary, by_month)
+
+
+class PowerSpool:
+    """
+    E_Grid et mois de chaque ligne, écrits dans des fichiers temporaires
+    (9 octets par ligne, hors mémoire) puis relus par blocs, sans relire le
+    CSV : pour la distribution de puissance (classes relatives à p_max,
+    connu seulement en fin de lecture) et pour les tableaux de seuil (un
+    nouveau seuil ne relit que ce spool).
+    Les fichiers sont supprimés à la fermeture (close) ou à la libération.
+    """
+
+    def __init__(self, block_values: int = HOURLY_STREAM_CHUNK_ROWS):
+        self.p_max = 0.0
+        self.n = 0
+        self._block = block_values
+        self._p = tempfile.TemporaryFile()
+        self._months = tempfile.TemporaryFile()
+        self._lock = threading.Lock()  # relu par plusieurs sessions (mémo)
+
+    def update(self, p: np.ndarray, months: np.ndarray) -> None:
+        pos = p[p > 0]
+        if pos.size:
+            self.p_max = max(self.p_max, float(pos.max()))
+        self._p.write(p.astype(np.float64).tobytes())
+        self._months.write(months.astype(np.int8).tobytes())
+        self.n += len(p)
+
+    def blocks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """(E_Grid, mois) par blocs, dans l'ordre du fichier."""
+        for start in range(0, self.n, self._block):
+            with self._lock:
+                self._p.seek(8 * start)
+                p = np.frombuffer(self._p.read(8 * self._block), dtype=np.float64)
+                self._months.seek(start)
+                months = np.frombuffer(self._months.read(self._block), dtype=np.int8)
+            yield p, months
+
+    def close(self) -> None:
+        """Libère les fichiers temporaires (sans autre traitement)."""
+        self._p.close()
+        self._months.close()
+
+
+def power_distribution_from_spool(spool: PowerSpool) -> Optional[Dict[str, Any]]:
+    """Heures / énergie par classe de puissance (relative à p_max)."""
+    if spool.p_max <= 0:
+        return None
+
+    n = len(POWER_CLASS_LABELS)
+    hours = np.zeros(n, dtype=np.int64)
+    energy = np.zeros(n)
+    for p, _ in spool.blocks():
+        p = p[p > 0]
+        codes = power_class_codes(p, spool.p_max)
+        hours += np.bincount(codes, minlength=n)[:n]
+        energy += np.bincount(codes, weights=p, minlength=n)[:n]
+    return power_distribution_result(spool.p_max, hours, energy)
+
+
+def threshold_from_spool(spool: PowerSpool, threshold_kw: float) -> Dict[str, Any]:
+    """Tableaux de l'analyse seuil pour `threshold_kw`, depuis le spool."""
+    acc = ThresholdAccumulator(float(threshold_kw))
+    for p, months in spool.blocks():
+        acc.update(p, months)
+    return acc.result()
+
+
+@dataclass
+class ClippingAccumulator:
+    """Énergie écrêtée (IL_Pmax) et énergie potentielle, par mois."""
+    counts: np.ndarray = field(default_factory=lambda: _zeros(np.int64))
+    clipped: np.ndarray = field(default_factory=_zeros)
+    potential: np.ndarray = field(default_factory=_zeros)
+    total_clipped: float = 0.0
+    total_potential: float = 0.0
+    hours_clipping: int = 0
+
+    def update(self, e_out: np.ndarray, il_pmax: np.ndarray, months: np.ndarray) -> None:
+        mask = (e_out > 0) | (il_pmax > 0)
+        clipped = il_pmax[mask]
+        months = months[mask]
+        clipped0 = np.nan_to_num(clipped)
+        potential0 = np.nan_to_num(e_out[mask] + clipped)
+
+        self.counts += np.bincount(months, minlength=13)
+        self.clipped += np.bincount(months, weights=clipped0, minlength=13)
+        self.potential += np.bincount(months, weights=potential0, minlength=13)
+        self.total_clipped += float(clipped0.sum())
+        self.total_potential += float(potential0.sum())
+        self.hours_clipping += int((clipped > 0).sum())
+
+    def result(self) -> Dict[str, Any]:
+        if not self.counts.any():
+            return {"available": True, "empty": True}
+        return clipping_result(
+            month_counts=self.counts,
+            month_clipped=self.clipped,
+            month_potential=self.potential,
+            total_clipped=self.total_clipped,
+            total_potential=self.total_potential,
+            hours_clipping=self.hours_clipping,
+        )
+
+
+# =========================================================
+# LECTURE EN FLUX
+# =========================================================
+
+@dataclass
+class StreamedHourly:
+    """
+    Résultat du mode flux : mêmes résultats d'analyses que le chemin en
+    mémoire (sans index de seuil, donc sans balayage), plus l'enveloppe
+    min/max horaire de E_Grid pour le graphe temporel.
+
+    Sans seuil (stream_hourly_base), `results` ne contient que les analyses
+    qui n'en dépendent pas et `spool` permet d'ajouter les tableaux de seuil
+    (with_threshold) sans relire le fichier.
+    """
+    general_info: Dict[str, str]
+    units_map: Dict[str, str]
+    available_columns: List[str]
+    results: Dict[str, Any]
+    envelope: pd.DataFrame
+    n_rows: int
+    spool: Optional[PowerSpool] = None
+
+    def with_threshold(self, threshold_kw: float) -> "StreamedHourly":
+        return StreamedHourly(
+            general_info=self.general_info,
+            units_map=self.units_map,
+            available_columns=self.available_columns,
+            results={**self.results, "threshold": threshold_from_spool(self.spool, threshold_kw)},
+            envelope=self.envelope,
+            n_rows=self.n_rows,
+        )
+
+
+def stream_hourly_analyses(
+    source: BufferSource,
+    threshold_kw: float,
+    columns: List[str],
+    chunk_rows: int = HOURLY_STREAM_CHUNK_ROWS,
+) -> Optional[StreamedHourly]:
+    """Lecture en flux (stream_hourly_base) puis tableaux de seuil."""
+    base = stream_hourly_base(source, columns, chunk_rows)
+    return None if base is None else base.with_threshold(threshold_kw)
+
+
+def stream_hourly_base(
+    source: BufferSource,
+    columns: List[str],
+    chunk_rows: int = HOURLY_STREAM_CHUNK_ROWS,
+) -> Optional[StreamedHourly]:
+    """
+    Analyses écrêtage / distribution de puissance en lisant le fichier par
+    blocs : seuls les accumulateurs, l'enveloppe horaire de E_Grid et le
+    spool E_Grid (sur disque) sont gardés (une seule lecture du fichier).
+    Indépendant du seuil : mémoïsé à part, un nouveau seuil ne relit que
+    le spool.
+
+    Retourne None si le fichier doit passer par le chemin en mémoire
+    (table introuvable ou refusée par le lecteur C).
+    """
+    with source_buffer(source) as view:
+        located = locate_table(view)
+    if located is None:
+        return None
+    preamble, headers, units, data_offset = located
+
+    if "E_Grid" not in headers:
+        raise ValueError("Colonne obligatoire 'E_Grid' absente.")
+
+    units_map = dict(zip(headers, units))
+    available = [c for c in units_map if c != "date"]
+    clipping_missing = clipping_unavailable(available)
+
+    spool = PowerSpool(chunk_rows)
+    clipping = ClippingAccumulator()
+    envelope = MinMaxEnvelope()
+    n_rows = n_valid = 0
+
+    try:
+        for chunk in iter_hourly_chunks(source, headers, data_offset, columns, chunk_rows):
+            months = np.asarray(chunk.index.month, dtype=np.int8)
+            p = chunk["E_Grid"].to_numpy(dtype=float)
+
+            n_rows += len(chunk)
+            n_valid += count_valid_rows(chunk)
+
+            spool.update(p, months)
+            envelope.update(chunk.index, p)
+            if clipping_missing is None:
+                clipping.update(*(chunk[c].to_numpy(dtype=float) for c in CLIPPING_COLUMNS), months)
+    except (ValueError, pd.errors.ParserError):
+        spool.close()
+        return None
+
+    try:
+        check_valid_rows(n_valid, n_rows)
+    except ValueError:
+        spool.close()
+        raise
+
+    x, y = envelope.points()
+    return StreamedHourly(
+        general_info=parse_general_info(preamble),
+        units_map=units_map,
+        available_columns=available,
+        results={
+            "power_distribution": power_distribution_from_spool(spool),
+            "inverter_clipping": clipping_missing or clipping.result(),
+        },
+        envelope=pd.DataFrame({"E_Grid": y}, index=pd.DatetimeIndex(x, name="date")),
+        n_rows=n_rows,
+        spool=spool,
+    )
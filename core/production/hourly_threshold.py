@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from utils.binning import Histogram, histogram_from_sorted
+
+
+Thresholds = Union[float, np.ndarray, list]
+
+
+@dataclass(frozen=True)
+class ThresholdIndex:
+    """
+    Index précalculé sur E_Grid pour répondre à « heures / énergie / énergie
+    écrêtée au-dessus d'un seuil » en O(log n), pour un ou plusieurs seuils.
+
+    - values / suffix : E_Grid trié (croissant) et sommes cumulées depuis la fin
+      (suffix[i] = somme de values[i:]), NaN exclus
+    - month_values : même chose par tranche mensuelle,
+      month_offsets[m-1]:month_offsets[m] délimitant le mois m
+    - month_suffix : sommes depuis la fin de chaque mois, un segment par mois
+      terminé par 0 (le mois m, 1..12, est décalé de m - 1 positions)
+    """
+    values: np.ndarray
+    suffix: np.ndarray
+    month_values: np.ndarray
+    month_suffix: np.ndarray
+    month_offsets: np.ndarray
+
+    @property
+    def p_max(self) -> float:
+        return float(self.values[-1]) if len(self.values) else 0.0
+
+    # -----------------------------------------------------
+    # Requêtes globales
+    # -----------------------------------------------------
+
+    def _cut(self, thresholds: Thresholds) -> tuple[np.ndarray, np.ndarray]:
+        t = np.atleast_1d(np.asarray(thresholds, dtype=float))
+        return t, np.searchsorted(self.values, t, side="right")
+
+    def hours_above(self, thresholds: Thresholds) -> np.ndarray:
+        _, idx = self._cut(thresholds)
+        return len(self.values) - idx
+
+    def energy_above(self, thresholds: Thresholds) -> np.ndarray:
+        _, idx = self._cut(thresholds)
+        return self.suffix[idx]
+
+    def curtailed_energy(self, thresholds: Thresholds) -> np.ndarray:
+        """Somme de max(P - seuil, 0) : énergie perdue si la puissance était plafonnée au seuil."""
+        t, idx = self._cut(thresholds)
+        return self.suffix[idx] - t * (len(self.values) - idx)
+
+    # -----------------------------------------------------
+    # Requêtes mensuelles
+    # -----------------------------------------------------
+
+    def monthly(self, thresholds: Thresholds) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(heures, énergie, énergie écrêtée) au-dessus de chaque seuil, shape (k, 12)."""
+        t = np.atleast_1d(np.asarray(thresholds, dtype=float))
+        hours = np.zeros((len(t), 12), dtype=np.int64)
+        energy = np.zeros((len(t), 12), dtype=float)
+
+        for m in range(12):
+            a, b = self.month_offsets[m], self.month_offsets[m + 1]
+            idx = a + np.searchsorted(self.month_values[a:b], t, side="right")
+            hours[:, m] = b - idx
+            energy[:, m] = self.month_suffix[idx + m]
+
+        curtailed = energy - t[:, None] * hours
+        return hours, energy, curtailed
+
+    def monthly_breakdown(self, threshold: float, prod_threshold: float = 0.0) -> pd.DataFrame:
+        """Tableau 12 lignes (month, hours_prod, hours_above, energy_kwh, curtailed_kwh)."""
+        hours, energy, curtailed = self.monthly([threshold, prod_threshold])
+        return pd.DataFrame({
+            "month": np.arange(1, 13),
+            "hours_prod": hours[1],
+            "hours_above": hours[0],
+            "energy_kwh": energy[0],
+            "curtailed_kwh": curtailed[0],
+        })
+
+    # -----------------------------------------------------
+    # Balayage
+    # -----------------------------------------------------
+
+    def sweep(self, thresholds: Thresholds, prod_threshold: float = 0.0) -> pd.DataFrame:
+        """Courbes heures / énergie / énergie écrêtée pour des milliers de seuils d'un coup."""
+        t, idx = self._cut(thresholds)
+        n = len(self.values)
+        hours = n - idx
+        energy = self.suffix[idx]
+        hours_prod = int(self.hours_above(prod_threshold)[0])
+
+        return pd.DataFrame({
+            "threshold_kw": t,
+            "hours_above": hours,
+            "energy_kwh": energy,
+            "curtailed_kwh": energy - t * hours,
+            "pct_above_prod_time": 100.0 * hours / hours_prod if hours_prod > 0 else np.zeros(len(t)),
+        })
+
+
+    # -----------------------------------------------------
+    # Histogramme
+    # -----------------------------------------------------
+
+    def histogram(self, nbins: int = 60, prod_threshold: float = 0.0) -> Histogram:
+        """Histogramme de E_Grid sur les heures de production, en O(nbins log n) (valeurs déjà triées)."""
+        start = np.searchsorted(self.values, prod_threshold, side="right")
+        return histogram_from_sorted(self.values[start:], nbins)
+
+
+def _suffix_sums(sorted_values: np.ndarray) -> np.ndarray:
+    # somme depuis la fin : pas de soustraction de grands nombres pour les petits restes
+    out = np.zeros(len(sorted_values) + 1, dtype=float)
+    out[:-1] = np.cumsum(sorted_values[::-1])[::-1]
+    return out
+
+
+def _month_suffix_sums(month_values: np.ndarray, month_offsets: np.ndarray) -> np.ndarray:
+    # un segment par mois (len + 1, terminé par 0) : pas de différence entre
+    # deux grandes sommes pour l'énergie d'un mois
+    out = np.zeros(len(month_values) + 12, dtype=float)
+    for m in range(12):
+        a, b = month_offsets[m], month_offsets[m + 1]
+        out[a + m:b + m + 1] = _suffix_sums(month_values[a:b])
+    return out
+
+
+def build_threshold_index(values: np.ndarray, months: np.ndarray) -> ThresholdIndex:
+    """
+    Construit l'index (tri + sommes cumulées) en O(n log n), une fois par jeu
+    de données. `values` : E_Grid ; `months` : mois 1..12 de chaque ligne.
+    """
+    valid = ~np.isnan(values)
+    p = values[valid]
+    months = months[valid]
+
+    sorted_values = np.sort(p)
+
+    order = np.lexsort((p, months))
+    month_values = p[order]
+    counts = np.bincount(months, minlength=13)[1:13]
+    month_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    # énergie(mois m, à partir de i) = month_suffix[i + m - 1]
+    return ThresholdIndex(
+        values=sorted_values,
+        suffix=_suffix_sums(sorted_values),
+        month_values=month_values,
+        month_suffix=_month_suffix_sums(month_values, month_offsets),
+        month_offsets=month_offsets,
+    )
@@ -0,0 +1,51 @@
+# tests/test_tmy_memory.py
+from __future__ import annotations
+
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.meteo.tmy_pvsyst as tmy_pvsyst
+from core.meteo.tmy_pvsyst import read_tmy_pvsyst
+
+
+def _tmy_1min_year() -> bytes:
+    """PVSyst TMY file, 1-min step over a full year (525 600 rows)."""
+    rng = np.random.default_rng(0)
+    idx = pd.date_range("2005-01-01", periods=525_600, freq="min")
+    hour = idx.hour.to_numpy() + idx.minute.to_numpy() / 60
+    sun = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None)
+    ghi = sun * 1000 * rng.uniform(0.2, 1.0, len(idx))
+    body = pd.DataFrame({
+        "YEAR": idx.year, "MONTH": idx.month, "DAY": idx.day, "HOUR": idx.hour,
+        "GHI": ghi.round(1), "DHI": (ghi * 0.3).round(1), "DNI": (ghi * 0.8).round(1),
+        "Tamb": (15 + 10 * sun).round(1), "WindVel": rng.uniform(0, 8, len(idx)).round(1),
+        "WindDir": rng.integers(0, 360, len(idx)),
+    }).to_csv(sep=";", index=False, header=False, lineterminator="\n")
+    head = (
+        "#TMY hourly data\n#Site;Test\n#Time Step;1min\n"
+        "YEAR;MONTH;DAY;HOUR;GHI;DHI;DNI;Tamb;WindVel;WindDir\n"
+        ";;;;W/m2;W/m2;W/m2;deg.C;m/sec;°\n"
+    )
+    return (head + body).encode("utf-8")
+
+
+@pytest.mark.parametrize("resample", [True, False])
+def test_read_tmy_1min_peak_memory(monkeypatch, resample):
+    # Each normalization stage must not copy the whole frame again: the peak
+    # stays close to the raw 1-min frame (~28 MiB), not a multiple of it.
+    monkeypatch.setattr(tmy_pvsyst, "cache_enabled", lambda: False)
+    data = _tmy_1min_year()
+    read_tmy_pvsyst(data[:200_000], source_name="warmup.csv")  # imports, lazy init
+
+    tracemalloc.start()
+    try:
+        ds = read_tmy_pvsyst(data, source_name="tmy_1min.csv", resample_hourly_if_subhourly=resample)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(ds.df) == (8760 if resample else 525_600)
+    assert peak < 112 * 1024 * 1024, f"peak {peak / 2**20:.0f} MiB"
@@ -0,0 +1,55 @@
+# utils/artifacts.py
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Optional
+
+
+class LazyArtifact:
+    """
+    Report bytes built on first access (or by a background worker), then kept
+    for the lifetime of the handle. Concurrent callers share a single build.
+    """
+
+    def __init__(self, build: Callable[[], bytes]):
+        self._build: Optional[Callable[[], bytes]] = build
+        self._data: Optional[bytes] = None
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LazyArtifact":
+        art = cls(lambda: data)
+        art._data = data
+        art._build = None
+        return art
+
+    @property
+    def ready(self) -> bool:
+        return self._data is not None
+
+    def get(self) -> bytes:
+        if self._data is not None:
+            return self._data
+        with self._lock:
+            if self._data is None:
+                self._data = self._build()
+                self._build = None  # release the captured context
+        return self._data
+
+    # Picklable (session results spilled to disk): only the bytes, or the
+    # build callable if not built yet; lock / future are recreated.
+    def __getstate__(self):
+        return {"data": self._data, "build": None if self._data is not None else self._build}
+
+    def __setstate__(self, state):
+        self._data = state["data"]
+        self._build = state["build"]
+        self._lock = threading.Lock()
+        self._future = None
+
+    def start(self, executor: Executor) -> None:
+        """Build in the background; get() then waits for (or reuses) that build."""
+        if self._data is None and self._future is None:
+            self._future = executor.submit(self.get)
@@ -0,0 +1,44 @@
+# utils/binning.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Histogram:
+    """Equal-width bins: counts[i] samples in [edges[i], edges[i+1]) (last bin closed)."""
+    edges: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def centers(self) -> np.ndarray:
+        return 0.5 * (self.edges[:-1] + self.edges[1:])
+
+    @property
+    def widths(self) -> np.ndarray:
+        return np.diff(self.edges)
+
+
+def compute_histogram(values: np.ndarray, nbins: int = 60) -> Histogram:
+    """Histogram of the finite values, binned server-side in O(n)."""
+    v = np.asarray(values, dtype=float)
+    v = v[np.isfinite(v)]
+    if len(v) == 0:
+        return Histogram(edges=np.zeros(1), counts=np.zeros(0, dtype=np.int64))
+    counts, edges = np.histogram(v, bins=max(1, int(nbins)))
+    return Histogram(edges=edges, counts=counts)
+
+
+def histogram_from_sorted(sorted_values: np.ndarray, nbins: int = 60) -> Histogram:
+    """Same bins from already sorted, NaN-free values in O(bins log n)."""
+    if len(sorted_values) == 0:
+        return Histogram(edges=np.zeros(1), counts=np.zeros(0, dtype=np.int64))
+    lo, hi = float(sorted_values[0]), float(sorted_values[-1])
+    if hi <= lo:
+        lo, hi = lo - 0.5, hi + 0.5  # same convention as np.histogram
+    edges = np.linspace(lo, hi, max(1, int(nbins)) + 1)
+    pos = np.searchsorted(sorted_values, edges, side="left")
+    pos[-1] = len(sorted_values)  # last bin includes its right edge
+    return Histogram(edges=edges, counts=np.diff(pos))
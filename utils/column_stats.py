@@ -0,0 +1,135 @@
+# utils/column_stats.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ColumnStats:
+    """
+    Per-column statistics of a time series frame, computed once per frame
+    from the numeric column block (NaN skipped). Shared by the stats table,
+    the integrated energy, the quality check and the UI KPIs.
+    """
+    columns: Tuple[str, ...]
+    count: np.ndarray     # non-NaN values per column
+    n_nan: np.ndarray
+    sum: np.ndarray
+    min: np.ndarray       # NaN for an all-NaN column
+    max: np.ndarray
+    n_rows: int
+    n_nat: int            # time column
+    start: Optional[pd.Timestamp]
+    end: Optional[pd.Timestamp]
+    step_minutes: Optional[int]
+
+    @property
+    def mean(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, self.sum / np.maximum(self.count, 1), np.nan)
+
+    @property
+    def integral(self) -> np.ndarray:
+        """Sum x step in hours (e.g. W/m² -> Wh/m²); NaN if the step is unknown."""
+        if not self.step_minutes or self.step_minutes <= 0:
+            return np.full(len(self.columns), np.nan)
+        return self.sum * (self.step_minutes / 60.0)
+
+    @property
+    def total_nan(self) -> int:
+        return int(self.n_nan.sum())
+
+    def get(self, col: str) -> Optional[Dict[str, float]]:
+        """count / n_nan / sum / min / max / mean / integral of `col` (None if absent)."""
+        if col not in self.columns:
+            return None
+        j = self.columns.index(col)
+        return {
+            "count": int(self.count[j]),
+            "n_nan": int(self.n_nan[j]),
+            "sum": float(self.sum[j]),
+            "min": float(self.min[j]),
+            "max": float(self.max[j]),
+            "mean": float(self.mean[j]),
+            "integral": float(self.integral[j]),
+        }
+
+    def table(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """One row per column: count, n_nan, sum, min, max, mean, integral."""
+        cols = [c for c in (columns or self.columns) if c in self.columns]
+        idx = [self.columns.index(c) for c in cols]
+        return pd.DataFrame(
+            {
+                "count": self.count[idx],
+                "n_nan": self.n_nan[idx],
+                "sum": self.sum[idx],
+                "min": self.min[idx],
+                "max": self.max[idx],
+                "mean": self.mean[idx],
+                "integral": self.integral[idx],
+            },
+            index=pd.Index(cols),
+        )
+
+
+def compute_column_stats(
+    df: pd.DataFrame,
+    step_minutes: Optional[int] = None,
+    time_col: str = "datetime",
+) -> ColumnStats:
+    """
+    Stats of every column but `time_col`: the columns are taken as one 2-D
+    float block (a view when the frame holds a single float block) and each
+    statistic is its own vectorized reduction along the rows (NaN mask, sum,
+    fmin, fmax), i.e. a few passes over the block rather than one per column.
+    Non-numeric columns only contribute their NaN count.
+    """
+    others = [c for c in df.columns if c != time_col]
+    numeric = [c for c in others if df[c].dtype.kind in "biuf"]
+
+    n = len(df)
+    count = np.zeros(len(others), dtype=np.int64)
+    n_nan = np.zeros(len(others), dtype=np.int64)
+    sums = np.zeros(len(others))
+    mins = np.full(len(others), np.nan)
+    maxs = np.full(len(others), np.nan)
+
+    if numeric:
+        block = df[numeric].to_numpy(dtype=float)
+        nan = np.isnan(block)
+        nan_count = nan.sum(axis=0)
+        j = [others.index(c) for c in numeric]
+        n_nan[j] = nan_count
+        count[j] = n - nan_count
+        if n:
+            sums[j] = np.where(nan, 0.0, block).sum(axis=0) if nan_count.any() else block.sum(axis=0)
+            mins[j] = np.fmin.reduce(block, axis=0)  # fmin / fmax skip NaN
+            maxs[j] = np.fmax.reduce(block, axis=0)
+    for k, c in enumerate(others):
+        if c not in numeric:
+            n_nan[k] = int(df[c].isna().sum())
+            count[k] = n - n_nan[k]
+
+    n_nat, start, end = 0, None, None
+    if time_col in df.columns:
+        times = df[time_col]
+        n_nat = int(times.isna().sum())
+        start, end = times.min(), times.max()
+
+    return ColumnStats(
+        columns=tuple(others),
+        count=count,
+        n_nan=n_nan,
+        sum=sums,
+        min=mins,
+        max=maxs,
+        n_rows=n,
+        n_nat=n_nat,
+        start=start,
+        end=end,
+        step_minutes=step_minutes,
+    )
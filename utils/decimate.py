@@ -0,0 +1,142 @@
+# utils/decimate.py
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def axes_pixel_width(ax, dpi: float) -> int:
+    """Width in pixels of a matplotlib Axes once the figure is saved at `dpi`."""
+    return max(1, int(ax.get_position().width * ax.figure.get_figwidth() * dpi))
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Indices of the min and max sample of each of `n_buckets` equal-count
+    buckets (in time order), plus the first and last sample.
+
+    Drawn as a line, the result covers exactly the same vertical extent per
+    bucket as the full series, so peaks and troughs are preserved.
+    All-NaN buckets keep one NaN sample, so gaps stay visible.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return np.arange(n)
+
+    k = -(-n // n_buckets)          # samples per bucket
+    n_full = -(-n // k)             # buckets actually needed
+
+    padded = np.full(n_full * k, np.nan)
+    padded[:n] = y
+    nan = np.isnan(padded)
+
+    base = np.arange(n_full) * k
+    lo = np.where(nan, np.inf, padded).reshape(n_full, k).argmin(axis=1) + base
+    hi = np.where(nan, -np.inf, padded).reshape(n_full, k).argmax(axis=1) + base
+
+    idx = np.empty(2 * n_full + 2, dtype=np.int64)
+    idx[0] = 0
+    idx[1:-1:2] = np.minimum(lo, hi)
+    idx[2:-1:2] = np.maximum(lo, hi)
+    idx[-1] = n - 1
+    return np.unique(idx)
+
+
+def minmax_envelope(x: np.ndarray, y: np.ndarray, n_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(x, y) reduced to the per-bucket min/max envelope (see minmax_indices)."""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    idx = minmax_indices(y, n_buckets)
+    return x[idx], y[idx]
+
+
+# =========================================================
+# LARGEST-TRIANGLE-THREE-BUCKETS
+# =========================================================
+
+def _bucket_view(values: np.ndarray, k: int, fill: float) -> np.ndarray:
+    """values padded with `fill` and reshaped to (n_buckets, k)."""
+    n_b = -(-len(values) // k)
+    padded = np.full(n_b * k, fill)
+    padded[:len(values)] = values
+    return padded.reshape(n_b, k)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int, passes: int = 4) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets, vectorized.
+
+    First and last samples are kept; the interior is split into equal-count
+    buckets and, in each one, the sample forming the largest triangle with
+    the previous bucket's anchor and the next bucket's centroid is kept.
+
+    Classic LTTB anchors on the point selected in the previous bucket, which
+    makes it a sequential loop. Here the first pass anchors on the previous
+    bucket's centroid and each further pass re-anchors on the points chosen
+    by the pass before, so every pass is a handful of whole-array operations
+    (O(n), no per-bucket Python loop). Inputs must be NaN-free.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    x = x.astype(float)
+    y = np.asarray(y, dtype=float)
+
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # interior samples 1..n-2, grouped in equal-count buckets
+    k = -(-(n - 2) // (n_out - 2))
+    xi = _bucket_view(x[1:-1], k, np.nan)
+    yi = _bucket_view(y[1:-1], k, np.nan)
+    n_b = xi.shape[0]
+
+    counts = np.full(n_b, k)
+    counts[-1] = (n - 2) - k * (n_b - 1)
+    cx = np.nansum(xi, axis=1) / counts
+    cy = np.nansum(yi, axis=1) / counts
+
+    # next-bucket centroid (last bucket: the last sample)
+    nx = np.append(cx[1:], x[-1])
+    ny = np.append(cy[1:], y[-1])
+
+    # initial anchors: previous-bucket centroid (first bucket: the first sample)
+    ax_ = np.insert(cx[:-1], 0, x[0])
+    ay_ = np.insert(cy[:-1], 0, y[0])
+
+    rows = np.arange(n_b)
+    for _ in range(max(1, passes)):
+        area = np.abs(
+            (ax_[:, None] - nx[:, None]) * (yi - ay_[:, None])
+            - (ax_[:, None] - xi) * (ny[:, None] - ay_[:, None])
+        )
+        pick = np.nan_to_num(area, nan=-1.0).argmax(axis=1)
+        sx = xi[rows, pick]
+        sy = yi[rows, pick]
+        ax_ = np.insert(sx[:-1], 0, x[0])
+        ay_ = np.insert(sy[:-1], 0, y[0])
+
+    idx = np.empty(n_b + 2, dtype=np.int64)
+    idx[0] = 0
+    idx[1:-1] = 1 + rows * k + pick
+    idx[-1] = n - 1
+    return idx
+
+
+# =========================================================
+# DISPATCH
+# =========================================================
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int, method: str = "minmax") -> np.ndarray:
+    """Indices of at most ~max_points samples of (x, y), chosen by `method`."""
+    if method == "lttb":
+        return lttb_indices(x, y, max_points)
+    if method == "minmax":
+        return minmax_indices(y, max_points // 2)
+    raise ValueError(f"Unknown downsampling method: {method!r} (expected one of {DOWNSAMPLE_METHODS})")
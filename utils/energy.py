@@ -6,6 +6,7 @@ from typing import Dict, Optional, List, Tuple
 
 import pandas as pd
 
+from utils.column_stats import ColumnStats
 from utils.units import normalize_unit
 
 
@@ -38,10 +39,13 @@ def annual_irradiation(
     units_by_col: Dict[str, str],
     step_minutes: Optional[int],
     energy_unit: str = "kWh/m²",
+    column_stats: Optional[ColumnStats] = None,
 ) -> EnergySummary:
     """
     Returns annual irradiation for ghi/dni/dhi as:
       - Wh/m² or kWh/m² depending on energy_unit
+    With column_stats (same frame and timestep), the integrals of the stats
+    pass are reused instead of summing scaled copies of the columns.
     """
     warnings: List[str] = []
     if step_minutes is None or step_minutes <= 0:
@@ -56,8 +60,13 @@ def annual_irradiation(
         if col not in df.columns:
             return None
         u = units_by_col.get(col, "W/m²") or "W/m²"
-        wh_series = _to_wh_per_m2(df[col].astype(float), step_minutes, u)
-        total_wh = float(wh_series.sum(skipna=True))
+        if column_stats is not None and column_stats.step_minutes == step_minutes:
+            total_wh = column_stats.get(col)["integral"]
+            if normalize_unit(u) == "kW/m²":
+                total_wh *= 1000.0
+        else:
+            wh_series = _to_wh_per_m2(df[col].astype(float), step_minutes, u)
+            total_wh = float(wh_series.sum(skipna=True))
         if energy_unit == "kWh/m²":
             return total_wh / 1000.0
         return total_wh
@@ -0,0 +1,20 @@
+# utils/frames.py
+from __future__ import annotations
+
+import pandas as pd
+
+
+def copy_on_write() -> bool:
+    """True when pandas copy-on-write is active (always from pandas 3, opt-in on pandas 2)."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.options.mode.copy_on_write is True
+
+
+def owned_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    A frame the caller may modify without touching `df`.
+    Under copy-on-write a shallow copy is enough (columns are only
+    reallocated when written); on pandas 2 it is a full copy.
+    """
+    return df.copy(deep=not copy_on_write())
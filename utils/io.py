@@ -1,16 +1,24 @@
 # utils/io.py
 from __future__ import annotations
 
+import io
+import mmap
+from contextlib import contextmanager
 from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple, Union
+from typing import BinaryIO, Iterator, List, Tuple, Union
 
 import pandas as pd
 
 
 TextSource = Union[str, Path, bytes, BytesIO]
 
+# Anything source_buffer() can view without copying: paths (memory-mapped),
+# buffer-protocol objects (bytes, bytearray, memoryview, mmap...), BytesIO
+# (incl. Streamlit's UploadedFile) and binary file objects.
+BufferSource = Union[str, Path, bytes, bytearray, memoryview, BinaryIO]
+
 
 @dataclass(frozen=True)
 class PVSystTextBlocks:
@@ -18,6 +26,129 @@ class PVSystTextBlocks:
     body_lines: List[str]       # the rest
 
 
+# =========================================================
+# ZERO-COPY INGESTION
+# =========================================================
+
+@contextmanager
+def source_buffer(source: BufferSource) -> Iterator[memoryview]:
+    """
+    Read-only byte view of a source, without copying it:
+      - file path (str/Path): memory-mapped
+      - BytesIO / UploadedFile: view on its bytes
+      - bytes / bytearray / memoryview / any buffer-protocol object
+      - binary file object with a file descriptor: memory-mapped
+    The view is only valid inside the `with` block.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            with _map_file(f) as view:
+                yield view
+        return
+
+    if isinstance(source, BytesIO):
+        # getvalue() hands out the bytes the BytesIO was created from (no
+        # copy while unmodified); getbuffer() would un-share them (full copy)
+        with memoryview(source.getvalue()) as view:
+            yield view
+        return
+
+    try:
+        view = memoryview(source)
+    except TypeError:
+        view = None
+    if view is not None:
+        try:
+            yield view.cast("B") if view.format != "B" or view.ndim != 1 else view
+        finally:
+            view.release()
+        return
+
+    if hasattr(source, "fileno"):
+        with _map_file(source) as view:
+            yield view
+        return
+    if hasattr(source, "read"):
+        with source_buffer(source.read()) as view:
+            yield view
+        return
+    raise TypeError(f"Unsupported source type: {type(source)}")
+
+
+@contextmanager
+def _map_file(f) -> Iterator[memoryview]:
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # empty file: nothing to map
+        yield memoryview(b"")
+        return
+    view = memoryview(mm)
+    try:
+        yield view
+    finally:
+        view.release()
+        mm.close()
+
+
+def source_size(source: BufferSource) -> int:
+    """Size in bytes of a source, without reading it."""
+    if isinstance(source, (str, Path)):
+        return Path(source).stat().st_size
+    with source_buffer(source) as view:
+        return view.nbytes
+
+
+class _ViewReader(io.RawIOBase):
+    """Raw binary stream over a memoryview: parsers read from it in blocks."""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), len(self._view) - self._pos)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+def buffer_reader(view: memoryview, buffer_size: int = 1 << 20) -> io.BufferedReader:
+    """
+    Binary file object reading `view` in place, for pd.read_csv & co.:
+    only the parser's read buffer is ever copied, never the whole source.
+    """
+    return io.BufferedReader(_ViewReader(view), buffer_size=buffer_size)
+
+
+def line_end(view: memoryview, pos: int, block: int = 4096) -> int:
+    """Offset of the next b"\\n" from `pos` (or len(view))."""
+    n = len(view)
+    while pos < n:
+        chunk = bytes(view[pos:pos + block])
+        i = chunk.find(b"\n")
+        if i >= 0:
+            return pos + i
+        pos += len(chunk)
+    return n
+
+
+def iter_lines(view: memoryview, start: int = 0) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    (start, end, line) for each line of `view` from offset `start`, line
+    without its end-of-line. Only the lines actually consumed are copied:
+    use it to locate headers / table boundaries, then hand the rest of the
+    view to the parser.
+    """
+    pos, n = start, len(view)
+    while pos < n:
+        end = line_end(view, pos)
+        yield pos, end, bytes(view[pos:end]).rstrip(b"\r")
+        pos = end + 1
+
+
 def read_text_lines(source: TextSource, encoding: str = "utf-8") -> List[str]:
     """
     Read text from:
@@ -27,11 +158,10 @@ def read_text_lines(source: TextSource, encoding: str = "utf-8") -> List[str]:
     Returns a list of lines (without trailing newlines).
     """
     if isinstance(source, (str, Path)):
-        p = Path(source)
-        raw = p.read_bytes()
+        raw = Path(source).read_bytes()
     elif isinstance(source, BytesIO):
         raw = source.getvalue()
-    elif isinstance(source, (bytes, bytearray)):
+    elif isinstance(source, (bytes, bytearray, memoryview)):
         raw = bytes(source)
     else:
         raise TypeError(f"Unsupported source type: {type(source)}")
@@ -72,3 +202,17 @@ def read_delimited_from_lines(lines: List[str], sep: str) -> pd.DataFrame:
     """
     buf = "\n".join(lines).encode("utf-8", errors="ignore")
     return pd.read_csv(BytesIO(buf), sep=sep, engine="python")
+
+
+def read_delimited_from_buffer(view: memoryview, sep: str, encoding: str = "utf-8") -> pd.DataFrame:
+    """
+    Read a delimited table (header row first) straight from a byte view:
+    decoded block by block by the parser, no intermediate lines / string.
+    """
+    return pd.read_csv(
+        buffer_reader(view),
+        sep=sep,
+        engine="python",
+        encoding=encoding,
+        encoding_errors="ignore",
+    )
@@ -0,0 +1,79 @@
+# utils/memo.py
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.result_cache import estimate_size
+
+
+def content_hash(source) -> str:
+    # source: any buffer-protocol object (bytes, memoryview, mmap...)
+    return hashlib.sha256(source).hexdigest()
+
+
+class StageMemo:
+    """
+    Small thread-safe LRU memo for pipeline stages.
+    Keys must include everything the stage reads (content hash + options).
+    Bounded by entry count and, if max_bytes is set, by the estimated size
+    of the values (measured once, when they are stored).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        max_bytes: Optional[int] = None,
+        size_of: Callable[[Any], int] = estimate_size,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._size_of = size_of
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            if key not in self._data:
+                return False, None
+            self._data.move_to_end(key)
+            return True, self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._size_of(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._total -= self._sizes.pop(key, 0)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self._total += size
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._total > self.max_bytes)
+            ):
+                k, _ = self._data.popitem(last=False)
+                self._total -= self._sizes.pop(k)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (value, hit)."""
+        hit, value = self.get(key)
+        if hit:
+            return value, True
+        value = compute()
+        self.put(key, value)
+        return value, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._total = 0
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total
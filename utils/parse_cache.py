@@ -0,0 +1,228 @@
+# utils/parse_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from config import PARSE_CACHE_DIR, PARSE_CACHE_ENABLED, PARSE_CACHE_MAX_MB, SOURCE_SPOOL_DIR, SOURCE_SPOOL_MAX_MB
+
+try:  # optional: without pyarrow the cache is simply disabled
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover
+    pa = None
+    feather = None
+
+
+# Bump when the stored layout (or the parsers' output) changes.
+# 2: TMY fast path, sub-hourly offsets, timeline/step detection in the cached quality
+# 3: key derived from the source's SHA-256 digest (passed in when already known)
+_CACHE_VERSION = 3
+
+
+@dataclass(frozen=True)
+class CachedFrame:
+    df: pd.DataFrame
+    meta: Dict[str, Any]
+
+
+def cache_enabled() -> bool:
+    return PARSE_CACHE_ENABLED and feather is not None
+
+
+def cache_key(source, namespace: str, source_key: Optional[str] = None, **options: Any) -> str:
+    """
+    Content-addressed key: SHA-256 digest of the raw source bytes (any
+    buffer-protocol object) + parse options. Pass `source_key` (that hex
+    digest, e.g. computed once by the caller) to skip re-hashing the source.
+    Options must be JSON-serializable (unit strings, flags, formats...).
+    """
+    h = hashlib.sha256()
+    h.update((source_key or hashlib.sha256(source).hexdigest()).encode("ascii"))
+    h.update(json.dumps(
+        {"ns": namespace, "v": _CACHE_VERSION, **options},
+        sort_keys=True,
+        default=str,
+    ).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _paths(key: str, root: Path) -> tuple[Path, Path]:
+    return root / f"{key}.feather", root / f"{key}.json"
+
+
+def load_frame(key: str, root: Path = PARSE_CACHE_DIR) -> Optional[CachedFrame]:
+    """
+    Return the cached frame for `key` (memory-mapped Arrow IPC), or None.
+    A hit refreshes the entry's mtime, which drives LRU eviction.
+    """
+    if not cache_enabled():
+        return None
+
+    data_path, meta_path = _paths(key, root)
+    if not (data_path.exists() and meta_path.exists()):
+        return None
+
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        table = feather.read_table(data_path, memory_map=True)
+        df = table.to_pandas(split_blocks=True)
+        os.utime(data_path)
+        os.utime(meta_path)
+    except Exception:
+        # corrupted / partially written entry: treat as a miss
+        return None
+
+    return CachedFrame(df=df, meta=meta)
+
+
+def store_frame(
+    key: str,
+    df: pd.DataFrame,
+    meta: Dict[str, Any],
+    root: Path = PARSE_CACHE_DIR,
+    max_mb: float = PARSE_CACHE_MAX_MB,
+) -> None:
+    """
+    Store df (uncompressed Feather, so reads can be memory-mapped) + JSON meta.
+    Non-blocking: any I/O error leaves the cache untouched.
+    """
+    if not cache_enabled():
+        return
+
+    data_path, meta_path = _paths(key, root)
+    tmp_paths = []
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=True)
+
+        # write to temp files then rename: concurrent readers never see partial entries
+        fd, tmp_data = tempfile.mkstemp(dir=root, suffix=".tmp")
+        tmp_paths.append(tmp_data)
+        os.close(fd)
+        feather.write_feather(table, tmp_data, compression="uncompressed")
+        fd, tmp_meta = tempfile.mkstemp(dir=root, suffix=".tmp")
+        tmp_paths.append(tmp_meta)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=str)
+
+        os.replace(tmp_data, data_path)
+        os.replace(tmp_meta, meta_path)
+    except Exception:
+        return
+    finally:
+        # after a failed write (renamed files are already gone): evict_lru
+        # only sees complete entries, so temp files must not outlive the call
+        for tmp in tmp_paths:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    evict_lru(root, max_mb=max_mb)
+
+
+def evict_lru(root: Path = PARSE_CACHE_DIR, max_mb: float = PARSE_CACHE_MAX_MB, suffix: str = ".feather") -> None:
+    """
+    Delete least-recently-used entries (*<suffix> + .json meta) until the
+    cache fits in max_mb. Pinned entries (pin_source) are kept.
+    """
+    try:
+        entries = [p for p in root.glob(f"*{suffix}")]
+    except OSError:
+        return
+
+    sized = []
+    total = 0
+    for p in entries:
+        try:
+            st = p.stat()
+            meta = p.with_suffix(".json")
+            size = st.st_size + (meta.stat().st_size if meta.exists() else 0)
+        except OSError:
+            continue
+        sized.append((st.st_mtime, size, p))
+        total += size
+
+    budget = max_mb * 1024 * 1024
+    for _, size, p in sorted(sized):
+        if total <= budget:
+            break
+        if is_pinned(p):
+            continue  # still referenced by a live result
+        try:
+            p.unlink()
+            p.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+        except OSError:
+            # still memory-mapped by a reader (Windows): retry at next store
+            continue
+
+
+# =========================================================
+# SOURCE SPOOL
+# =========================================================
+
+# Spooled sources referenced by live results: skipped by evict_lru
+_PINNED: Counter = Counter()
+_PIN_LOCK = threading.Lock()
+
+
+def pin_source(path: Path) -> None:
+    with _PIN_LOCK:
+        _PINNED[Path(path)] += 1
+
+
+def unpin_source(path: Path) -> None:
+    with _PIN_LOCK:
+        path = Path(path)
+        _PINNED[path] -= 1
+        if _PINNED[path] <= 0:
+            del _PINNED[path]
+
+
+def is_pinned(path: Path) -> bool:
+    with _PIN_LOCK:
+        return Path(path) in _PINNED
+
+
+def spool_source(
+    source,
+    key: str,
+    root: Path = SOURCE_SPOOL_DIR,
+    max_mb: float = SOURCE_SPOOL_MAX_MB,
+) -> Optional[Path]:
+    """
+    Content-addressed on-disk copy of a raw source (any buffer-protocol
+    object), for loaders that must re-read it later: they keep a path
+    instead of the upload itself. `key` is the content hash.
+    Returns None if the copy cannot be written.
+    """
+    path = root / f"{key}.src"
+    try:
+        if path.exists():
+            os.utime(path)  # LRU
+            return path
+        root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(source)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+    except OSError:
+        return None
+
+    evict_lru(root, max_mb=max_mb, suffix=".src")
+    return path
@@ -0,0 +1,219 @@
+# utils/pyramid.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.decimate import minmax_indices
+
+
+# (label, bucket length in seconds), finest first
+PYRAMID_STEPS: Tuple[Tuple[str, int], ...] = (
+    ("1h", 3600),
+    ("6h", 6 * 3600),
+    ("1d", 86400),
+    ("1w", 7 * 86400),
+)
+
+_NS = 1_000_000_000
+
+
+@dataclass(frozen=True)
+class PyramidLevel:
+    """
+    Min/max aggregates of one resolution: for each bucket, the minimum and
+    maximum sample with their timestamps (int64 ns), buckets in time order.
+    """
+    label: str
+    step_ns: int
+    start: np.ndarray
+    t_lo: np.ndarray
+    y_lo: np.ndarray
+    t_hi: np.ndarray
+    y_hi: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+@dataclass(frozen=True)
+class MinMaxPyramid:
+    """
+    Raw series + min/max aggregates at several resolutions, built once per
+    dataset. query() answers any visible window with a bounded number of
+    points: raw samples when they fit (exact at full zoom), otherwise the
+    finest level that fits.
+    """
+    t: np.ndarray
+    y: np.ndarray
+    levels: Tuple[PyramidLevel, ...]
+
+    @property
+    def span(self) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        if len(self.t) == 0:
+            return None, None
+        return pd.Timestamp(self.t[0]), pd.Timestamp(self.t[-1])
+
+    def query(
+        self,
+        start=None,
+        end=None,
+        max_points: int = 4000,
+    ) -> Tuple[np.ndarray, np.ndarray, str]:
+        """(x as datetime64[ns], y, resolution label) for the window [start, end]."""
+        if len(self.t) == 0:  # e.g. all-NaN column: empty trace
+            return self.t.view("datetime64[ns]"), self.y, "raw"
+        lo = self.t[0] if start is None else pd.Timestamp(start).value
+        hi = self.t[-1] if end is None else pd.Timestamp(end).value
+
+        a = np.searchsorted(self.t, lo, side="left")
+        b = np.searchsorted(self.t, hi, side="right")
+        if b - a <= max_points:
+            return self.t[a:b].view("datetime64[ns]"), self.y[a:b], "raw"
+
+        for level in self.levels:
+            la = np.searchsorted(level.start, lo - lo % level.step_ns, side="left")
+            lb = np.searchsorted(level.start, hi, side="right")
+            if 2 * (lb - la) <= max_points or level is self.levels[-1]:
+                x, y = _interleave(level, la, lb)
+                if len(x) > max_points:
+                    idx = minmax_indices(y, max_points // 2)
+                    x, y = x[idx], y[idx]
+                return x.view("datetime64[ns]"), y, level.label
+
+        # no level (series shorter than the finest bucket): plain min/max decimation
+        idx = a + minmax_indices(self.y[a:b], max_points // 2)
+        return self.t[idx].view("datetime64[ns]"), self.y[idx], "raw"
+
+
+def _interleave(level: PyramidLevel, a: int, b: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Min and max of each bucket, in time order within the bucket."""
+    t_lo, y_lo = level.t_lo[a:b], level.y_lo[a:b]
+    t_hi, y_hi = level.t_hi[a:b], level.y_hi[a:b]
+    lo_first = t_lo <= t_hi
+
+    x = np.empty(2 * (b - a), dtype=np.int64)
+    y = np.empty(2 * (b - a), dtype=float)
+    x[0::2] = np.where(lo_first, t_lo, t_hi)
+    y[0::2] = np.where(lo_first, y_lo, y_hi)
+    x[1::2] = np.where(lo_first, t_hi, t_lo)
+    y[1::2] = np.where(lo_first, y_hi, y_lo)
+
+    # flat buckets (single sample, or min == max at the same instant): keep one point
+    keep = np.ones(len(x), dtype=bool)
+    keep[1::2] = t_lo != t_hi
+    return x[keep], y[keep]
+
+
+def _first_in_group(mask: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Position of the first True of each contiguous group (groups begin at `starts`)."""
+    pos = np.where(mask, np.arange(len(mask)), len(mask))
+    return np.minimum.reduceat(pos, starts)
+
+
+def _aggregate(finer: PyramidLevel, label: str, step_ns: int) -> PyramidLevel:
+    """Coarser level from a finer one (min of mins, max of maxes)."""
+    group = finer.start // step_ns
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    counts = np.diff(np.r_[starts, len(group)])
+
+    y_lo = np.minimum.reduceat(finer.y_lo, starts)
+    y_hi = np.maximum.reduceat(finer.y_hi, starts)
+    i_lo = _first_in_group(finer.y_lo == np.repeat(y_lo, counts), starts)
+    i_hi = _first_in_group(finer.y_hi == np.repeat(y_hi, counts), starts)
+
+    return PyramidLevel(
+        label=label,
+        step_ns=step_ns,
+        start=group[starts] * step_ns,
+        t_lo=finer.t_lo[i_lo],
+        y_lo=y_lo,
+        t_hi=finer.t_hi[i_hi],
+        y_hi=y_hi,
+    )
+
+
+def build_minmax_pyramid(
+    times,
+    values,
+    steps: Sequence[Tuple[str, int]] = PYRAMID_STEPS,
+) -> MinMaxPyramid:
+    """
+    Build the pyramid in O(n): each level is reduced from the previous one.
+    NaN / NaT samples are dropped; levels that do not reduce the number of
+    points (step <= sampling step) are skipped.
+    """
+    t = pd.DatetimeIndex(times).as_unit("ns").asi8
+    y = np.asarray(values, dtype=float)
+
+    valid = ~np.isnan(y) & (t != np.iinfo(np.int64).min)
+    t, y = t[valid], y[valid]
+    if len(t) > 1 and (np.diff(t) < 0).any():
+        order = np.argsort(t, kind="stable")
+        t, y = t[order], y[order]
+
+    levels = []
+    current = PyramidLevel(label="raw", step_ns=0, start=t, t_lo=t, y_lo=y, t_hi=t, y_hi=y)
+    for label, seconds in steps:
+        if len(current) == 0:
+            break
+        nxt = _aggregate(current, label, seconds * _NS)
+        if len(nxt) >= len(current):
+            continue
+        levels.append(nxt)
+        current = nxt
+
+    return MinMaxPyramid(t=t, y=y, levels=tuple(levels))
+
+
+# =========================================================
+# INCREMENTAL ENVELOPE (chunked input)
+# =========================================================
+
+class MinMaxEnvelope:
+    """
+    Per-bucket min/max of a series fed chunk by chunk (e.g. a file read in
+    chunks): memory grows with the number of buckets, not with the number
+    of samples. Buckets split across two chunks are merged in level().
+    """
+
+    def __init__(self, label: str = "1h", step_ns: int = 3600 * _NS):
+        self.label = label
+        self.step_ns = step_ns
+        self._parts: list = []
+
+    def update(self, times, values) -> None:
+        t = pd.DatetimeIndex(times).as_unit("ns").asi8
+        y = np.asarray(values, dtype=float)
+        valid = ~np.isnan(y) & (t != np.iinfo(np.int64).min)
+        t, y = t[valid], y[valid]
+        if len(t) == 0:
+            return
+        if len(t) > 1 and (np.diff(t) < 0).any():
+            order = np.argsort(t, kind="stable")
+            t, y = t[order], y[order]
+        raw = PyramidLevel(label="raw", step_ns=0, start=t, t_lo=t, y_lo=y, t_hi=t, y_hi=y)
+        self._parts.append(_aggregate(raw, self.label, self.step_ns))
+
+    def level(self) -> PyramidLevel:
+        if not self._parts:
+            empty = np.empty(0, dtype=np.int64)
+            return PyramidLevel(self.label, self.step_ns, empty, empty, np.empty(0), empty, np.empty(0))
+
+        fields = ("start", "t_lo", "y_lo", "t_hi", "y_hi")
+        cat = {f: np.concatenate([getattr(p, f) for p in self._parts]) for f in fields}
+        if (np.diff(cat["start"]) < 0).any():
+            order = np.argsort(cat["start"], kind="stable")
+            cat = {f: a[order] for f, a in cat.items()}
+        merged = _aggregate(PyramidLevel(self.label, self.step_ns, **cat), self.label, self.step_ns)
+        self._parts = [merged]
+        return merged
+
+    def points(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(x as datetime64[ns], y): min and max of each bucket, in time order."""
+        level = self.level()
+        x, y = _interleave(level, 0, len(level))
+        return x.view("datetime64[ns]"), y
@@ -0,0 +1,173 @@
+# utils/result_cache.py
+from __future__ import annotations
+
+import dataclasses
+import functools
+import io
+import sys
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import RESULT_CACHE_MAX_MB
+
+
+# functions / classes / modules: not part of a result's footprint
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Rough in-memory size of a result object (bytes): DataFrames, arrays and
+    byte blobs dominate, so those are counted exactly and everything else is
+    walked through dataclass fields / __dict__ / containers. Shared objects
+    are counted once.
+    """
+    seen: set = set()
+
+    def walk(o: Any, depth: int) -> int:
+        if o is None or depth > 12 or id(o) in seen:
+            return 0
+        seen.add(id(o))
+
+        if isinstance(o, (bytes, bytearray, memoryview)):
+            return len(o)
+        if isinstance(o, io.BytesIO):  # e.g. an uploaded file kept as source
+            return len(o.getvalue())
+        if isinstance(o, str):
+            return len(o)
+        if isinstance(o, np.ndarray):
+            return int(o.nbytes)
+        if isinstance(o, pd.DataFrame):
+            return int(o.memory_usage(index=True, deep=False).sum())
+        if isinstance(o, (pd.Series, pd.Index)):
+            return int(o.memory_usage(deep=False))
+        if isinstance(o, dict):
+            return sum(walk(k, depth + 1) + walk(v, depth + 1) for k, v in o.items())
+        if isinstance(o, (list, tuple, set, frozenset)):
+            return sum(walk(v, depth + 1) for v in o)
+        if isinstance(o, functools.partial):
+            return walk(o.args, depth + 1) + walk(o.keywords, depth + 1)
+        if isinstance(o, _OPAQUE):
+            return 0
+        if dataclasses.is_dataclass(o):
+            return sum(walk(getattr(o, f.name, None), depth + 1) for f in dataclasses.fields(o)) \
+                + walk(getattr(o, "__dict__", None), depth + 1)
+        if hasattr(o, "__dict__"):
+            return walk(vars(o), depth + 1)
+        return sys.getsizeof(o)
+
+    return walk(obj, 0)
+
+
+class ResultCache:
+    """
+    In-process cache of analysis results shared by all sessions.
+
+    - Keys must identify the inputs completely (content hash + options).
+    - Concurrent requests for the same key are coalesced: one caller
+      computes, the others wait for its result (single flight).
+    - LRU eviction once the estimated total size exceeds max_bytes. Each
+      result is measured once, when it is inserted (reports built lazily
+      afterwards are bounded by the stage memo's own budget).
+    """
+
+    def __init__(self, max_bytes: int, size_of: Callable[[Any], int] = estimate_size):
+        self.max_bytes = max_bytes
+        self._size_of = size_of
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._total = 0
+        self._keys: Dict[int, Hashable] = {}  # id(value) -> key, for cached values
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (value, hit). hit is True when the value was computed by someone else."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key], True
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            return future.result(), True
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(exc)
+            raise
+
+        size = self._size_of(value)  # outside the lock: walks the whole result
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._remove(key)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._total += size
+            self._keys[id(value)] = key
+            self._evict()
+        future.set_result(value)
+        return value, False
+
+    def _remove(self, key: Hashable) -> None:
+        if key not in self._data:
+            return
+        value = self._data.pop(key)
+        self._total -= self._sizes.pop(key)
+        if self._keys.get(id(value)) == key:
+            del self._keys[id(value)]
+
+    def _evict(self) -> None:
+        while self._data and self._total > self.max_bytes:
+            self._remove(next(iter(self._data)))
+
+    def lookup(self, key: Hashable) -> Any:
+        """Cached value for `key`, or None (no computation)."""
+        with self._lock:
+            return self._data.get(key)
+
+    def key_of(self, value: Any) -> Optional[Hashable]:
+        """Key under which `value` itself is cached, or None."""
+        with self._lock:
+            return self._keys.get(id(value))
+
+    def holds(self, value: Any) -> bool:
+        """True while `value` itself is cached (its memory is then accounted here)."""
+        with self._lock:
+            return id(value) in self._keys
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._keys.clear()
+            self._total = 0
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Shared by every Streamlit session of this process
+RESULT_CACHE = ResultCache(max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024))
@@ -25,7 +25,8 @@ def write_run_log(
     time_step_minutes: Optional[int] = None,
     quality: Optional[Any] = None,   # DataQuality
     warnings: Optional[List[str]] = None,
-) -> None:
+) -> str:
+    """Write the run log and return its text (kept with results served from a cache)."""
     log_path.parent.mkdir(parents=True, exist_ok=True)
 
     lines: List[str] = []
@@ -56,9 +57,19 @@ def write_run_log(
 
     if quality is not None:
         lines.append("Quality summary:")
-        for field in ["n_rows", "n_nan", "n_nat", "start", "end", "expected_rows", "warning"]:
+        for field in [
+            "n_rows", "n_nan", "n_nat", "start", "end", "expected_rows",
+            "detected_step_minutes", "n_missing", "n_duplicates", "n_irregular", "warning",
+        ]:
             if hasattr(quality, field):
                 lines.append(f"  {field}: {_fmt(getattr(quality, field))}")
+        gaps = getattr(quality, "gaps", None) or []
+        if gaps:
+            lines.append(f"  gaps ({len(gaps)}, first / last missing timestamp):")
+            for first, last, n in gaps[:20]:
+                lines.append(f"    {first} → {last} ({n} missing)")
+            if len(gaps) > 20:
+                lines.append(f"    ... {len(gaps) - 20} more")
         lines.append("")
 
     if warnings:
@@ -70,4 +81,6 @@ def write_run_log(
         lines.append("Warnings: none")
         lines.append("")
 
-    log_path.write_text("\n".join(lines), encoding="utf-8")
+    text = "\n".join(lines)
+    log_path.write_text(text, encoding="utf-8")
+    return text
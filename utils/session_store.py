@@ -0,0 +1,242 @@
+# utils/session_store.py
+from __future__ import annotations
+
+import io
+import itertools
+import pickle
+import shutil
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import OUTPUTS_DIR, SESSION_STORE_MAX_MB
+from utils.artifacts import LazyArtifact
+from utils.result_cache import RESULT_CACHE, ResultCache, estimate_size
+
+try:  # optional: without pyarrow, DataFrames are pickled inline
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover
+    pa = None
+    feather = None
+
+
+# Objects at least this large get their own memory-mappable file when spilled
+_SPILL_MIN_BYTES = 1024 * 1024
+
+
+# =========================================================
+# SPILL FORMAT
+# =========================================================
+
+def _read_bytes(path: str) -> bytes:
+    return Path(path).read_bytes()
+
+
+class _SpillPickler(pickle.Pickler):
+    """
+    Pickles a result, writing large parts next to the pickle:
+    DataFrames -> Feather (read back memory-mapped), arrays -> .npy
+    (np.load mmap_mode="r"), built report bytes -> raw file read on demand.
+    """
+
+    def __init__(self, file, spill_dir: Path):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spill_dir = spill_dir
+        self._n = itertools.count()
+
+    def _path(self, suffix: str) -> Path:
+        return self.spill_dir / f"part_{next(self._n)}{suffix}"
+
+    def persistent_id(self, obj):
+        if isinstance(obj, LazyArtifact) and obj.ready and len(obj.get()) >= _SPILL_MIN_BYTES:
+            path = self._path(".bin")
+            path.write_bytes(obj.get())
+            return ("artifact", str(path))
+
+        if isinstance(obj, np.ndarray) and obj.nbytes >= _SPILL_MIN_BYTES and obj.dtype != object:
+            path = self._path(".npy")
+            np.save(path, obj, allow_pickle=False)
+            return ("ndarray", str(path))
+
+        if isinstance(obj, pd.DataFrame) and feather is not None and estimate_size(obj) >= _SPILL_MIN_BYTES:
+            try:
+                path = self._path(".feather")
+                feather.write_feather(pa.Table.from_pandas(obj, preserve_index=True), path, compression="uncompressed")
+                return ("frame", str(path))
+            except Exception:
+                return None  # unsupported layout: pickled inline
+
+        if isinstance(obj, bytes) and len(obj) >= _SPILL_MIN_BYTES:
+            path = self._path(".bin")
+            path.write_bytes(obj)
+            return ("bytes", str(path))
+
+        return None
+
+
+class _SpillUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        kind, path = pid
+        if kind == "artifact":
+            return LazyArtifact(partial(_read_bytes, path))
+        if kind == "ndarray":
+            return np.load(path, mmap_mode="r")
+        if kind == "frame":
+            return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+        if kind == "bytes":
+            return _read_bytes(path)
+        raise pickle.UnpicklingError(f"unknown spill part: {kind}")
+
+
+def spill_to_disk(obj: Any, spill_dir: Path) -> None:
+    spill_dir.mkdir(parents=True, exist_ok=True)
+    buf = io.BytesIO()
+    _SpillPickler(buf, spill_dir).dump(obj)
+    (spill_dir / "result.pkl").write_bytes(buf.getvalue())
+
+
+def load_from_disk(spill_dir: Path) -> Any:
+    with open(spill_dir / "result.pkl", "rb") as f:
+        return _SpillUnpickler(f).load()
+
+
+# =========================================================
+# STORE
+# =========================================================
+
+@dataclass
+class _Entry:
+    value: Optional[Any]
+    spill_dir: Path
+    size: int = 0           # estimated once, when the value (re)enters memory
+    spilled: bool = False   # a valid copy exists in spill_dir
+    cache_key: Optional[Hashable] = None  # key of the value in the shared result cache
+
+
+class ResultHandle:
+    """
+    What a session keeps in st.session_state instead of the result itself.
+    When the handle is garbage-collected (result cleared, session closed),
+    the stored result and its spill files are dropped.
+    """
+
+    def __init__(self, store: "SessionResultStore", entry_id: int):
+        self._store = store
+        self.entry_id = entry_id
+        weakref.finalize(self, store.drop, entry_id)
+
+    def get(self) -> Any:
+        return self._store.get(self.entry_id)
+
+
+class SessionResultStore:
+    """
+    Per-process store of session results with a memory budget.
+
+    Above max_bytes (estimated), least-recently-used results are written to
+    their run dir (see _SpillPickler) and released from memory; get()
+    rehydrates them transparently.
+
+    Results still held by the shared result cache are neither counted nor
+    spilled (dropping the session's reference would free nothing), and a
+    spilled result whose key is cached again is taken from the cache
+    instead of being loaded as a second copy.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        spill_root: Path = OUTPUTS_DIR / "cache" / "sessions",
+        shared: Optional[ResultCache] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.spill_root = spill_root
+        self._shared = shared
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def _spill_dir(self, value: Any, entry_id: int) -> Path:
+        run_dir = getattr(value, "run_dir", None)
+        root = Path(run_dir) / "spill" if run_dir else self.spill_root
+        return root / f"session_result_{entry_id}"
+
+    def put(self, value: Any) -> ResultHandle:
+        size = estimate_size(value)  # once, outside the lock
+        cache_key = self._shared.key_of(value) if self._shared is not None else None
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = _Entry(
+                value=value,
+                spill_dir=self._spill_dir(value, entry_id),
+                size=size,
+                cache_key=cache_key,
+            )
+            self._enforce_budget(keep=entry_id)
+            return ResultHandle(self, entry_id)
+
+    def get(self, entry_id: int) -> Any:
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(entry_id)
+            if entry.value is not None:
+                return entry.value
+
+            cached = None
+            if self._shared is not None and entry.cache_key is not None:
+                cached = self._shared.lookup(entry.cache_key)
+            entry.value = cached if cached is not None else load_from_disk(entry.spill_dir)
+            entry.size = estimate_size(entry.value)
+            self._enforce_budget(keep=entry_id)
+            return entry.value
+
+    def drop(self, entry_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(entry_id, None)
+        if entry is not None and entry.spilled:
+            shutil.rmtree(entry.spill_dir, ignore_errors=True)
+
+    def _owned(self, e: _Entry) -> bool:
+        """Resident and not held by the shared cache (spilling it frees memory)."""
+        return e.value is not None and not (self._shared is not None and self._shared.holds(e.value))
+
+    def _enforce_budget(self, keep: int) -> None:
+        owned = [(k, e) for k, e in self._entries.items() if self._owned(e)]
+        total = sum(e.size for _, e in owned)
+
+        for k, e in owned:  # least recently used first
+            if total <= self.max_bytes:
+                break
+            if k == keep:
+                continue
+            if not e.spilled:
+                try:
+                    spill_to_disk(e.value, e.spill_dir)
+                    e.spilled = True
+                except Exception:
+                    # non-blocking: the result just stays in memory
+                    shutil.rmtree(e.spill_dir, ignore_errors=True)
+                    continue
+            e.value = None
+            total -= e.size
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values() if self._owned(e))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+SESSION_STORE = SessionResultStore(max_bytes=int(SESSION_STORE_MAX_MB * 1024 * 1024), shared=RESULT_CACHE)
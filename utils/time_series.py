@@ -4,6 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 
@@ -42,18 +43,116 @@ def parse_time_step_from_header(header_info: Dict[str, str]) -> TimeStepInfo:
 
 
 def detect_time_step_from_datetime(df: pd.DataFrame) -> TimeStepInfo:
+    """
+    Modal step of the 'datetime' column (see profile_timeline). Unknown when
+    duplicated timestamps dominate (e.g. sub-hourly rows still stamped with
+    their hour).
+    """
     if "datetime" not in df.columns or len(df) < 2:
         return TimeStepInfo(minutes=None, source="unknown")
 
-    s = df["datetime"].dropna()
-    if len(s) < 2:
+    profile = profile_timeline(df["datetime"])
+    if profile.modal_step_minutes is None or 2 * profile.n_duplicates >= profile.n_points - 1:
         return TimeStepInfo(minutes=None, source="unknown")
 
-    delta = (s.iloc[1] - s.iloc[0]).total_seconds() / 60.0
-    if delta <= 0:
+    minutes = int(round(profile.modal_step_minutes))
+    if minutes <= 0:
         return TimeStepInfo(minutes=None, source="unknown")
+    return TimeStepInfo(minutes=minutes, source="auto")
+
+
+@dataclass(frozen=True)
+class TimelineProfile:
+    """
+    Shape of a timestamp series:
+      - modal step + histogram of the steps (minutes -> occurrences)
+      - gaps: (first missing timestamp, last missing timestamp, n missing)
+      - duplicates: (timestamp, n rows sharing it)
+      - irregular steps (neither the reference step nor a multiple of it)
+        and backward steps (unsorted timestamps)
+    Interval lists are capped at max_intervals; the n_* counters are not.
+    """
+    n_points: int
+    modal_step_minutes: Optional[float]
+    step_counts: Dict[float, int]
+    gaps: List[Tuple[pd.Timestamp, pd.Timestamp, int]]
+    n_missing: int
+    duplicates: List[Tuple[pd.Timestamp, int]]
+    n_duplicates: int
+    n_irregular: int
+    n_backwards: int
+
+
+def profile_timeline(
+    times: pd.Series,
+    step_minutes: Optional[int] = None,
+    max_intervals: int = 1000,
+    top_steps: int = 5,
+) -> TimelineProfile:
+    """
+    One O(n) pass over the consecutive differences of `times` (NaT ignored):
+    the modal step comes from a histogram of the steps in whole seconds (up
+    to one day), gaps / duplicates from run-length encoding of the diffs.
+    Gaps are measured against `step_minutes` when given, else the modal step.
+    """
+    t = pd.Series(times).to_numpy()
+    if t.dtype.kind != "M":
+        t = pd.to_datetime(t).to_numpy()
+    t = t[~np.isnat(t)]
+    unit = np.datetime_data(t.dtype)[0]
+    per_sec = int(np.timedelta64(1, "s").astype(f"timedelta64[{unit}]").astype(np.int64))
+
+    ti = t.view(np.int64)
+    d = np.diff(ti)
+    forward = d[d > 0]
+
+    # --- modal step: histogram of the positive steps (seconds, <= 1 day)
+    step_counts: Dict[float, int] = {}
+    modal = None
+    sec = forward // per_sec
+    sec = sec[(sec > 0) & (sec <= 86400)]
+    if sec.size:
+        hist = np.bincount(sec)
+        modal = int(hist.argmax()) * per_sec
+        for s_ in np.argsort(hist)[::-1][:top_steps]:
+            if hist[s_] > 0:
+                step_counts[int(s_) / 60.0] = int(hist[s_])
+
+    step = int(step_minutes) * 60 * per_sec if step_minutes else modal
 
-    return TimeStepInfo(minutes=int(round(delta)), source="auto")
+    # --- gaps: steps that are a multiple (> 1) of the reference step
+    gaps: List[Tuple[pd.Timestamp, pd.Timestamp, int]] = []
+    n_missing = n_irregular = 0
+    if step:
+        pos = d > 0
+        off_grid = pos & (d % step != 0)
+        n_irregular = int(off_grid.sum())
+        gap_idx = np.flatnonzero(pos & ~off_grid & (d > step))
+        missing = d[gap_idx] // step - 1
+        n_missing = int(missing.sum())
+        for i, m in zip(gap_idx[:max_intervals], missing[:max_intervals]):
+            gaps.append((pd.Timestamp(t[i] + np.timedelta64(step, unit)), pd.Timestamp(t[i + 1] - np.timedelta64(step, unit)), int(m)))
+
+    # --- duplicates: runs of zero steps
+    dup_idx = np.flatnonzero(d == 0)
+    duplicates: List[Tuple[pd.Timestamp, int]] = []
+    if dup_idx.size:
+        run_starts = np.flatnonzero(np.r_[True, np.diff(dup_idx) != 1])
+        run_lens = np.diff(np.r_[run_starts, dup_idx.size])
+        for r, n in zip(run_starts[:max_intervals], run_lens[:max_intervals]):
+            duplicates.append((pd.Timestamp(t[dup_idx[r]]), int(n) + 1))
+
+    return TimelineProfile(
+        n_points=len(t),
+        modal_step_minutes=modal / per_sec / 60.0 if modal else None,
+        step_counts=step_counts,
+        gaps=gaps,
+        n_missing=n_missing,
+        duplicates=duplicates,
+        n_duplicates=int(dup_idx.size),
+        n_irregular=n_irregular,
+        n_backwards=int((d < 0).sum()),
+    )
 
 
 def resample_to_hourly(
@@ -66,19 +165,98 @@ def resample_to_hourly(
       - sum_cols summed per hour
       - mean_cols averaged per hour
     """
+    return resample_to_step(df, sum_cols, mean_cols, rule="1h")
+
+
+def resample_to_step(
+    df: pd.DataFrame,
+    sum_cols: List[str],
+    mean_cols: List[str],
+    rule: str = "1h",
+) -> pd.DataFrame:
+    """
+    Resample to a fixed target step (rule: "30min", "1h", "1D"...):
+      - sum_cols summed per period
+      - mean_cols averaged per period
+    Same output as pandas resample (bins labeled by their left edge, NaN
+    skipped). A regular, gap-free series is aggregated with np.add.reduceat
+    over the column arrays (no copy of the frame); anything else goes
+    through pandas.
+    """
     if "datetime" not in df.columns:
         raise KeyError("df must contain a 'datetime' column for resampling")
 
-    dfi = df.copy().set_index("datetime")
-
     agg: Dict[str, str] = {}
     for c in sum_cols:
-        if c in dfi.columns:
+        if c in df.columns:
             agg[c] = "sum"
     for c in mean_cols:
-        if c in dfi.columns:
+        if c in df.columns:
             agg[c] = "mean"
 
+    out = _resample_regular_grid(df, agg, rule)
+    if out is not None:
+        return out
+
+    dfi = df.set_index("datetime")
+
     # keep other cols? In v1 we keep only known meteo cols, so no need.
-    out = dfi.resample("1h").agg(agg).reset_index()
+    out = dfi.resample(rule).agg(agg).reset_index()
     return out
+
+
+def _resample_regular_grid(df: pd.DataFrame, agg: Dict[str, str], rule: str) -> Optional[pd.DataFrame]:
+    """
+    Fast path of resample_to_step: returns None unless the datetimes are a
+    regular grid (constant step, no gap / NaT) whose step divides the
+    target period, with numeric columns only.
+    """
+    times = df["datetime"].to_numpy()
+    if times.dtype.kind != "M" or len(times) < 2 or np.isnat(times).any():
+        return None
+    if any(df[c].dtype.kind not in "biuf" for c in agg):
+        return None
+
+    offset = pd.tseries.frequencies.to_offset(rule)
+    if isinstance(offset, pd.offsets.Day):  # naive datetimes: 1 day = 24 h
+        period = np.timedelta64(offset.n, "D")
+    elif isinstance(offset, pd.offsets.Tick):
+        period = np.timedelta64(offset.nanos, "ns")
+    else:  # calendar rules ("MS", "YE"...): not a fixed period
+        return None
+
+    unit = np.datetime_data(times.dtype)[0]
+    t = times.view(np.int64)
+    step = int(t[1] - t[0])
+    period = int(period.astype(f"timedelta64[{unit}]").astype(np.int64))
+    if step <= 0 or period <= 0 or period % step or (np.diff(t) != step).any():
+        return None
+
+    # pandas bins: origin at midnight of the first day, edges every `period`
+    day = int(np.timedelta64(1, "D").astype(f"timedelta64[{unit}]").astype(np.int64))
+    origin = (t[0] // day) * day
+    first_bin = (t[0] - origin) // period
+    bins = (t - origin) // period - first_bin  # 0, 0, ..., 1, 1, ... (contiguous)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    counts = np.diff(np.r_[starts, len(t)])
+
+    data: Dict[str, np.ndarray] = {
+        "datetime": (origin + (first_bin + bins[starts]) * period).astype(times.dtype),
+    }
+    for c, how in agg.items():
+        v = df[c].to_numpy()
+        if v.dtype.kind == "b":
+            v = v.astype(np.int64)
+        nan = np.isnan(v) if v.dtype.kind == "f" else None
+        if nan is not None and nan.any():
+            total = np.add.reduceat(np.where(nan, 0.0, v), starts)
+            n = counts - np.add.reduceat(nan.astype(np.int64), starts)
+        else:
+            total = np.add.reduceat(v, starts)
+            n = counts
+        if how == "sum":
+            data[c] = total
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                data[c] = np.where(n > 0, total / np.maximum(n, 1), np.nan)
+    return pd.DataFrame(data)
@@ -7,6 +7,8 @@ import re
 
 import pandas as pd
 
+from utils.frames import owned_copy
+
 
 # --- Normalize unit strings ---
 _UNIT_ALIASES = {
@@ -62,7 +64,8 @@ def convert_irradiance_units(
     if target_unit not in {"W/m²", "kW/m²"}:
         raise ValueError("target_unit must be 'W/m²' or 'kW/m²'")
 
-    out = df.copy()
+    # shallow under copy-on-write: only the converted columns are reallocated
+    out = owned_copy(df)
     new_units = dict(units_by_col)
     warnings: List[str] = []
 
@@ -1,10 +1,13 @@
 # utils/validation.py
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 import pandas as pd
 
+from utils.column_stats import ColumnStats
+from utils.time_series import profile_timeline
+
 
 @dataclass(frozen=True)
 class DataQuality:
@@ -15,24 +18,57 @@ class DataQuality:
     end: Optional[pd.Timestamp]
     expected_rows: Optional[int]
     warning: Optional[str]
+    # timeline profile (utils.time_series.profile_timeline)
+    detected_step_minutes: Optional[float] = None
+    gaps: List[Tuple[pd.Timestamp, pd.Timestamp, int]] = field(default_factory=list)  # (first, last, n missing)
+    n_missing: int = 0
+    duplicates: List[Tuple[pd.Timestamp, int]] = field(default_factory=list)  # (timestamp, n rows)
+    n_duplicates: int = 0
+    n_irregular: int = 0
 
 
-def basic_quality_check(df: pd.DataFrame, step_minutes: Optional[int]) -> DataQuality:
+def basic_quality_check(
+    df: pd.DataFrame,
+    step_minutes: Optional[int],
+    column_stats: Optional[ColumnStats] = None,
+) -> DataQuality:
     n_rows = len(df)
-    n_nat = int(df["datetime"].isna().sum()) if "datetime" in df.columns else 0
-    n_nan_total = int(df.isna().sum().sum())
-    # remove NaT counted within NaNs if datetime exists
-    n_nan = max(0, n_nan_total - n_nat)
+    if column_stats is not None:
+        # counts / period already computed in the stats pass
+        n_nat = column_stats.n_nat
+        n_nan = column_stats.total_nan
+        start, end = column_stats.start, column_stats.end
+    else:
+        n_nat = int(df["datetime"].isna().sum()) if "datetime" in df.columns else 0
+        n_nan_total = int(df.isna().sum().sum())
+        # remove NaT counted within NaNs if datetime exists
+        n_nan = max(0, n_nan_total - n_nat)
 
-    start = df["datetime"].min() if "datetime" in df.columns else None
-    end = df["datetime"].max() if "datetime" in df.columns else None
+        start = df["datetime"].min() if "datetime" in df.columns else None
+        end = df["datetime"].max() if "datetime" in df.columns else None
 
     expected = None
-    warning = None
+    problems: List[str] = []
     if step_minutes and start is not None and end is not None and pd.notna(start) and pd.notna(end):
         expected = int(((end - start).total_seconds() / 60.0) / step_minutes) + 1
         if expected != n_rows:
-            warning = f"Row count mismatch: got {n_rows}, expected {expected} for step={step_minutes} min."
+            problems.append(f"Row count mismatch: got {n_rows}, expected {expected} for step={step_minutes} min.")
+
+    profile = profile_timeline(df["datetime"], step_minutes) if "datetime" in df.columns else None
+    if profile is not None:
+        if profile.gaps:
+            first, last, _ = profile.gaps[0]
+            problems.append(
+                f"{profile.n_missing} missing timestep(s) in {len(profile.gaps)} gap(s) (first: {first} → {last})."
+            )
+        if profile.duplicates:
+            problems.append(
+                f"{profile.n_duplicates} duplicated timestamp(s) (first: {profile.duplicates[0][0]})."
+            )
+        if profile.n_irregular:
+            problems.append(f"{profile.n_irregular} irregular step(s) (modal step {profile.modal_step_minutes:g} min).")
+        if profile.n_backwards:
+            problems.append(f"{profile.n_backwards} backward step(s): timestamps not sorted.")
 
     return DataQuality(
         n_rows=n_rows,
@@ -41,5 +77,11 @@ def basic_quality_check(df: pd.DataFrame, step_minutes: Optional[int]) -> DataQu
         start=start,
         end=end,
         expected_rows=expected,
-        warning=warning,
+        warning=" ".join(problems) or None,
+        detected_step_minutes=profile.modal_step_minutes if profile else None,
+        gaps=profile.gaps if profile else [],
+        n_missing=profile.n_missing if profile else 0,
+        duplicates=profile.duplicates if profile else [],
+        n_duplicates=profile.n_duplicates if profile else 0,
+        n_irregular=profile.n_irregular if profile else 0,
     )